@@ -1,9 +1,113 @@
+import pickle
+import time
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
+from checkpoint import append_records, read_records, read_snapshot, remove, write_snapshot
 from options_pricing import OptionsPricing
+from model import select_features
+from model_store import model_id
+from profiling import profiled
+
+# Contract selection, sizing and exit rules (also used by the journal
+# resampler and the exit simulator, so they all trade the same way)
+OTM_PCT = 0.003 # Strike ~0.3% OTM
+SIZE_PCT = 0.20 # Share of the balance per trade
+MAX_CONTRACTS = 100 # Cap to prevent extreme leverage
+MAX_RISK_PCT = 0.50 # Never more than 50% of the account on one trade
+TP_PCT = 5.0 # 500% (Moonshot)
+SL_PCT = 0.40 # 40% Hard Stop
+TRAIL_PCT = 0.20 # Trail by 20% from Peak
+EOD_MINUTES = 15 # Force close this close to expiry
+MARKET_CLOSE_MINUTES = 20 * 60 # 0DTE expires at 16:00 ET (20:00 UTC)
+REPORT_PATHS = 10_000 # Resampled equity paths in the report (utility/resample.py runs more)
+BAR_MINUTES = 15 # Signal bars
+INTRABAR_INTERVAL = '1m' # Bar store interval of the intrabar exits (bar_store.py --keep-1m)
+INTRABAR_CHUNK_MINUTES = 60 # 1m bars read from the store at a time
+INTRABAR_CACHE_CHUNKS = 64 # Chunks kept in memory (least recently used dropped first)
+CHECKPOINT_SECONDS = 60 # Wall time between checkpoints of a run (checkpoint=path)
+
+def position_size(balance, premium):
+    """
+    Contracts to buy at this premium (0 = skip the trade): SIZE_PCT of the
+    balance, capped at MAX_CONTRACTS; if that is under one contract, one
+    contract when it costs at most MAX_RISK_PCT of the balance.
+    Works elementwise on arrays of balances and premiums.
+    """
+    balance = np.asarray(balance, dtype=np.float64)
+    premium = np.asarray(premium, dtype=np.float64)
+    # Number of contracts (x100 multiplier)
+    contracts = np.minimum(np.floor(balance * SIZE_PCT / (premium * 100)), MAX_CONTRACTS)
+    # If allocation is too small for 1 contract, try to use more capital (up to MAX_RISK_PCT)
+    contracts = np.where(contracts < 1, balance * MAX_RISK_PCT >= premium * 100, contracts)
+    # Final sanity check: Don't risk more than MAX_RISK_PCT of the account on one trade
+    contracts = np.where(contracts * premium * 100 > balance * MAX_RISK_PCT, 0, contracts)
+    return contracts.astype(np.int64)
+
+class MinuteBars:
+    """
+    1m closes from the bar store, read only for the 15m bars a position is
+    open on. Reads are aligned chunks of INTRABAR_CHUNK_MINUTES (a slice of
+    the memory-mapped columns, two searchsorted calls) kept in a bounded LRU
+    cache, so the cost follows the time spent in trades, not the history
+    length, and the 15m bars of a chunk share one read.
+    """
+    def __init__(self, symbol, store=None, interval=INTRABAR_INTERVAL, chunk_minutes=INTRABAR_CHUNK_MINUTES,
+                 max_chunks=INTRABAR_CACHE_CHUNKS):
+        from bar_store import BarStore
+        
+        self.store = store or BarStore()
+        self.symbol = symbol
+        self.interval = interval
+        self.chunk_ns = chunk_minutes * 60 * 10**9
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+        self.reads = self.hits = self.rows = 0
+        
+    def available(self):
+        return self.store.has(self.symbol, self.interval)
+        
+    def _chunk(self, key):
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            self.hits += 1
+            return self.chunks[key]
+        # Keys count UTC ns (naive timestamps are taken as UTC, as in the 15m data)
+        start = pd.Timestamp(key * self.chunk_ns, tz='UTC')
+        bars = self.store.read(self.symbol, self.interval, start, start + pd.Timedelta(self.chunk_ns - 1),
+                               columns=['Close'])
+        chunk = (bars.index.as_unit('ns').asi8, bars['Close'].to_numpy())
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        self.reads += 1
+        self.rows += len(chunk[0])
+        return chunk
+        
+    def bar(self, timestamp, bar_minutes=BAR_MINUTES):
+        """
+        (ns times, closes) of the 1m bars inside the bar starting at timestamp.
+        """
+        timestamp = pd.Timestamp(timestamp)
+        start = (timestamp.tz_convert('UTC') if timestamp.tzinfo else timestamp).as_unit('ns').value
+        end = start + bar_minutes * 60 * 10**9
+        parts = [self._chunk(key) for key in range(start // self.chunk_ns, (end - 1) // self.chunk_ns + 1)]
+        times = np.concatenate([t for t, _ in parts])
+        closes = np.concatenate([c for _, c in parts])
+        lo, hi = np.searchsorted(times, [start, end])
+        return times[lo:hi], closes[lo:hi]
+
+def checkpoint_model_session(path):
+    """
+    Session folder of the model a backtest checkpoint was taken with (None
+    when there is no checkpoint or the model was not loaded from a session).
+    """
+    snapshot = read_snapshot(path)
+    return snapshot[0].get('model_session') if snapshot else None
 
 class Backtester:
-    def __init__(self, df, model, feature_cols, initial_balance=1000, symbol='SPY'):
+    def __init__(self, df, model, feature_cols, initial_balance=1000, symbol='SPY', output_folder=None, intrabar=False,
+                 store=None, checkpoint=None, resume=False, checkpoint_seconds=CHECKPOINT_SECONDS, model_session=None):
         self.df = df
         self.model = model
         self.feature_cols = feature_cols
@@ -13,15 +117,87 @@ class Backtester:
         self.position = None 
         self.op = OptionsPricing()
         self.symbol = symbol
-        
-    def run(self):
+        self.output_folder = output_folder # Session folder (default: SYMBOL/HHMM_MM_DD/)
+        # Intrabar exits: open positions are checked on every 1m close of the bar store
+        self.minutes = None
+        if intrabar:
+            self.minutes = MinuteBars(symbol, store)
+            if not self.minutes.available():
+                print(f"⚠️ No {INTRABAR_INTERVAL} bars stored for {symbol} (bar_store.py --keep-1m): exits on 15m closes")
+                self.minutes = None
+        # Checkpoints: engine state every checkpoint_seconds to `checkpoint`, journal rows to `checkpoint`.journal
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.checkpoint_seconds = checkpoint_seconds
+        self.model_session = model_session # Session folder the model was loaded from, kept in the checkpoint
+        self._model_id = None
+        self.journal_saved = 0 # Journal rows already in the side file
+        self.journal_offset = 0 # Its size in bytes
+        
+    def _run_key(self):
+        """
+        What a checkpoint must have been taken on to be resumed: same bars, model, symbol, start balance and exit mode.
+        """
+        if self._model_id is None:
+            self._model_id = model_id(self.model)
+        return {'symbol': self.symbol, 'rows': len(self.df), 'first': str(self.df.index[0]), 'last': str(self.df.index[-1]),
+                'features': list(self.feature_cols), 'model': self._model_id, 'initial_balance': self.initial_balance,
+                'intrabar': self.minutes is not None}
+                
+    def save_checkpoint(self, cursor):
+        """
+        State before bar `cursor`: new journal rows are appended to the side
+        file first, then the snapshot (cursor, balance, open position with
+        its max_premium, journal offset) replaces the previous one.
+        """
+        self.journal_offset = append_records(f"{self.checkpoint}.journal", self.journal[self.journal_saved:],
+                                             self.journal_offset)
+        self.journal_saved = len(self.journal)
+        write_snapshot(self.checkpoint, dict(self._run_key(), model_session=self.model_session), cursor=np.int64(cursor), balance=np.float64(self.balance),
+                       journal=np.array([self.journal_saved, self.journal_offset], dtype=np.int64),
+                       position=np.frombuffer(pickle.dumps(self.position), dtype=np.uint8))
+                       
+    def load_checkpoint(self):
+        """
+        Restores the last checkpoint and returns its bar cursor (None when
+        there is none, or it belongs to another run).
+        """
+        snapshot = read_snapshot(self.checkpoint)
+        if snapshot is None:
+            return None
+        meta, state = snapshot
+        key = {k: v for k, v in meta.items() if k != 'model_session'}
+        if key != self._run_key():
+            print(f"⚠️ Checkpoint '{self.checkpoint}' is from another run (data, model or settings changed): starting over")
+            return None
+        self.journal_saved, self.journal_offset = (int(v) for v in state['journal'])
+        self.journal = read_records(f"{self.checkpoint}.journal", self.journal_offset)
+        self.balance = float(state['balance'])
+        self.position = pickle.loads(state['position'].tobytes())
+        return int(state['cursor'])
+        
+    @profiled('Backtester.run')
+    def run(self, report=True):
         print(f"Starting 0DTE Options Backtest for {self.symbol}...")
         
-        X = self.df[self.feature_cols]
+        X = select_features(self.df, self.feature_cols)
         predictions = self.model.predict(X)
+        self.signals = pd.Series(predictions, index=self.df.index) # Per-bar model decisions
+        
+        start = 20 # Start at 20 for vol calc
+        if self.checkpoint and self.resume:
+            cursor = self.load_checkpoint()
+            if cursor is not None:
+                start = cursor
+                print(f"Resuming at bar {start:,}/{len(self.df):,} ({len(self.journal)} trades, balance ${self.balance:,.2f})")
+        next_checkpoint = time.perf_counter() + self.checkpoint_seconds
         
         # Iterate
-        for i in range(20, len(self.df) - 1): # Start at 20 for vol calc
+        for i in range(start, len(self.df) - 1):
+            if self.checkpoint and time.perf_counter() >= next_checkpoint:
+                self.save_checkpoint(i)
+                next_checkpoint = time.perf_counter() + self.checkpoint_seconds
+                
             current_bar = self.df.iloc[i]
             timestamp = self.df.index[i]
             
@@ -77,7 +253,14 @@ class Backtester:
                     if signal != 0:
                         self.enter_position(signal, current_bar, timestamp, i)
 
-        self.generate_report()
+        if self.minutes is not None:
+            m = self.minutes
+            print(f"Intrabar exits: {m.rows:,} {INTRABAR_INTERVAL} bars read in {m.reads} chunks ({m.hits} cache hits)")
+        if report:
+            self.generate_report()
+        if self.checkpoint:
+            # Finished: a later run starts from the beginning
+            remove(self.checkpoint, f"{self.checkpoint}.journal")
         
     def enter_position(self, signal, bar, timestamp, index):
         # 1. Determine Option Type
@@ -96,24 +279,17 @@ class Backtester:
         # We want OTM options that have a high probability of going ITM.
         # Target ~0.3% OTM (approx $1.50 - $2.00 on SPY)
         # This gives cheaper premiums (higher leverage) but realistic ITM chance.
-        otm_pct = 0.003
         if option_type == 'call':
-            strike = round(spot_price * (1 + otm_pct))
+            strike = round(spot_price * (1 + OTM_PCT))
         else:
-            strike = round(spot_price * (1 - otm_pct))
+            strike = round(spot_price * (1 - OTM_PCT))
         
         # 4. Calculate Time to Expiry (T)
         # 0DTE expires at 16:00 ET (20:00 UTC).
-        # Calculate hours remaining.
-        # Assuming 20:00 is close.
-        market_close_hour = 20 
-        market_close_minute = 0
-        
+        # Calculate minutes remaining.
         current_minutes = timestamp.hour * 60 + timestamp.minute
-        close_minutes = market_close_hour * 60 + market_close_minute
-        
-        minutes_remaining = close_minutes - current_minutes
-        if minutes_remaining <= 15: return # Too close to expiry
+        minutes_remaining = MARKET_CLOSE_MINUTES - current_minutes
+        if minutes_remaining <= EOD_MINUTES: return # Too close to expiry
         if minutes_remaining > 400: return # Too far from expiry (> 6.5 hours)
         
         T_years = minutes_remaining / (252 * 6.5 * 60) # Annualized
@@ -138,41 +314,19 @@ class Backtester:
         if premium > max_reasonable_premium:
             return  # Reject outlier
         
-        # 7. Position Sizing
-        # 5% to 20% of balance
-        size_pct = 0.20 # Increased to 20% to allow entry on small account
-        capital_alloc = self.balance * size_pct
-        
-        # Number of contracts (x100 multiplier)
-        # contracts = capital / (premium * 100)
-        num_contracts = int(capital_alloc / (premium * 100))
-        
-        # Cap maximum contracts to prevent extreme leverage
-        max_contracts = 100
-        num_contracts = min(num_contracts, max_contracts)
-        
-        # If allocation is too small for 1 contract, try to use more capital (up to 50%)
+        # 7. Position Sizing (20% of balance, see position_size)
+        num_contracts = int(position_size(self.balance, premium))
         if num_contracts < 1:
-            if self.balance * 0.50 >= (premium * 100):
-                num_contracts = 1
-            else:
-                return # Cannot afford even 1 contract safely
+            return # Cannot afford even 1 contract safely
         
         cost_basis = num_contracts * premium * 100
         
-        # Final sanity check: Don't risk more than 50% of account on one trade
-        if cost_basis > self.balance * 0.50:
-            return
-        
         # 8. Greeks
         greeks = self.op.calculate_greeks(spot_price, strike, T_years, sigma, option_type)
         
         # 9. TP/SL (Aggressive Growth Strategy)
         # TP: 500% (Moonshot), SL: 40% (Risk Tolerance)
         # Trailing Stop will secure profits between 50% and 500%
-        tp_pct = 5.0 # 500% 
-        sl_pct = 0.40 # 40% Hard Stop
-        
         self.position = {
             'type': option_type,
             'strike': strike,
@@ -181,8 +335,8 @@ class Backtester:
             'cost_basis': cost_basis,
             'entry_time': timestamp,
             'sigma': sigma, 
-            'sl_price': premium * (1 - sl_pct),
-            'tp_price': premium * (1 + tp_pct),
+            'sl_price': premium * (1 - SL_PCT),
+            'tp_price': premium * (1 + TP_PCT),
             'greeks': greeks,
             'max_premium': premium # Track max price for trailing stop
         }
@@ -197,14 +351,19 @@ class Backtester:
             self.close_position(p['entry_premium'], 0, 'Error_InvalidPrice', timestamp, p['entry_premium'])
             return
         
+        if self.minutes is not None:
+            times, closes = self.minutes.bar(timestamp)
+            if len(times):
+                self.check_exit_intrabar(timestamp, times, closes)
+                return
+            # No 1m bars for this bar: exit on its close as usual
+            
         # Update Time
-        market_close_hour = 20
         current_minutes = timestamp.hour * 60 + timestamp.minute
-        close_minutes = market_close_hour * 60
-        minutes_remaining = close_minutes - current_minutes
+        minutes_remaining = MARKET_CLOSE_MINUTES - current_minutes
         
         # Force Close at End of Day
-        if minutes_remaining <= 15:
+        if minutes_remaining <= EOD_MINUTES:
             self.close_position(spot_price, minutes_remaining, 'EOD_Expire', timestamp)
             return
 
@@ -227,9 +386,7 @@ class Backtester:
             p['max_premium'] = current_premium
             
         # Trailing Stop Logic
-        # Trail by 20% from Peak
-        trail_pct = 0.20
-        trailing_stop_price = p['max_premium'] * (1 - trail_pct)
+        trailing_stop_price = p['max_premium'] * (1 - TRAIL_PCT)
         
         # Check Exits
         status = None
@@ -249,6 +406,48 @@ class Backtester:
         if status:
             self.close_position(spot_price, minutes_remaining, status, timestamp, current_premium)
             
+    def check_exit_intrabar(self, timestamp, times, closes):
+        """
+        check_exit on every 1m close inside the bar, all minutes priced in one
+        batch: the first minute that trips a rule (same rules, same order)
+        closes the position, otherwise the peak premium carries over.
+        Minutes keep the backtest's clock, where a 15m bar is stamped with its
+        start but priced at its close: the minute closing with the bar gets
+        the bar's timestamp, the ones before it 1, 2, ... minutes less.
+        """
+        p = self.position
+        clock_ns = times - (BAR_MINUTES - 1) * 60 * 10**9
+        clock = pd.DatetimeIndex(clock_ns.view('datetime64[ns]'))
+        if timestamp.tzinfo is not None:
+            clock = clock.tz_localize('UTC').tz_convert(timestamp.tzinfo)
+        minutes_remaining = MARKET_CLOSE_MINUTES - (clock.hour * 60 + clock.minute).to_numpy()
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            premium = self.op.black_scholes_batch(closes, p['strike'], minutes_remaining / (252 * 6.5 * 60), p['sigma'], p['type'])
+        premium = np.minimum(premium, p['entry_premium'] * 10)
+        premium = np.where(premium < 0, 0.01, premium)
+        max_premium = np.maximum(p['max_premium'], np.maximum.accumulate(premium))
+        trailed = premium <= max_premium * (1 - TRAIL_PCT)
+        
+        statuses = ['Error_InvalidPrice', 'EOD_Expire', 'Loss_SL', 'Win_Trail', 'Loss_Trail', 'Win_TP_Moon']
+        status = np.select([(closes <= 0) | (closes > 10000), minutes_remaining <= EOD_MINUTES, premium <= p['sl_price'],
+                            trailed & (premium > p['entry_premium']), trailed, premium >= p['tp_price']],
+                           np.arange(len(statuses)), -1)
+        hit = np.flatnonzero(status >= 0)
+        if not len(hit):
+            p['max_premium'] = max_premium[-1]
+            return
+            
+        k = hit[0]
+        reason = statuses[status[k]]
+        if reason == 'Error_InvalidPrice':
+            self.close_position(p['entry_premium'], 0, reason, clock[k], p['entry_premium'])
+        elif reason == 'EOD_Expire':
+            self.close_position(closes[k], minutes_remaining[k], reason, clock[k])
+        else:
+            p['max_premium'] = max_premium[k]
+            self.close_position(closes[k], minutes_remaining[k], reason, clock[k], premium[k])
+            
     def close_position(self, spot_price, minutes_remaining, reason, timestamp, final_premium=None):
         p = self.position
         
@@ -285,6 +484,7 @@ class Backtester:
         
         self.position = None
 
+    @profiled('Backtester.generate_report')
     def generate_report(self):
         df_journal = pd.DataFrame(self.journal)
         if df_journal.empty:
@@ -299,7 +499,7 @@ class Backtester:
         # New structure: SYMBOL/HHMM_MM_DD/
         symbol_folder = self.symbol
         session_folder = f"{now.strftime('%H%M')}_{now.strftime('%m_%d')}"
-        folder_name = os.path.join(symbol_folder, session_folder)
+        folder_name = self.output_folder or os.path.join(symbol_folder, session_folder)
         os.makedirs(folder_name, exist_ok=True)
         
         filename = os.path.join(folder_name, 'trade_journal.csv')
@@ -328,3 +528,7 @@ class Backtester:
         print(f"Net PnL: ${net_pnl:,.2f} ({return_pct:,.0f}% return!)")
         print(f"Final Balance: ${self.balance:,.2f}")
         print("="*30)
+
+        # The same trades in other orders: how much of the result is sequencing luck
+        from utility.resample import resample_journal, print_summary
+        print_summary(resample_journal(df_journal, paths=REPORT_PATHS), label='(block bootstrap)')
@@ -0,0 +1,117 @@
+import asyncio
+from abc import ABC, abstractmethod
+import pandas as pd
+from datetime import datetime, timezone
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def _flatten(df):
+    """
+    Single-level OHLCV columns (yfinance may return a (Price, Ticker) MultiIndex).
+    """
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    return df[OHLCV]
+
+class BarFeed(ABC):
+    """
+    Pluggable source of closed bars for the live signal daemon.
+    history() returns {symbol: DataFrame} used to warm up rolling state;
+    bars() is an async iterator of (timestamp, {symbol: bar_dict}) emitted
+    once every subscribed symbol has closed that bar.
+    """
+    def __init__(self, symbols):
+        self.symbols = list(dict.fromkeys(symbols))
+        
+    def history(self):
+        return {s: pd.DataFrame(columns=OHLCV) for s in self.symbols}
+        
+    @abstractmethod
+    def bars(self):
+        """
+        Async generator of (timestamp, {symbol: bar_dict}), one per closed bar.
+        """
+
+class ReplayFeed(BarFeed):
+    """
+    Replays stored bars (offline stand-in for a live feed).
+    The first `warmup` aligned bars are served as history, the rest are
+    streamed as fast as possible (speed=None) or at `speed` x real time.
+    Overnight/weekend gaps are collapsed to one bar interval.
+    """
+    def __init__(self, frames, warmup=1560, speed=None):
+        super().__init__(frames.keys())
+        frames = {s: _flatten(df) for s, df in frames.items()}
+        index = frames[self.symbols[0]].index
+        for df in frames.values():
+            index = index.intersection(df.index)
+        self.frames = {s: df.loc[index] for s, df in frames.items()}
+        self.index = index
+        self.warmup = min(warmup, len(index))
+        self.speed = speed
+        
+    @classmethod
+    def from_csv(cls, symbols, interval='15m', **kwargs):
+        """
+        Loads SYMBOL_{interval}.csv files (same convention as data_loader.load_data).
+        """
+        frames = {s: pd.read_csv(f"{s}_{interval}.csv", parse_dates=['Datetime'], index_col='Datetime') for s in symbols}
+        return cls(frames, **kwargs)
+        
+    def history(self):
+        return {s: df.iloc[:self.warmup] for s, df in self.frames.items()}
+        
+    async def bars(self):
+        values = {s: df.to_numpy() for s, df in self.frames.items()}
+        step = pd.Series(self.index).diff().median() if len(self.index) > 1 else pd.Timedelta(0)
+        for i in range(self.warmup, len(self.index)):
+            if self.speed and i > self.warmup:
+                gap = min(self.index[i] - self.index[i - 1], step)
+                await asyncio.sleep(gap.total_seconds() / self.speed)
+            else:
+                await asyncio.sleep(0) # Let sinks and socket clients run
+            yield self.index[i], {s: dict(zip(OHLCV, v[i])) for s, v in values.items()}
+
+class YFinancePollFeed(BarFeed):
+    """
+    Live feed that polls yfinance and emits each bar once it has closed.
+    """
+    def __init__(self, symbols, interval='15m', period='60d', poll_seconds=30):
+        super().__init__(symbols)
+        self.interval = interval
+        self.period = period
+        self.poll_seconds = poll_seconds
+        self.bar_length = pd.Timedelta(interval.replace('m', 'min'))
+        self.last_emitted = None
+        
+    def _download(self, period):
+        import yfinance as yf
+        frames = {}
+        for s in self.symbols:
+            df = yf.download(s, period=period, interval=self.interval, progress=False, auto_adjust=True)
+            frames[s] = _flatten(df) if not df.empty else pd.DataFrame(columns=OHLCV)
+        return frames
+        
+    def _closed(self, frames):
+        now = pd.Timestamp(datetime.now(timezone.utc))
+        index = None
+        for df in frames.values():
+            index = df.index if index is None else index.intersection(df.index)
+        return index[index + self.bar_length <= now]
+        
+    def history(self):
+        frames = self._download(self.period)
+        closed = self._closed(frames)
+        if len(closed):
+            self.last_emitted = closed[-1]
+        return {s: df.loc[closed] for s, df in frames.items()}
+        
+    async def bars(self):
+        while True:
+            frames = await asyncio.get_running_loop().run_in_executor(None, self._download, '1d')
+            for ts in self._closed(frames):
+                if self.last_emitted is None or ts > self.last_emitted:
+                    self.last_emitted = ts
+                    yield ts, {s: df.loc[ts].to_dict() for s, df in frames.items()}
+            await asyncio.sleep(self.poll_seconds)
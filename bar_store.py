@@ -0,0 +1,356 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from profiling import peak_rss_mb
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+BAR_STORE_DIR = 'bar_store'
+
+# Regular US equity session; aggregated bars are anchored to the open and never span sessions
+SESSION_TZ = 'America/New_York'
+SESSION_OPEN = '09:30'
+SESSION_CLOSE = '16:00'
+CHUNK_ROWS = 250_000
+DAY_NS = 86_400 * 10**9
+
+class BarStore:
+    """
+    Append-only columnar bar storage. Each symbol/interval is a folder with one
+    raw binary file per column (int64 ns timestamps, float64 OHLCV) plus a
+    small meta.json. Reads go through np.memmap, so a time range costs two
+    searchsorted calls and a slice, however much history is stored.
+    """
+    def __init__(self, root=BAR_STORE_DIR):
+        self.root = root
+        
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+        
+    def has(self, symbol, interval='15m'):
+        return os.path.exists(os.path.join(self._dir(symbol, interval), 'index.i8'))
+        
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+        
+    def intervals(self, symbol):
+        folder = os.path.join(self.root, symbol.upper())
+        return sorted(os.listdir(folder)) if os.path.isdir(folder) else []
+        
+    def _meta(self, symbol, interval):
+        with open(os.path.join(self._dir(symbol, interval), 'meta.json')) as f:
+            return json.load(f)
+            
+    def _column(self, symbol, interval, name, dtype):
+        path = os.path.join(self._dir(symbol, interval), f"{name}.{'i8' if dtype == np.int64 else 'f8'}")
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+        
+    def _index(self, symbol, interval):
+        return self._column(symbol, interval, 'index', np.int64)
+        
+    def rows(self, symbol, interval='15m'):
+        return len(self._index(symbol, interval)) if self.has(symbol, interval) else 0
+        
+    def _to_ns(self, ts, tz):
+        # Stored timestamps are UTC ns for tz-aware data, wall-clock ns for naive data
+        ts = pd.Timestamp(ts)
+        if tz is None:
+            ts = ts.tz_convert('UTC').tz_localize(None) if ts.tzinfo else ts
+        elif ts.tzinfo is None:
+            ts = ts.tz_localize(tz)
+        return ts.as_unit('ns').value
+        
+    def last_timestamp(self, symbol, interval='15m'):
+        if not self.rows(symbol, interval):
+            return None
+        tz = self._meta(symbol, interval)['tz']
+        ts = pd.Timestamp(int(self._index(symbol, interval)[-1]))
+        return ts.tz_localize('UTC').tz_convert(tz) if tz else ts
+        
+    def append(self, symbol, interval, df):
+        """
+        Appends bars newer than the last stored one. Columns are written before
+        the index, so an interrupted append never exposes partial rows.
+        Returns the number of rows appended.
+        """
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.copy()
+            df.columns = df.columns.get_level_values(0)
+        if df.empty:
+            return 0
+        df = df[OHLCV].sort_index()
+        df = df[~df.index.duplicated(keep='last')]
+        folder = self._dir(symbol, interval)
+        tz = str(df.index.tz) if df.index.tz is not None else None
+        
+        if self.has(symbol, interval):
+            stored_tz = self._meta(symbol, interval)['tz']
+            if (stored_tz is None) != (tz is None):
+                raise ValueError(f"Bar store {symbol} {interval} is {'tz-aware' if stored_tz else 'naive'}; got {'tz-aware' if tz else 'naive'} bars")
+            last = self._index(symbol, interval)
+            if len(last):
+                df = df[df.index.as_unit('ns').asi8 > last[-1]]
+        else:
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, 'meta.json'), 'w') as f:
+                json.dump({'symbol': symbol.upper(), 'interval': interval, 'tz': tz, 'columns': OHLCV}, f)
+                
+        n_rows = self.rows(symbol, interval)
+        for c in OHLCV:
+            # Drop any tail left by an interrupted append before writing
+            with open(os.path.join(folder, f"{c}.f8"), 'ab') as f:
+                f.truncate(n_rows * 8)
+                f.write(df[c].to_numpy(dtype=np.float64).tobytes())
+        with open(os.path.join(folder, 'index.i8'), 'ab') as f:
+            f.write(df.index.as_unit('ns').asi8.astype(np.int64).tobytes())
+        return len(df)
+        
+    def read(self, symbol, interval='15m', start=None, end=None, columns=OHLCV):
+        """
+        Bars with start <= time <= end (either bound optional) as a DataFrame
+        indexed by 'Datetime' in the stored timezone.
+        """
+        meta = self._meta(symbol, interval)
+        index = self._index(symbol, interval)
+        lo = np.searchsorted(index, self._to_ns(start, meta['tz']), side='left') if start is not None else 0
+        hi = np.searchsorted(index, self._to_ns(end, meta['tz']), side='right') if end is not None else len(index)
+        
+        times = pd.DatetimeIndex(np.array(index[lo:hi]).view('datetime64[ns]'), name='Datetime')
+        if meta['tz']:
+            times = times.tz_localize('UTC').tz_convert(meta['tz'])
+        data = {c: np.array(self._column(symbol, interval, c, np.float64)[lo:hi]) for c in columns}
+        return pd.DataFrame(data, index=times)
+
+def _ns(hhmm):
+    return pd.Timedelta(f"{hhmm}:00").value
+
+def _empty_bars():
+    return pd.DataFrame({c: np.empty(0) for c in OHLCV}, index=pd.DatetimeIndex([], tz='UTC', name='Datetime'))
+
+class BarAggregator:
+    """
+    Streaming resampler for one target interval. feed() takes chronological
+    bars (UTC ns timestamps + OHLCV arrays) and returns only completed
+    buckets; the rows of the still-open last bucket are carried into the
+    next call, so chunk edges never split a bucket. Buckets start at the
+    session open in SESSION_TZ (DST aware, e.g. 1h bars are 9:30-10:30 ET)
+    and are cut at the close and at midnight. extended=True keeps bars
+    outside the regular session (buckets still anchored to the open).
+    """
+    def __init__(self, interval, tz=SESSION_TZ, session_open=SESSION_OPEN, session_close=SESSION_CLOSE, extended=False):
+        self.interval = interval
+        self.step = pd.Timedelta(interval).value
+        self.tz = tz
+        self.open = _ns(session_open)
+        self.close = _ns(session_close)
+        self.extended = extended
+        self.carry = None
+        
+    def _buckets(self, times):
+        utc = pd.DatetimeIndex(times.view('datetime64[ns]'), tz='UTC')
+        local = utc.tz_convert(self.tz).tz_localize(None).asi8
+        day = local - local % DAY_NS
+        minute = local - day
+        keep = None if self.extended else (minute >= self.open) & (minute < self.close)
+        # Starts at open + k * interval; pre-market buckets are cut at midnight.
+        # Bars at/after the close are dropped, so the last bucket ends there (e.g. a 15:30-16:00 1h bar)
+        bucket = np.maximum(day + self.open + np.floor_divide(minute - self.open, self.step) * self.step, day)
+        # Label = bucket start in UTC (the row's own UTC offset, so no DST lookups)
+        return bucket, times - (local - bucket), keep
+        
+    def feed(self, times, bars, final=False):
+        """
+        times: int64 UTC ns; bars: (n, 5) float64 OHLCV. Returns a DataFrame of
+        completed buckets (UTC index); final=True also closes the last one.
+        """
+        if self.carry is not None:
+            times = np.concatenate([self.carry[0], times])
+            bars = np.concatenate([self.carry[1], bars])
+            self.carry = None
+        if not len(times):
+            return _empty_bars()
+            
+        key, label, keep = self._buckets(times)
+        if keep is not None:
+            times, bars, key, label = times[keep], bars[keep], key[keep], label[keep]
+        if len(key) and not final:
+            # Hold back the open bucket (constant size: at most one interval of rows)
+            tail = np.searchsorted(key, key[-1], side='left')
+            self.carry = (times[tail:], bars[tail:])
+            key, label, bars = key[:tail], label[:tail], bars[:tail]
+        if not len(key):
+            return _empty_bars()
+            
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        ends = np.r_[starts[1:], len(key)] - 1
+        index = pd.DatetimeIndex(label[starts].view('datetime64[ns]'), tz='UTC', name='Datetime')
+        return pd.DataFrame({
+            'Open': bars[starts, 0],
+            'High': np.maximum.reduceat(bars[:, 1], starts),
+            'Low': np.minimum.reduceat(bars[:, 2], starts),
+            'Close': bars[ends, 3],
+            'Volume': np.add.reduceat(bars[:, 4], starts)
+        }, index=index)
+
+TIME_COLUMNS = ['datetime', 'timestamp', 'date', 'time']
+
+def _digits(codes, start, width):
+    value = np.zeros(len(codes), dtype=np.int64)
+    for i in range(start, start + width):
+        digit = codes[:, i].astype(np.int64) - ord('0')
+        if ((digit < 0) | (digit > 9)).any():
+            raise ValueError("not a digit")
+        value = value * 10 + digit
+    return value
+
+def parse_iso_timestamps(values):
+    """
+    int64 UTC ns for 'YYYY-MM-DD HH:MM:SS' strings with an optional
+    '+HH:MM' offset (same layout on every row), read straight from the
+    string buffer. Returns None for any other layout (use pd.to_datetime).
+    Naive timestamps come back as wall-clock ns.
+    """
+    values = np.asarray(values)
+    if not len(values) or values.dtype.kind not in 'OU':
+        return None
+    width = len(str(values[0]))
+    if width not in (19, 25):
+        return None
+    try:
+        codes = values.astype(f'U{width + 1}').view(np.uint32).reshape(len(values), width + 1)
+    except (ValueError, TypeError):
+        return None
+    separators = {4: '-', 7: '-', 13: ':', 16: ':', 22: ':'}
+    if (codes[:, width] != 0).any() or not np.isin(codes[:, 10], [ord(' '), ord('T')]).all():
+        return None
+    if any((codes[:, i] != ord(c)).any() for i, c in separators.items() if i < width):
+        return None
+    if width == 25 and not np.isin(codes[:, 19], [ord('+'), ord('-')]).all():
+        return None
+    try:
+        months = (_digits(codes, 0, 4) - 1970) * 12 + _digits(codes, 5, 2) - 1
+        days = months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) + _digits(codes, 8, 2) - 1
+        seconds = days * 86_400 + _digits(codes, 11, 2) * 3600 + _digits(codes, 14, 2) * 60 + _digits(codes, 17, 2)
+        if width == 25:
+            offset = _digits(codes, 20, 2) * 3600 + _digits(codes, 23, 2) * 60
+            seconds -= np.where(codes[:, 19] == ord('-'), -offset, offset)
+    except ValueError:
+        return None
+    return seconds * 10**9
+
+def _csv_columns(path, time_col=None):
+    # Vendor headers vary ('open', 'Open', 'OPEN'; 'timestamp' or 'Datetime'); map them onto Datetime + OHLCV
+    header = pd.read_csv(path, nrows=0).columns
+    lookup = {c.lower(): c for c in header}
+    time_name = (time_col or next((t for t in TIME_COLUMNS if t in lookup), 'datetime')).lower()
+    missing = [n for n in [time_name] + OHLCV if n.lower() not in lookup]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing} (found {list(header)})")
+    return {lookup[time_name]: 'Datetime', **{lookup[n.lower()]: n for n in OHLCV}}
+
+def ingest_csv(store, symbol, path, intervals=('15m',), chunk_rows=CHUNK_ROWS, time_col=None,
+               naive_tz='UTC', keep_source=None, extended=False, progress=True):
+    """
+    Streams a (multi-GB) 1-minute CSV into the bar store: reads chunk_rows
+    rows at a time, aggregates each chunk to every target interval and
+    appends the completed buckets. Memory is bounded by the chunk size,
+    whatever the file size. Rows must be chronological; bars already in the
+    store are skipped, so re-running after an interruption resumes.
+    keep_source: also store the raw bars under this interval (e.g. '1m').
+    time_col: timestamp column (default: Datetime/timestamp/date/time, any case);
+    naive_tz: timezone of timestamps without an offset.
+    Returns a stats dict (rows, bars written per interval, seconds, rows/s).
+    """
+    columns = _csv_columns(path, time_col)
+    aggregators = [BarAggregator(interval, extended=extended) for interval in intervals]
+    written = {interval: 0 for interval in intervals}
+    if keep_source:
+        written[keep_source] = 0
+    rows = 0
+    last = None
+    has_offset = None
+    start = time.perf_counter()
+    
+    reader = pd.read_csv(path, usecols=list(columns), chunksize=chunk_rows,
+                         dtype={c: np.float64 for c, n in columns.items() if n != 'Datetime'})
+    for chunk in reader:
+        chunk = chunk.rename(columns=columns)
+        if has_offset is None and len(chunk):
+            has_offset = pd.Timestamp(chunk['Datetime'].iloc[0]).tzinfo is not None
+        times = parse_iso_timestamps(chunk['Datetime'].to_numpy())
+        if times is None:
+            # Offsets may change within a file (DST), so aware timestamps are parsed straight to UTC
+            times = pd.DatetimeIndex(pd.to_datetime(chunk['Datetime'], utc=bool(has_offset))).as_unit('ns').asi8
+        if not has_offset and naive_tz != 'UTC':
+            times = pd.DatetimeIndex(times.view('datetime64[ns]')).tz_localize(naive_tz).tz_convert('UTC').asi8
+        if (np.diff(times) < 0).any() or (last is not None and len(times) and times[0] < last):
+            raise ValueError(f"{path}: rows are not in chronological order (near row {rows})")
+        bars = chunk[OHLCV].to_numpy(dtype=np.float64)
+        rows += len(chunk)
+        if len(times):
+            last = times[-1]
+            
+        if keep_source:
+            index = pd.DatetimeIndex(times.view('datetime64[ns]'), tz='UTC', name='Datetime')
+            written[keep_source] += store.append(symbol, keep_source, pd.DataFrame(bars, index=index, columns=OHLCV))
+        for aggregator in aggregators:
+            written[aggregator.interval] += store.append(symbol, aggregator.interval, aggregator.feed(times, bars))
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"\r  {rows:,} rows | {rows / max(elapsed, 1e-9):,.0f} rows/s", end='', file=sys.stderr)
+            
+    for aggregator in aggregators:
+        written[aggregator.interval] += store.append(symbol, aggregator.interval,
+                                                     aggregator.feed(np.empty(0, np.int64), np.empty((0, 5)), final=True))
+    if progress:
+        print(file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    return {'rows': rows, 'written': written, 'seconds': elapsed, 'rows_per_s': rows / max(elapsed, 1e-9)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Import bars into the local bar store / show its contents")
+    parser.add_argument('symbols', nargs='*', help="Import SYMBOL_<interval>.csv for these symbols")
+    parser.add_argument('--interval', default='15m')
+    parser.add_argument('--root', default=BAR_STORE_DIR)
+    parser.add_argument('--from-1m', nargs='?', const='', default=None, metavar='CSV',
+                        help="Stream a 1-minute CSV (default SYMBOL_1m.csv) and aggregate it to --to intervals")
+    parser.add_argument('--to', default=None, help="Target intervals for --from-1m, comma-separated (default: --interval)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--keep-1m', action='store_true', help="Also store the raw 1m bars")
+    parser.add_argument('--extended', action='store_true', help="Keep pre/post-market bars")
+    parser.add_argument('--naive-tz', default='UTC', help="Timezone of timestamps without an offset")
+    parser.add_argument('--time-col', default=None, help="Timestamp column of the 1m CSV (default: auto-detect)")
+    args = parser.parse_args()
+    
+    store = BarStore(args.root)
+    for symbol in args.symbols:
+        if args.from_1m is not None:
+            file_path = args.from_1m or f"{symbol.upper()}_1m.csv"
+            intervals = (args.to or args.interval).split(',')
+            print(f"🚚 {symbol.upper()}: streaming {file_path} -> {', '.join(intervals)} ({args.chunk_rows:,}-row chunks)")
+            stats = ingest_csv(store, symbol, file_path, intervals, chunk_rows=args.chunk_rows, time_col=args.time_col,
+                               naive_tz=args.naive_tz,
+                               keep_source='1m' if args.keep_1m else None, extended=args.extended)
+            bars = ", ".join(f"{n:,} {i}" for i, n in stats['written'].items())
+            rss = peak_rss_mb()
+            rss = f", peak RSS {rss:.0f} MB" if rss is not None else ''
+            print(f"📥 {symbol.upper()}: {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+                  f"({stats['rows_per_s']:,.0f} rows/s{rss}) -> {bars} new bars")
+            continue
+        file_path = f"{symbol.upper()}_{args.interval}.csv"
+        df = pd.read_csv(file_path, parse_dates=['Datetime'], index_col='Datetime')
+        print(f"📥 {symbol.upper()}: {store.append(symbol, args.interval, df)} new bars from {file_path}")
+        
+    for symbol in store.symbols():
+        for interval in store.intervals(symbol):
+            print(f"{symbol:<6} {interval:<5} {store.rows(symbol, interval):>10,} bars | last {store.last_timestamp(symbol, interval)}")
+
+if __name__ == "__main__":
+    main()
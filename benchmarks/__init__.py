@@ -0,0 +1 @@
+# Benchmarks for the training, feature and signal hot paths
@@ -0,0 +1,67 @@
+"""
+Compares model engines (RandomForest vs pre-binned HistGradientBoosting):
+training time, peak traced memory and out-of-sample accuracy.
+
+Usage: python -m benchmarks.engines [n_days ...]
+Uses local SYMBOL_15m.csv files when present, synthetic bars otherwise.
+"""
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+import data_loader
+import features
+import model
+
+def load_pair(n_days):
+    """
+    Returns a processed SPY/IWM feature frame covering roughly n_days sessions.
+    """
+    frames = []
+    for symbol, seed, price in [('SPY', 1, 500.0), ('IWM', 2, 200.0)]:
+        try:
+            df = pd.read_csv(f"{symbol}_15m.csv", parse_dates=['Datetime'], index_col='Datetime').iloc[-n_days * 26:]
+        except FileNotFoundError:
+            df = data_loader.generate_synthetic_data(n_days, start_price=price, seed=seed)
+        frames.append(df)
+    df_main, df_ref = data_loader.align_data(*frames)
+    return features.prepare_pair_features(df_main, df_ref, main_ticker='SPY', ref_ticker='IWM')
+
+def bench_engine(model_type, df_train, df_test):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        trained, feature_cols = model.train_model(df_train, model_type=model_type)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    acc = accuracy_score(df_test['Target'], trained.predict(df_test[feature_cols]))
+    return {'engine': model_type, 'train_s': elapsed, 'peak_mb': peak / 1e6, 'oos_acc': acc}
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [60, 250]
+    rows = []
+    for n_days in sizes:
+        df = load_pair(n_days)
+        split = int(len(df) * 0.8)
+        df_train, df_test = df.iloc[:split], df.iloc[split:]
+        print(f"{n_days}d: {len(df)} rows x {df.shape[1]} cols (train {len(df_train)}, test {len(df_test)})")
+        for model_type in model.MODEL_TYPES:
+            result = bench_engine(model_type, df_train, df_test)
+            result['days'] = n_days
+            rows.append(result)
+            
+    report = pd.DataFrame(rows)[['days', 'engine', 'train_s', 'peak_mb', 'oos_acc']]
+    print("\n" + "=" * 50)
+    print("MODEL ENGINE BENCHMARK (5-fold CV + final fit)")
+    print("=" * 50)
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Model loading: joblib pickle vs the memory-mapped model store.
+Cold = a fresh interpreter (imports included) loading the model and scoring
+one row; warm = repeated loads in an already warmed-up process.
+
+Usage: python -m benchmarks.model_load [SESSION_FOLDER ...]
+Without folders, trains a forest and an HGB model on synthetic bars.
+"""
+import contextlib
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import model
+from benchmarks.engines import load_pair
+from model_store import ModelStore
+
+REPEATS = 20
+
+COLD_PICKLE = """
+import time, warnings; warnings.simplefilter('ignore')
+start = time.perf_counter()
+import joblib, numpy as np, pandas as pd
+m = joblib.load({path!r})
+m.predict_proba(pd.DataFrame(np.zeros((1, len(m.feature_names_in_))), columns=m.feature_names_in_))
+print(time.perf_counter() - start)
+"""
+
+COLD_STORE = """
+import sys, time; sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import numpy as np, pandas as pd
+from model_store import ModelStore
+m = ModelStore({store!r}).open({digest!r})
+m.predict_proba(pd.DataFrame(np.zeros((1, len(m.feature_names_in_))), columns=m.feature_names_in_))
+print(time.perf_counter() - start)
+"""
+
+def cold(code):
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+def sample(columns, n_rows, seed=0):
+    values = np.random.default_rng(seed).normal(size=(n_rows, len(columns)))
+    return pd.DataFrame(values, columns=columns)
+
+def warm(load, columns):
+    row = sample(columns, 1)
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        load().predict_proba(row)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def bench(name, trained, workdir):
+    pickle_file = os.path.join(workdir, f"{name}.pkl")
+    joblib.dump(trained, pickle_file)
+    store = ModelStore(os.path.join(workdir, 'model_store'))
+    digest, _ = store.put(trained)
+    folder = store._dir(digest)
+    store_bytes = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+    
+    columns = list(trained.feature_names_in_)
+    check = sample(columns, 256)
+    max_diff = np.abs(trained.predict_proba(check) - store.open(digest).predict_proba(check)).max()
+    
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    row = {
+        'model': name,
+        'pickle_kb': os.path.getsize(pickle_file) / 1e3,
+        'store_kb': store_bytes / 1e3,
+        'cold_pickle_ms': cold(COLD_PICKLE.format(path=pickle_file)) * 1e3,
+        'cold_store_ms': cold(COLD_STORE.format(root=root, store=store.root, digest=digest)) * 1e3,
+        'warm_pickle_ms': warm(lambda: joblib.load(pickle_file), columns) * 1e3,
+        'warm_store_ms': warm(lambda: store.open(digest), columns) * 1e3,
+        'max_proba_diff': max_diff
+    }
+    store.archive(digest)
+    row['archive_kb'] = os.path.getsize(store._archive_file(digest)) / 1e3
+    return row
+
+def main():
+    warnings.simplefilter('ignore') # sklearn version mismatch on old pickles
+    models = []
+    for folder in sys.argv[1:]:
+        models.append((folder, joblib.load(os.path.join(folder, 'trained_model.pkl'))))
+    if not models:
+        df = load_pair(60)
+        for model_type in model.MODEL_TYPES:
+            with contextlib.redirect_stdout(io.StringIO()):
+                trained, _ = model.train_model(df, model_type=model_type)
+            models.append((model_type, trained))
+            
+    with tempfile.TemporaryDirectory() as workdir:
+        rows = [bench(name.replace(os.sep, '_'), trained, workdir) for name, trained in models]
+        
+    report = pd.DataFrame(rows)
+    pd.set_option('display.width', 200)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3g}"))
+    print(f"\nWarm = median of {REPEATS} loads + one prediction; cold = fresh interpreter, imports included.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Rolling statistics: pandas .rolling() per column/window/pair vs one
+rolling_stats.RollingStats pass. Reports wall time as the number of windows
+grows and the largest difference from pandas.
+
+Usage: python -m benchmarks.rolling_stats [n_days] [n_windows ...]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+from rolling_stats import RollingStats
+
+def load_columns(n_days):
+    spy = data_loader.generate_synthetic_data(n_days, start_price=500.0, seed=1)['Close']
+    iwm = data_loader.generate_synthetic_data(n_days, start_price=200.0, seed=2)['Close']
+    df = pd.DataFrame({'SPY': spy, 'IWM': iwm}).dropna()
+    df['Spread'] = np.log(df['SPY']) - np.log(df['IWM'])
+    df['SPY_Ret'] = np.log(df['SPY']).diff()
+    df['IWM_Ret'] = np.log(df['IWM']).diff()
+    return df
+
+def with_pandas(df, windows, pairs):
+    out = {}
+    for w in windows:
+        rolling = df.rolling(w)
+        mean, std = rolling.mean(), rolling.std()
+        out[('z', w)] = (df - mean) / std
+        for i, j in pairs:
+            out[('corr', w, i, j)] = df.iloc[:, i].rolling(w).corr(df.iloc[:, j])
+    return out
+
+def with_engine(df, windows, pairs):
+    stats = RollingStats(df, windows, pairs=pairs)
+    out = {}
+    for w in windows:
+        out[('z', w)] = stats.zscore(w)
+        corr = stats.corr(w)
+        for k, (i, j) in enumerate(pairs):
+            out[('corr', w, i, j)] = corr.iloc[:, k]
+    return out
+
+def max_diff(a, b):
+    worst = 0.0
+    for key in a:
+        x, y = np.asarray(a[key], dtype=float), np.asarray(b[key], dtype=float)
+        both = np.isfinite(x) & np.isfinite(y)
+        if both.any():
+            worst = max(worst, np.abs(x[both] - y[both]).max())
+    return worst
+
+def main():
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    window_counts = [int(a) for a in sys.argv[2:]] or [2, 8, 32]
+    df = load_columns(n_days)
+    pairs = [(0, 1), (3, 4), (0, 2)]
+    print(f"{n_days}d: {len(df)} rows x {df.shape[1]} columns, {len(pairs)} pairs")
+    
+    rows = []
+    for count in window_counts:
+        windows = np.unique(np.geomspace(5, 390, count).astype(int)).tolist()
+        start = time.perf_counter()
+        ref = with_pandas(df, windows, pairs)
+        pandas_s = time.perf_counter() - start
+        start = time.perf_counter()
+        ours = with_engine(df, windows, pairs)
+        engine_s = time.perf_counter() - start
+        rows.append({'windows': len(windows), 'pandas_s': pandas_s, 'engine_s': engine_s,
+                     'speedup': pandas_s / engine_s, 'max_abs_diff': max_diff(ref, ours)})
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f"{v:.3g}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Per-worker memory of CV fold training: pickled feature frames vs the
+shared-memory dataset (shared_data.publish / worker_dataset).
+Memory is the sum of the workers' PSS (shared pages are split between the
+processes that map them), sampled after each worker's last fold; data_mb
+subtracts the same pool running empty tasks (interpreter + imports).
+
+Usage: python -m benchmarks.shared_data [n_days] [workers ...]
+Linux only (reads /proc/self/smaps_rollup).
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import TimeSeriesSplit
+
+import model
+from benchmarks.engines import load_pair
+from pipeline import init_worker
+from shared_data import publish, dataset_pool, worker_dataset
+
+N_SPLITS = 8
+
+def memory_mb():
+    """
+    (pss, private) MB of this process.
+    """
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Pss:', 'Private_Clean:', 'Private_Dirty:'):
+                values[parts[0]] = int(parts[1]) / 1024
+    return values['Pss:'], values['Private_Clean:'] + values['Private_Dirty:']
+
+def fit_fold(X, y, train_end, test_end):
+    clf = RandomForestClassifier(n_estimators=20, max_depth=5, n_jobs=1, random_state=42)
+    clf.fit(X[:train_end], y[:train_end])
+    return (clf.predict(X[train_end:test_end]) == y[train_end:test_end]).mean()
+
+def pickled_task(frame, feature_cols, train_end, test_end):
+    X = frame[feature_cols].to_numpy(dtype=np.float32)
+    acc = fit_fold(X, frame['Target'].to_numpy(), train_end, test_end)
+    return acc, os.getpid(), memory_mb()
+
+def shared_task(train_end, test_end):
+    ds = worker_dataset()
+    # All published columns are features: one float32 block, a zero-copy view
+    acc = fit_fold(ds.matrix(), ds.y, train_end, test_end)
+    return acc, os.getpid(), memory_mb()
+
+def idle_task(train_end, test_end):
+    return np.nan, os.getpid(), memory_mb()
+
+def folds(n_rows):
+    return [(train[-1] + 1, test[-1] + 1) for train, test in TimeSeriesSplit(n_splits=N_SPLITS).split(np.arange(n_rows))]
+
+def run(mode, df, feature_cols, workers):
+    start = time.perf_counter()
+    dataset = None
+    if mode == 'shared':
+        dataset = publish(df[feature_cols + ['Target']], compact=True)
+        pool = dataset_pool(dataset, workers)
+        submit = lambda a, b: pool.submit(shared_task, a, b)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=init_worker)
+        if mode == 'pickled':
+            submit = lambda a, b: pool.submit(pickled_task, df, feature_cols, a, b)
+        else:
+            submit = lambda a, b: pool.submit(idle_task, a, b)
+    with pool:
+        results = [f.result() for f in [submit(a, b) for a, b in folds(len(df))]]
+    if dataset is not None:
+        dataset.unlink()
+    # Each worker's memory after its last task (the largest fold it saw)
+    by_worker = {pid: mem for _, pid, mem in results}
+    pss = sum(v[0] for v in by_worker.values())
+    private = sum(v[1] for v in by_worker.values())
+    return {'mode': mode, 'workers': workers, 'total_pss_mb': pss, 'total_private_mb': private,
+            'mean_acc': np.mean([r[0] for r in results]), 'wall_s': time.perf_counter() - start}
+
+def main():
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    worker_counts = [int(a) for a in sys.argv[2:]] or [1, 2, 4]
+    df = load_pair(n_days)
+    feature_cols = model.get_feature_cols(df)
+    print(f"{n_days}d: {len(df)} rows x {df.shape[1]} cols ({df.memory_usage(deep=True).sum() / 1e6:.1f} MB float64 frame)")
+    
+    rows = [run(mode, df, feature_cols, w) for w in worker_counts for mode in ('idle', 'pickled', 'shared')]
+    report = pd.DataFrame(rows)
+    idle = report[report['mode'] == 'idle'].set_index('workers')['total_pss_mb']
+    report['data_mb'] = report['total_pss_mb'] - report['workers'].map(idle)
+    report = report[report['mode'] != 'idle']
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cold-start cost of each cli.py command: a fresh interpreter runs the
+command with --imports-only (its imports, no work), timed from outside.
+Also reports the modules loaded and the cumulative import time of the heavy
+packages (python -X importtime). `eager` is what every entry point used to
+import up front (main + the signal and chart modules), for comparison.
+
+Usage: python -m benchmarks.startup [repeats]
+"""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ['pandas', 'scipy', 'sklearn', 'matplotlib', 'yfinance', 'ta', 'joblib']
+COMMANDS = {
+    'eager': ['-c', 'import main, utility.predict_signal, utility.pnl_chart, utility.detail_trades'],
+    'train': ['cli.py', 'train', '--imports-only'],
+    'train --no-chart': ['cli.py', 'train', '--no-chart', '--imports-only'],
+    'signal': ['cli.py', 'signal', '--imports-only'],
+    'signal --no-chart': ['cli.py', 'signal', '--no-chart', '--imports-only'],
+    'chart': ['cli.py', 'chart', 'SPY', '--imports-only'],
+    'backtest': ['cli.py', 'backtest', '--imports-only'],
+    'backtest --no-chart': ['cli.py', 'backtest', '--no-chart', '--imports-only']
+}
+
+def import_times(stderr):
+    """
+    {top-level package: cumulative import ms} and the module count from
+    -X importtime output (a package's first, outermost import holds its total).
+    """
+    totals, modules = {}, 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        modules += 1
+        name = name.strip()
+        if name.split('.')[0] in HEAVY:
+            top = name.split('.')[0]
+            totals[top] = max(totals.get(top, 0.0), int(cumulative) / 1000)
+    return totals, modules
+
+def measure(args, repeats):
+    walls = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        done = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT, capture_output=True, text=True)
+        walls.append(time.perf_counter() - start)
+        if done.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{done.stderr[-2000:]}")
+    totals, modules = import_times(done.stderr)
+    return {'wall_ms': np.median(walls) * 1000, 'modules': modules, **{f"{k}_ms": totals.get(k, 0.0) for k in HEAVY}}
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    rows = [{'command': name, **measure(args, repeats)} for name, args in COMMANDS.items()]
+    report = pd.DataFrame(rows)
+    report['vs_eager'] = report['wall_ms'] / report.loc[report['command'] == 'eager', 'wall_ms'].iloc[0]
+    print(f"Median of {repeats} cold starts (import times are cumulative, from -X importtime)")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.0f}" if abs(v) >= 10 else f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
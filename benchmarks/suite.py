@@ -0,0 +1,308 @@
+"""
+Benchmark suite over the hot paths, on offline synthetic bars at several
+history sizes: loading (bar store), features, multi-timeframe resampling,
+pair features, training, option pricing, the backtest, the chart renderers
+and the single-bar live signal.
+Each case reports wall time, throughput (bars/s, options/s, trades/s) and
+peak traced memory (a second, tracemalloc run). Results are compared with
+this machine's baseline (benchmarks/baselines/<machine>.json); a throughput
+drop or memory growth beyond --threshold is flagged and makes the exit
+status 1. --save records the run as the new baseline.
+
+Usage: python -m benchmarks.suite [--sizes 60d 1y 5y] [--only NAME ...] [--save] [--threshold 0.15]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import data_loader
+import features
+import model
+from bar_store import BarStore
+from options_pricing import OptionsPricing
+from utility import pnl_chart, detail_trades
+from utility.signal_daemon import SignalEngine
+
+SIZES = {'60d': 60, '1y': 252, '5y': 1260}
+THRESHOLD = 0.15 # Relative slowdown / memory growth flagged as a regression
+MIN_MEMORY_MB = 1.0 # Memory changes below this are noise whatever their ratio
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+SIGNAL_BARS = 20 # Live bars fed to the signal engine
+BATCH_OPTIONS = 100 # Options priced per bar by the batch pricer (a strike ladder)
+
+def machine_id():
+    """
+    Baseline file name for this machine: host, architecture and Python version.
+    """
+    name = f"{platform.node()}-{platform.machine()}-py{platform.python_version()}"
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+
+class Context:
+    """
+    Inputs of one history size, each built on first use and shared by the
+    cases that need it (the trained model feeds the backtest and the signal).
+    """
+    def __init__(self, n_days, workdir):
+        self.n_days = n_days
+        self.workdir = workdir
+        self.main = data_loader.generate_synthetic_data(n_days, start_price=500.0, seed=1)
+        self.ref = data_loader.generate_synthetic_data(n_days, start_price=200.0, seed=2)
+        self.bars = len(self.main)
+        self._cache = {}
+        
+    def get(self, name, build):
+        if name not in self._cache:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self._cache[name] = build()
+        return self._cache[name]
+        
+    @property
+    def df(self):
+        return self.get('df', lambda: features.prepare_pair_features(self.main, self.ref, 'SPY', 'IWM'))
+        
+    @property
+    def trained(self):
+        return self.get('trained', lambda: model.train_model(self.df))
+        
+    @property
+    def journal_csv(self):
+        def build():
+            trained_model, feature_cols = self.trained
+            bt = backtest.Backtester(self.df, trained_model, feature_cols, symbol='SPY', output_folder=self.workdir)
+            bt.run(report=False)
+            path = os.path.join(self.workdir, 'trade_journal.csv')
+            pd.DataFrame(bt.journal).to_csv(path, index=False)
+            return path
+        return self.get('journal', build)
+
+# Cases: (name, unit, function of the context returning the number of units processed)
+
+def bench_load_data(ctx):
+    store = BarStore(os.path.join(ctx.workdir, 'bar_store'))
+    for symbol, df in (('SPY', ctx.main), ('IWM', ctx.ref)):
+        if not store.has(symbol):
+            store.append(symbol, '15m', df)
+    cwd = os.getcwd()
+    os.chdir(ctx.workdir) # load_data reads ./bar_store (and no SYMBOL_15m.csv here)
+    try:
+        rows = sum(len(data_loader.load_data(symbol)) for symbol in ('SPY', 'IWM'))
+    finally:
+        os.chdir(cwd)
+    return rows
+
+def bench_add_features(ctx):
+    return len(features.add_features(ctx.main, prefix='SPY_'))
+
+def bench_resample_and_merge(ctx):
+    base = ctx.get('base', lambda: features.add_features(ctx.main, prefix='SPY_'))
+    features.resample_and_merge(base, '1h', 'SPY_1H_')
+    features.resample_and_merge(base, '4h', 'SPY_4H_')
+    return len(base)
+
+def bench_prepare_pair_features(ctx):
+    return len(features.prepare_pair_features(ctx.main, ctx.ref, 'SPY', 'IWM'))
+
+def bench_train_model(ctx):
+    model.train_model(ctx.df)
+    return len(ctx.df)
+
+def _option_inputs(ctx):
+    closes = ctx.main['Close'].to_numpy()
+    return closes, np.round(closes * 1.003), (np.arange(len(closes)) % 26 + 1) * 15 / (252 * 6.5 * 60)
+
+def bench_black_scholes(ctx):
+    op = OptionsPricing()
+    S, K, T = _option_inputs(ctx)
+    for s, k, t in zip(S, K, T):
+        op.black_scholes(s, k, t, 0.2, 'call')
+    return len(S)
+
+def bench_calculate_greeks(ctx):
+    op = OptionsPricing()
+    S, K, T = _option_inputs(ctx)
+    for s, k, t in zip(S, K, T):
+        op.calculate_greeks(s, k, t, 0.2, 'call')
+    return len(S)
+
+def bench_black_scholes_batch(ctx):
+    S, _, T = _option_inputs(ctx)
+    K = S[:, None] * (1 + np.linspace(-0.02, 0.02, BATCH_OPTIONS))[None, :]
+    OptionsPricing().black_scholes_batch(S[:, None], K, T[:, None], 0.2, 'call')
+    return K.size
+
+def bench_backtest(ctx):
+    trained_model, feature_cols = ctx.trained
+    backtest.Backtester(ctx.df, trained_model, feature_cols, symbol='SPY', output_folder=ctx.workdir).run(report=False)
+    return len(ctx.df)
+
+def bench_pnl_chart(ctx):
+    pnl_chart.create_pnl_chart(ctx.journal_csv)
+    return len(pd.read_csv(ctx.journal_csv))
+
+def bench_detail_chart(ctx):
+    detail_trades.create_detailed_chart(ctx.journal_csv, 'SPY', bars=ctx.main)
+    return len(pd.read_csv(ctx.journal_csv))
+
+def bench_live_signal(ctx):
+    trained_model, _ = ctx.trained
+    history = {'SPY': ctx.main.iloc[:-SIGNAL_BARS], 'IWM': ctx.ref.iloc[:-SIGNAL_BARS]}
+    engine = SignalEngine('SPY', trained_model, history, ref_symbol='IWM')
+    for timestamp in ctx.main.index[-SIGNAL_BARS:]:
+        engine.on_bar(timestamp, {'SPY': ctx.main.loc[timestamp], 'IWM': ctx.ref.loc[timestamp]})
+    return SIGNAL_BARS
+
+CASES = [
+    ('load_data', 'bars', bench_load_data),
+    ('add_features', 'bars', bench_add_features),
+    ('resample_and_merge', 'bars', bench_resample_and_merge),
+    ('prepare_pair_features', 'bars', bench_prepare_pair_features),
+    ('train_model', 'bars', bench_train_model),
+    ('black_scholes', 'options', bench_black_scholes),
+    ('calculate_greeks', 'options', bench_calculate_greeks),
+    ('black_scholes_batch', 'options', bench_black_scholes_batch),
+    ('backtest', 'bars', bench_backtest),
+    ('pnl_chart', 'trades', bench_pnl_chart),
+    ('detail_chart', 'trades', bench_detail_chart),
+    ('live_signal', 'bars', bench_live_signal)
+]
+
+def run_case(fn, ctx, repeats=1, memory=True):
+    """
+    Best wall time of `repeats` runs, then one traced run for peak memory.
+    Shared inputs are built before the clock starts.
+    """
+    best, units = np.inf, 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            start = time.perf_counter()
+            units = fn(ctx)
+            best = min(best, time.perf_counter() - start)
+        peak = np.nan
+        if memory:
+            tracemalloc.start()
+            fn(ctx)
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+    return {'seconds': best, 'units': units, 'throughput': units / best, 'peak_mb': peak}
+
+def prepare(ctx, name):
+    """
+    Builds the shared inputs a case reuses, outside its timing.
+    """
+    if name in ('train_model', 'backtest', 'live_signal'):
+        ctx.df
+    if name in ('backtest', 'live_signal'):
+        ctx.trained
+    if name in ('pnl_chart', 'detail_chart'):
+        ctx.journal_csv
+    if name == 'resample_and_merge':
+        ctx.get('base', lambda: features.add_features(ctx.main, prefix='SPY_'))
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Adds the baseline throughput/memory and flags regressions to every row.
+    """
+    for key, row in results.items():
+        base = baseline.get(key)
+        row['base_throughput'] = base['throughput'] if base else np.nan
+        row['change_pct'] = (row['throughput'] / base['throughput'] - 1) * 100 if base else np.nan
+        flags = []
+        if base and row['throughput'] < base['throughput'] * (1 - threshold):
+            flags.append('SLOWER')
+        if (base and np.isfinite(row['peak_mb']) and np.isfinite(base.get('peak_mb', np.nan))
+                and row['peak_mb'] > base['peak_mb'] * (1 + threshold) and row['peak_mb'] - base['peak_mb'] > MIN_MEMORY_MB):
+            flags.append('MORE MEMORY')
+        row['flag'] = ' '.join(flags) or ('new' if not base else '')
+    return results
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)['results']
+
+def save_baseline(path, results):
+    """
+    Writes (or updates: cases not run keep their previous numbers) this machine's baseline.
+    """
+    merged = load_baseline(path)
+    merged.update({key: {k: row[k] for k in ('seconds', 'units', 'throughput', 'peak_mb')} for key, row in results.items()})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        'machine': machine_id(),
+        'saved': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'cpus': os.cpu_count(),
+        'results': merged
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2, default=float)
+    os.replace(tmp, path)
+    print(f"💾 Baseline saved to '{path}'")
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path benchmark suite with per-machine baselines")
+    parser.add_argument('--sizes', nargs='*', default=list(SIZES), choices=list(SIZES))
+    parser.add_argument('--only', nargs='*', default=None, choices=[name for name, _, _ in CASES])
+    parser.add_argument('--repeats', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run (peak memory)")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--baseline', default=None, help="Baseline JSON (default: baselines/<machine>.json)")
+    parser.add_argument('--save', action='store_true', help="Record this run as the baseline")
+    args = parser.parse_args()
+    
+    path = args.baseline or os.path.join(BASELINE_DIR, f"{machine_id()}.json")
+    baseline = load_baseline(path)
+    print(f"Machine: {machine_id()} ({'baseline ' + path if baseline else 'no baseline yet'})")
+    
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='bench_')
+    try:
+        for size in args.sizes:
+            ctx = Context(SIZES[size], os.path.join(workdir, size))
+            os.makedirs(ctx.workdir)
+            print(f"\n{size}: {ctx.bars:,} bars")
+            for name, unit, fn in CASES:
+                if args.only and name not in args.only:
+                    continue
+                prepare(ctx, name)
+                row = run_case(fn, ctx, args.repeats, memory=not args.no_memory)
+                row.update({'case': name, 'size': size, 'unit': unit})
+                results[f"{name}@{size}"] = row
+                print(f"  {name:<22} {row['seconds']:>8.3f} s {row['throughput']:>14,.0f} {unit}/s "
+                      f"{row['peak_mb']:>9.1f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        
+    compare(results, baseline, args.threshold)
+    report = pd.DataFrame(results.values())[['case', 'size', 'unit', 'seconds', 'throughput', 'peak_mb',
+                                              'base_throughput', 'change_pct', 'flag']]
+    pd.set_option('display.width', 200)
+    print("\n" + report.to_string(index=False, float_format=lambda v: f"{v:,.3g}" if abs(v) < 100 else f"{v:,.0f}"))
+    
+    regressions = report[report['flag'].str.contains('SLOWER|MORE')]
+    if args.save:
+        save_baseline(path, results)
+    if len(regressions):
+        print(f"\n⚠️ {len(regressions)} regression(s) beyond {args.threshold:.0%}: "
+              + ", ".join(f"{r.case}@{r.size} ({r.flag})" for r in regressions.itertuples()))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.base import BaseEstimator, ClassifierMixin
+import numpy as np
+
+class BinnedHistGradientBoosting(ClassifierMixin, BaseEstimator):
+    """
+    Histogram gradient boosting on uint8 quantile codes of the features.
+    Each fit() learns the bin edges from its own training rows only (so CV
+    test folds never shape them) and fits on the codes; predict() bins any
+    input with the same edges, so callers can treat it like any sklearn
+    classifier.
+    Owning the edges is what the pre-binning is for: the trees split on
+    codes, so model_store keeps the edges next to the node arrays and
+    ArrayModel predicts from them without sklearn. It saves no training
+    time: HistGradientBoostingClassifier still runs its own binner, which
+    maps the (at most max_bins) distinct codes one to one onto its bins,
+    so the codes are not quantized a second time.
+    """
+    def __init__(self, max_bins=255, max_iter=100, learning_rate=0.1, max_depth=5,
+                 min_samples_leaf=20, random_state=42):
+        self.max_bins = max_bins
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.random_state = random_state
+        
+    def bin(self, X):
+        """
+        Learns quantile bin edges from X (DataFrame) and returns uint8 codes.
+        max_bins - 1 interior quantiles give at most max_bins codes.
+        """
+        values = X.to_numpy(dtype=np.float32)
+        quantiles = np.linspace(0, 1, self.max_bins + 1)[1:-1]
+        self.bin_edges_ = [np.unique(np.quantile(values[:, j], quantiles)) for j in range(values.shape[1])]
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        return self._codes(values)
+        
+    def transform(self, X):
+        """
+        Maps raw features to uint8 codes with the learned edges.
+        """
+        return self._codes(X[list(self.feature_names_in_)].to_numpy(dtype=np.float32))
+        
+    def _codes(self, values):
+        codes = np.empty(values.shape, dtype=np.uint8)
+        for j, edges in enumerate(self.bin_edges_):
+            codes[:, j] = np.searchsorted(edges, values[:, j], side='left')
+        return codes
+        
+    def fit(self, X, y):
+        X = self.bin(X)
+        self.estimator_ = HistGradientBoostingClassifier(
+            max_iter=self.max_iter,
+            learning_rate=self.learning_rate,
+            max_depth=self.max_depth,
+            min_samples_leaf=self.min_samples_leaf,
+            max_bins=self.max_bins, # >= the number of codes: one bin per code
+            categorical_features=None, # Codes are ordered, split them as numbers
+            early_stopping=False,
+            class_weight='balanced',
+            random_state=self.random_state
+        )
+        self.estimator_.fit(X, np.asarray(y))
+        self.classes_ = self.estimator_.classes_
+        return self
+        
+    def predict(self, X):
+        return self.estimator_.predict(self.transform(X))
+        
+    def predict_proba(self, X):
+        return self.estimator_.predict_proba(self.transform(X))
@@ -0,0 +1,64 @@
+"""
+Crash-safe progress of long runs (Backtester.run, label sweeps).
+
+A snapshot is one small uncompressed .npz (arrays + a JSON header) written
+to a temporary file and renamed over the previous one, so a crash during a
+write leaves the last complete snapshot. Records that only grow (journal
+rows, finished grid points) go to an append-only side file instead of being
+rewritten each time: the snapshot stores its byte offset, and resuming
+drops whatever was appended after the last snapshot.
+"""
+import json
+import os
+import pickle
+import numpy as np
+
+def write_snapshot(path, meta=None, **arrays):
+    tmp = f"{path}.tmp{os.getpid()}.npz"
+    with open(tmp, 'wb') as f:
+        np.savez(f, __meta__=np.frombuffer(json.dumps(meta or {}).encode(), dtype=np.uint8), **arrays)
+        # On disk before the rename, or a crash could leave the new name on an empty file
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def read_snapshot(path):
+    """
+    (meta, {name: array}) of a snapshot, or None when there is none.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as snapshot:
+        arrays = {name: snapshot[name] for name in snapshot.files if name != '__meta__'}
+        return json.loads(snapshot['__meta__'].tobytes()), arrays
+
+def append_records(path, records, offset):
+    """
+    Appends a batch of picklable records at byte `offset` (anything after it
+    is from an interrupted run) and returns the new end offset.
+    """
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+        f.seek(offset)
+        f.truncate()
+        if records:
+            pickle.dump(records, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+def read_records(path, offset):
+    """
+    Every record appended up to byte `offset`, in order.
+    """
+    records = []
+    if not offset:
+        return records
+    with open(path, 'rb') as f:
+        while f.tell() < offset:
+            records.extend(pickle.load(f))
+    return records
+
+def remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,217 @@
+"""
+One entry point for the bot's commands:
+
+    python cli.py train SPY [IWM ...] [--model hgb] [--prune] [--no-chart] ...
+    python cli.py signal SPY [--no-chart]
+    python cli.py chart SPY/1230_11_25 [--pnl | --detail]
+    python cli.py backtest SPY [--session SPY/1230_11_25] [--intrabar] [--resume SPY/1415_11_26] [--no-chart]
+    python cli.py labels SPY [--session SPY/1230_11_25] [--model hgb] [--names vol_h4_k1 ...]
+
+Only argparse is imported up front: each command imports the subsystems
+its own code path uses, so `signal --no-chart` (cron refreshes) never loads
+sklearn, matplotlib or the training pipeline. --imports-only stops a command
+once its imports are done (benchmarks/startup.py times that).
+"""
+import argparse
+import os
+import time
+
+CHECKPOINT_FILE = 'backtest_checkpoint.npz'
+SWEEP_CHECKPOINT_FILE = 'label_sweep_checkpoint.npz'
+
+MODEL_FILES = ('model.json', 'trained_model.pkl')
+
+def _latest_session(symbol, files=()):
+    """
+    Newest SYMBOL/HHMM_MM_DD folder (holding one of `files` when given, e.g.
+    a model rather than just a backtest journal), or None.
+    """
+    if not os.path.isdir(symbol):
+        return None
+    sessions = sorted((os.path.join(symbol, d) for d in os.listdir(symbol) if os.path.isdir(os.path.join(symbol, d))),
+                      reverse=True)
+    if files:
+        sessions = [s for s in sessions if any(os.path.exists(os.path.join(s, f)) for f in files)]
+    return sessions[0] if sessions else None
+
+def cmd_train(args):
+    import main
+    if args.imports_only:
+        if args.chart:
+            from utility import pnl_chart, detail_trades
+        return
+    main.train(list(dict.fromkeys(s.upper() for s in args.symbols)), model_type=args.model, prune=args.prune,
+               use_cache=not args.no_cache, jobs=args.jobs, profile_mode=args.profile, compact=args.compact,
+               ladder=args.ladder, chart=args.chart, intrabar=args.intrabar)
+
+def cmd_signal(args):
+    from utility import predict_signal
+    if args.imports_only:
+        # What the signal imports on first use (download, chart)
+        import yfinance
+        if args.chart:
+            import matplotlib.pyplot
+        return
+    predict_signal.get_latest_signal(args.symbol.upper(), show=args.show, chart=args.chart)
+
+def cmd_chart(args):
+    from utility import pnl_chart, detail_trades
+    if args.imports_only:
+        return
+    folder = args.session
+    if not os.path.isdir(folder):
+        folder = _latest_session(args.session.upper())
+    if folder is None:
+        print(f"Error: No session found for '{args.session}'")
+        return
+    journal = os.path.join(folder, 'trade_journal.csv')
+    # Sessions live in SYMBOL/HHMM_MM_DD/
+    symbol = os.path.basename(os.path.dirname(os.path.abspath(folder)))
+    if not args.detail_only:
+        pnl_chart.create_pnl_chart(journal, show=args.show)
+    if not args.pnl_only:
+        detail_trades.create_detailed_chart(journal, symbol, show=args.show)
+
+def cmd_backtest(args):
+    """
+    Re-runs the backtest of a stored model (latest session by default) on
+    the current data, into a new session folder. No training.
+    The run is checkpointed in its folder; --resume FOLDER continues an
+    interrupted one from its last checkpoint, with the model session it
+    was started with (same data required).
+    """
+    import data_loader
+    import features
+    from backtest import Backtester, checkpoint_model_session
+    from model import get_model_features
+    from model_store import load_session_model
+    if args.chart:
+        from utility import pnl_chart
+    if args.imports_only:
+        return
+    symbol = args.symbol.upper()
+    session = args.session
+    if args.resume and session is None:
+        # The interrupted run's own model, not whatever session is newest now
+        session = checkpoint_model_session(os.path.join(args.resume, CHECKPOINT_FILE))
+        if session is not None and not os.path.isdir(session):
+            print(f"Error: Model session '{session}' of the checkpoint in '{args.resume}' no longer exists")
+            return
+    session = session or _latest_session(symbol, files=MODEL_FILES)
+    model = load_session_model(session) if session else None
+    if model is None and session and os.path.exists(os.path.join(session, 'trained_model.pkl')):
+        import joblib
+        model = joblib.load(os.path.join(session, 'trained_model.pkl'))
+    if model is None:
+        print(f"Error: No model found. Please train first with: python cli.py train {symbol}")
+        return
+    print(f"Model: {session}")
+    
+    ref_symbol = data_loader.get_reference_symbol(symbol)
+    df_main, df_ref = data_loader.align_data(data_loader.load_data(symbol, period=args.period, interval="15m"),
+                                             data_loader.load_data(ref_symbol, period=args.period, interval="15m"))
+    if df_main.empty or df_ref.empty:
+        print("Error: No data loaded.")
+        return
+    feature_cols = get_model_features(model)
+    df_processed = features.prepare_pair_features(df_main, df_ref, main_ticker=symbol, ref_ticker=ref_symbol,
+                                                  feature_cols=feature_cols)
+                                                  
+    folder = args.resume or os.path.join(symbol, time.strftime('%H%M_%m_%d'))
+    os.makedirs(folder, exist_ok=True)
+    Backtester(df_processed, model, feature_cols, initial_balance=1000, symbol=symbol, output_folder=folder,
+               intrabar=args.intrabar, checkpoint=os.path.join(folder, CHECKPOINT_FILE), resume=bool(args.resume),
+               model_session=session).run()
+    if args.chart and os.path.exists(os.path.join(folder, 'trade_journal.csv')):
+        pnl_chart.create_pnl_chart(os.path.join(folder, 'trade_journal.csv'))
+
+def cmd_labels(args):
+    """
+    Ranks the target definitions of a session's label grid (saved by the
+    training run) with model.compare_label_definitions on the session's
+    bars. The sweep is checkpointed in the session folder, so an
+    interrupted one skips the definitions it already finished.
+    """
+    import data_loader
+    import features
+    import labels
+    import model
+    if args.imports_only:
+        return
+    symbol = args.symbol.upper()
+    session = args.session or _latest_session(symbol, files=[labels.LABEL_GRID_FILE])
+    grid_file = os.path.join(session, labels.LABEL_GRID_FILE) if session else None
+    if grid_file is None or not os.path.exists(grid_file):
+        print(f"Error: No label grid found. Please train first with: python cli.py train {symbol}")
+        return
+    print(f"Label grid: {grid_file}")
+    
+    ref_symbol = data_loader.get_reference_symbol(symbol)
+    df_main, df_ref = data_loader.align_data(data_loader.load_data(symbol, period=args.period, interval="15m"),
+                                             data_loader.load_data(ref_symbol, period=args.period, interval="15m"))
+    if df_main.empty or df_ref.empty:
+        print("Error: No data loaded.")
+        return
+    df_processed = features.prepare_pair_features(df_main, df_ref, main_ticker=symbol, ref_ticker=ref_symbol)
+    ranking = model.compare_label_definitions(df_processed, grid_file, model_type=args.model, names=args.names,
+                                              checkpoint=os.path.join(session, SWEEP_CHECKPOINT_FILE))
+    print("\n" + ranking.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="0DTE options ML trading bot")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    def add(name, fn, help):
+        sub = commands.add_parser(name, help=help)
+        sub.set_defaults(fn=fn)
+        sub.add_argument('--imports-only', action='store_true', help=argparse.SUPPRESS)
+        return sub
+        
+    train = add('train', cmd_train, "Load, engineer features, train, backtest, chart and signal (main.py)")
+    train.add_argument('symbols', nargs='*', default=['SPY'])
+    train.add_argument('--model', default='forest', choices=['forest', 'hgb'])
+    train.add_argument('--prune', action='store_true')
+    train.add_argument('--no-cache', action='store_true')
+    train.add_argument('--jobs', type=int, default=None)
+    train.add_argument('--profile', nargs='?', const='basic', default=None, choices=['basic', 'cprofile'])
+    train.add_argument('--compact', action='store_true')
+    train.add_argument('--ladder', action='store_true')
+    
+    signal = add('signal', cmd_signal, "Live signal for the latest bar")
+    signal.add_argument('symbol', nargs='?', default='SPY')
+    signal.add_argument('--show', action='store_true', help="Open the chart window")
+    
+    chart = add('chart', cmd_chart, "P&L and detail charts of a session")
+    chart.add_argument('session', help="Session folder (SYMBOL/HHMM_MM_DD) or a symbol for its latest session")
+    chart.add_argument('--pnl', dest='pnl_only', action='store_true', help="P&L chart only")
+    chart.add_argument('--detail', dest='detail_only', action='store_true', help="Detail chart only")
+    chart.add_argument('--show', action='store_true')
+    
+    backtest = add('backtest', cmd_backtest, "Backtest a stored model on current data (no training)")
+    backtest.add_argument('symbol', nargs='?', default='SPY')
+    backtest.add_argument('--session', default=None, help="Session folder of the model (default: latest)")
+    backtest.add_argument('--period', default='60d')
+    backtest.add_argument('--resume', default=None, metavar='FOLDER',
+                          help="Continue the interrupted backtest in this session folder from its last checkpoint (with its model)")
+    
+    label_sweep = add('labels', cmd_labels, "Rank the alternative target definitions of a session's label grid")
+    label_sweep.add_argument('symbol', nargs='?', default='SPY')
+    label_sweep.add_argument('--session', default=None, help="Session folder of the grid (default: latest)")
+    label_sweep.add_argument('--model', default='forest', choices=['forest', 'hgb'])
+    label_sweep.add_argument('--names', nargs='*', default=None, help="Only these definitions")
+    label_sweep.add_argument('--period', default='60d')
+    
+    for sub in (train, backtest):
+        sub.add_argument('--intrabar', action='store_true',
+                         help="Check exits on the stored 1m bars while a position is open (bar_store.py --keep-1m)")
+    for sub in (train, signal, backtest):
+        sub.add_argument('--no-chart', dest='chart', action='store_false',
+                         help="Headless: skip charts (matplotlib is never imported)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.fn(args)
+
+if __name__ == "__main__":
+    main()
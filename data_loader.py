@@ -1,15 +1,19 @@
-import yfinance as yf
 import pandas as pd
+import numpy as np
 import os
+from bar_store import BarStore
+from profiling import profiled
 
+@profiled()
 def load_data(symbol, period="60d", interval="15m", start_date=None, end_date=None):
     """
     Loads data for a given symbol.
-    Tries to load from local CSV first (e.g., 'SPY_15m.csv'),
-    otherwise downloads from yfinance.
+    Tries to load from local CSV first (e.g., 'SPY_15m.csv'), then the
+    local bar store, otherwise downloads from yfinance.
     
     Note: yfinance 15m data is limited to the last 60 days.
-    For 5 years of 15m data, you must provide a CSV file.
+    For 5 years of 15m data, provide a CSV file or stream the vendor's
+    1-minute files into the bar store (python bar_store.py SPY --from-1m).
     """
     file_path = f"{symbol}_{interval}.csv"
     
@@ -23,11 +27,18 @@ def load_data(symbol, period="60d", interval="15m", start_date=None, end_date=No
             df = df[df.index <= end_date]
         return df
     
+    store = BarStore()
+    if store.has(symbol, interval):
+        print(f"Loading {symbol} data from the bar store ({store.rows(symbol, interval):,} {interval} bars)...")
+        return store.read(symbol, interval, start_date, end_date)
+        
     print(f"Downloading {symbol} data from yfinance (Limit: 60d for 15m)...")
    
     # We will fetch the maximum available if period is long.
     
     try:
+        # Only the download path needs yfinance (slow to import)
+        import yfinance as yf
         df = yf.download(symbol, period=period, interval=interval, progress=False, auto_adjust=True)
         if df.empty:
             raise ValueError("No data downloaded.")
@@ -43,9 +54,40 @@ def load_data(symbol, period="60d", interval="15m", start_date=None, end_date=No
         print(f"Error downloading {symbol}: {e}")
         return pd.DataFrame()
 
+def get_reference_symbol(symbol):
+    """
+    Reference asset for pair features: IWM for everything except IWM itself (SPY).
+    """
+    return 'SPY' if symbol == 'IWM' else 'IWM'
+
 def align_data(df1, df2):
     """
     Aligns two dataframes on their index (Datetime).
     """
     common_index = df1.index.intersection(df2.index)
     return df1.loc[common_index], df2.loc[common_index]
+
+def generate_synthetic_data(n_days=60, interval_minutes=15, start_price=100.0, seed=0, start_date='2020-01-02'):
+    """
+    Generates random-walk OHLCV bars for regular sessions (13:30-20:00 UTC, weekdays).
+    Offline stand-in for benchmarks and replays when no CSV or network is available.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start_date, periods=n_days, tz='UTC')
+    bars_per_day = int(390 / interval_minutes)
+    offsets = pd.to_timedelta(13 * 60 + 30 + interval_minutes * np.arange(bars_per_day), unit='min')
+    index = pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel(), tz='UTC', name='Datetime')
+    
+    # ~15% annualized vol scaled to the bar interval
+    bar_vol = 0.15 / np.sqrt(252 * bars_per_day)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, bar_vol, len(index))))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    wick = np.abs(rng.normal(0, bar_vol / 2, (2, len(index))))
+    
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + wick[0]),
+        'Low': np.minimum(open_, close) * (1 - wick[1]),
+        'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, len(index)).astype(float)
+    }, index=index)
@@ -0,0 +1,114 @@
+import numpy as np
+from backtest import OTM_PCT, SL_PCT, TP_PCT, TRAIL_PCT, EOD_MINUTES, MARKET_CLOSE_MINUTES
+from options_pricing import OptionsPricing, MINUTES_PER_YEAR
+
+PATHS = 20_000
+BAR_MINUTES = 15 # Exits are checked on closed 15m bars, as in the backtest
+VOL_WINDOW = 20 # Bars of realized volatility (same window as the backtest)
+SESSION_MINUTES = 390
+# Backtester.check_exit statuses, in the order they are tested
+EXIT_REASONS = ['Loss_SL', 'Win_Trail', 'Loss_Trail', 'Win_TP_Moon', 'EOD_Expire']
+
+def realized_vol(closes, window=VOL_WINDOW):
+    """
+    Annualized std of the last `window` 15m log returns, clipped to the
+    backtest's 10%-100% bounds (20% when there is not enough history).
+    """
+    closes = np.asarray(closes, dtype=np.float64)[-(window + 1):]
+    if len(closes) < 3:
+        return 0.20
+    sigma = np.diff(np.log(closes)).std(ddof=1) * np.sqrt(252 * 26)
+    return float(np.clip(sigma, 0.10, 1.00)) if np.isfinite(sigma) else 0.20
+
+def minutes_to_close(timestamp):
+    """
+    Minutes from a bar to the 0DTE expiry (20:00 UTC), as the backtest counts them.
+    """
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC')
+    return MARKET_CLOSE_MINUTES - (timestamp.hour * 60 + timestamp.minute)
+
+def simulate_exits(spot, option_type, minutes_to_close, sigma, strike=None, paths=PATHS, bar_minutes=BAR_MINUTES,
+                   drift=0.0, seed=None):
+    """
+    Monte Carlo of the backtest's exit rules for a contract bought now.
+    Spot follows a GBM (annualized drift/sigma, same trading-minute clock as
+    the option's T) bar by bar to the close; on every bar the option is
+    repriced with Black-Scholes on all paths at once and Backtester.check_exit
+    is applied: 40% stop, 20% trailing stop from the peak premium, 500% take
+    profit, forced exit EOD_MINUTES before expiry.
+    strike defaults to the backtest's OTM_PCT strike.
+    Returns the exit reason probabilities, expected P&L and hold time.
+    """
+    op = OptionsPricing()
+    rng = np.random.default_rng(seed)
+    if strike is None:
+        strike = round(spot * (1 + OTM_PCT)) if option_type == 'call' else round(spot * (1 - OTM_PCT))
+    entry = float(op.black_scholes(spot, strike, minutes_to_close / MINUTES_PER_YEAR, sigma, option_type))
+    
+    dt = bar_minutes / MINUTES_PER_YEAR
+    step_drift, step_vol = (drift - 0.5 * sigma ** 2) * dt, sigma * np.sqrt(dt)
+    prices = np.full(paths, float(spot))
+    max_premium = np.full(paths, entry)
+    reason = np.full(paths, -1, dtype=np.int8)
+    exit_premium = np.full(paths, entry)
+    exit_minutes = np.zeros(paths)
+    # Open paths only: most close within a few bars, so later bars price fewer
+    alive = np.arange(paths)
+    
+    minutes = minutes_to_close
+    while len(alive):
+        minutes -= bar_minutes
+        prices *= np.exp(step_drift + step_vol * rng.standard_normal(len(alive)))
+        premium = op.black_scholes_batch(prices, strike, max(minutes, 0) / MINUTES_PER_YEAR, sigma, option_type)
+        if minutes <= EOD_MINUTES:
+            status = np.full(len(alive), EXIT_REASONS.index('EOD_Expire'), dtype=np.int8)
+        else:
+            # Same caps as check_exit: at most 10x entry, floored at 1 cent
+            premium = np.minimum(premium, entry * 10)
+            premium = np.where(premium < 0, 0.01, premium)
+            np.maximum(max_premium, premium, out=max_premium)
+            trailed = premium <= max_premium * (1 - TRAIL_PCT)
+            status = np.select([premium <= entry * (1 - SL_PCT), trailed & (premium > entry), trailed,
+                                premium >= entry * (1 + TP_PCT)], [0, 1, 2, 3], -1).astype(np.int8)
+        closed = status >= 0
+        done = alive[closed]
+        reason[done] = status[closed]
+        exit_premium[done] = premium[closed]
+        exit_minutes[done] = minutes_to_close - minutes
+        keep = ~closed
+        alive, prices, max_premium = alive[keep], prices[keep], max_premium[keep]
+        
+    pnl_pct = (exit_premium / entry - 1) * 100
+    counts = np.bincount(reason, minlength=len(EXIT_REASONS))
+    return {
+        'strike': strike,
+        'option_type': option_type,
+        'entry_premium': entry,
+        'sigma': sigma,
+        'minutes_to_close': minutes_to_close,
+        'paths': paths,
+        'probabilities': {name: float(counts[i] / paths) for i, name in enumerate(EXIT_REASONS)},
+        'prob_profit': float((pnl_pct > 0).mean()),
+        'expected_pnl_pct': float(pnl_pct.mean()),
+        'expected_pnl': float((exit_premium - entry).mean() * 100), # Per contract
+        'pnl_pct_p5': float(np.percentile(pnl_pct, 5)),
+        'pnl_pct_p50': float(np.percentile(pnl_pct, 50)),
+        'pnl_pct_p95': float(np.percentile(pnl_pct, 95)),
+        'mean_hold_minutes': float(exit_minutes.mean())
+    }
+
+def live_exit_odds(closes, timestamp, prediction, paths=PATHS, seed=None):
+    """
+    simulate_exits for a live signal on the bar at `timestamp`: realized vol
+    from the recent closes, the backtest's strike and the real time to the
+    close. Outside the backtest's entry window (more than 6.5 hours or less
+    than EOD_MINUTES before the close) it simulates an entry at the next open.
+    """
+    spot = float(np.asarray(closes, dtype=np.float64)[-1])
+    minutes = minutes_to_close(timestamp)
+    next_session = not EOD_MINUTES < minutes <= SESSION_MINUTES
+    result = simulate_exits(spot, 'call' if prediction == 1 else 'put', SESSION_MINUTES if next_session else minutes,
+                            realized_vol(closes), paths=paths, seed=seed)
+    result['next_session'] = next_session
+    return result
@@ -1,101 +1,187 @@
 import pandas as pd
 import numpy as np
 import ta
-from options_pricing import OptionsPricing
-from scipy.stats import norm
+from scipy.special import ndtr
+from options_pricing import OptionsPricing, norm_pdf
+from rolling_stats import RollingStats, rolling_std
+import labels
+from profiling import profiled
 
-def add_synthetic_greeks(df, prefix=''):
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def _wants(columns, prefix, *names):
     """
-    Calculates synthetic Greeks for an ATM option with 1 day to expiry.
-    This helps the model understand the 'Gamma Risk' and 'Theta Decay' environment.
+    True if any of the prefixed feature names is requested (None means all).
     """
-    op = OptionsPricing()
-    
-    # Estimate Rolling Volatility (Annualized)
+    return columns is None or any(f'{prefix}{n}' in columns for n in names)
+
+# Greeks ladder: strikes as fractions of spot x minutes to expiry (0DTE scale)
+LADDER_MONEYNESS = (-0.01, -0.0075, -0.005, -0.003, -0.001, 0.0, 0.001, 0.003, 0.005, 0.0075, 0.01)
+LADDER_MINUTES = (15, 30, 60, 120, 240, 390)
+TRADED_OTM = 0.003 # Strike offset the backtest trades (see Backtester)
+MARKET_CLOSE_MINUTES = 20 * 60 # 16:00 ET as 20:00 UTC, as in the backtest
+LADDER_FEATURES = ['OTM_Call_Delta', 'OTM_Call_Gamma', 'OTM_Call_Theta',
+                   'OTM_Put_Delta', 'OTM_Put_Gamma', 'OTM_Put_Theta', 'Gamma_Ramp']
+
+def _synthetic_vol(close):
     # Log returns
-    log_ret = np.log(df['Close'] / df['Close'].shift(1))
+    log_ret = np.log(close / close.shift(1))
     window = 20
     # 15m bars -> ~26 bars/day (6.5 hours * 4 bars/hour). 20 bars ~ 7.5 hours.
     # Annualize: sqrt(252 * 26) approx sqrt(6552) = 81
-    vol = log_ret.rolling(window=window).std() * np.sqrt(252 * 26)
-    vol = vol.fillna(0.20) # Default to 20%
-    
+    vol = rolling_std(log_ret, window) * np.sqrt(252 * 26)
+    return vol.fillna(0.20) # Default to 20%
+
+def minutes_to_close(index):
+    """
+    Minutes from each bar to the 0DTE expiry, clipped to one session (1-390).
+    """
+    minutes = MARKET_CLOSE_MINUTES - (index.hour * 60 + index.minute)
+    return np.clip(np.asarray(minutes, dtype=np.float64), 1, 390)
+
+def greeks_ladder(df, moneyness=LADDER_MONEYNESS, minutes=LADDER_MINUTES, option_type='call'):
+    """
+    Full Greeks ladder as a float32 tensor (bars, strikes, tenors, 4) with
+    options_pricing.LADDER_GREEKS on the last axis, from one broadcast.
+    minutes=None uses each bar's own minutes to close (a single tenor).
+    """
+    op = OptionsPricing()
+    sigma = np.clip(_synthetic_vol(df['Close']).to_numpy(), 0.10, 1.00)
+    tenors = minutes_to_close(df.index)[:, None] if minutes is None else minutes
+    return op.greeks_ladder(df['Close'].to_numpy(dtype=np.float64), sigma, moneyness, tenors, option_type)
+
+ATM_GREEKS = ['ATM_Delta', 'ATM_Gamma', 'ATM_Theta', 'ATM_Vega', 'ATM_IV']
+
+def synthetic_greeks(S, sigma, index, names):
+    """
+    Values of the named add_synthetic_greeks columns (unprefixed, from
+    ATM_GREEKS and LADDER_FEATURES) for closes S, their synthetic vol sigma
+    and bar times index, as {name: float64 array}.
+    """
     # Constants for Synthetic Option
     T = 1 / 252 # 1 Day to expiry
     r = 0.045 # Risk free rate
     
-    # Vectorized Black-Scholes Greeks (Simplified for ATM)
-    S = df['Close'].values
-    sigma = vol.values
-    
     # d1 calculation
     sqrt_T = np.sqrt(T)
     d1 = (r + 0.5 * sigma**2) * T / (sigma * sqrt_T)
     d2 = d1 - sigma * sqrt_T
     
     # Greeks (Call)
-    delta = norm.cdf(d1)
-    N_prime_d1 = norm.pdf(d1)
+    delta = ndtr(d1)
+    N_prime_d1 = norm_pdf(d1)
     gamma = N_prime_d1 / (S * sigma * sqrt_T)
     theta = -(S * sigma * N_prime_d1) / (2 * sqrt_T) / 365
     vega = S * sqrt_T * N_prime_d1 / 100
+    values = dict(zip(ATM_GREEKS, [delta, gamma, theta, vega, sigma]))
+    
+    if any(name in LADDER_FEATURES for name in names):
+        # Two tenors per bar (its minutes to close, a full session) for the traded
+        # call and put strikes: one broadcast each, no per-row Python
+        tenors = np.column_stack([minutes_to_close(index), np.full(len(index), 390.0)])
+        op = OptionsPricing(risk_free_rate=r)
+        sigma = np.clip(sigma, 0.10, 1.00) # Same bounds as the backtest's pricing
+        call = op.greeks_ladder(S, sigma, [TRADED_OTM], tenors, 'call')[:, 0]
+        put = op.greeks_ladder(S, sigma, [-TRADED_OTM], tenors, 'put')[:, 0]
+        ladder = {
+            'OTM_Call_Delta': call[:, 0, 0], 'OTM_Call_Gamma': call[:, 0, 1], 'OTM_Call_Theta': call[:, 0, 2],
+            'OTM_Put_Delta': put[:, 0, 0], 'OTM_Put_Gamma': put[:, 0, 1], 'OTM_Put_Theta': put[:, 0, 2],
+            # > 1 as expiry nears and the OTM strikes are within reach, -> 0 when they are not
+            'Gamma_Ramp': (call[:, 0, 1] + put[:, 0, 1]) / (call[:, 1, 1] + put[:, 1, 1])
+        }
+        values.update({name: v.astype(np.float64) for name, v in ladder.items()})
+        
+    return {name: values[name] for name in names}
+
+@profiled()
+def add_synthetic_greeks(df, prefix='', columns=None, ladder=False):
+    """
+    Calculates synthetic Greeks for an ATM option with 1 day to expiry.
+    This helps the model understand the 'Gamma Risk' and 'Theta Decay' environment.
+    ladder=True (or columns naming them) adds LADDER_FEATURES: the Greeks of
+    the contracts the backtest trades (TRADED_OTM call/put at the bar's real
+    minutes to close) and Gamma_Ramp, their gamma relative to a full session.
+    """
+    want_ladder = ladder if columns is None else _wants(columns, prefix, *LADDER_FEATURES)
+    names = [n for n in ATM_GREEKS + (LADDER_FEATURES if want_ladder else []) if _wants(columns, prefix, n)]
+    if not names:
+        return df
+    
+    # Estimate Rolling Volatility (Annualized)
+    vol = _synthetic_vol(df['Close'])
     
-    # Assign to DF
-    df[f'{prefix}ATM_Delta'] = delta
-    df[f'{prefix}ATM_Gamma'] = gamma
-    df[f'{prefix}ATM_Theta'] = theta
-    df[f'{prefix}ATM_Vega'] = vega
-    df[f'{prefix}ATM_IV'] = sigma
+    # Vectorized Black-Scholes Greeks (Simplified for ATM), only the requested ones
+    for name, values in synthetic_greeks(df['Close'].values, vol.values, df.index, names).items():
+        df[f'{prefix}{name}'] = values
     
     return df
 
-def add_features(df, prefix=''):
+@profiled()
+def add_features(df, prefix='', columns=None, ladder=False):
     """
     Adds technical indicators and time-based features.
+    If columns is given, only the indicators needed for those columns are computed.
+    ladder=True adds the Greeks ladder features (see add_synthetic_greeks).
     """
-    df = df.copy()
+    # Basic cleanup (returns a new frame, so the caller's frame is never modified)
+    df = df.dropna()
     
     # Ensure we have single-level columns if MultiIndex
     if isinstance(df.columns, pd.MultiIndex):
         df.columns = df.columns.get_level_values(0)
         
-    # Basic cleanup
-    df = df.dropna()
+    def wants(*names):
+        return _wants(columns, prefix, *names)
     
     # 1. Trend Indicators
-    df[f'{prefix}EMA_20'] = ta.trend.ema_indicator(df['Close'], window=20)
-    df[f'{prefix}EMA_50'] = ta.trend.ema_indicator(df['Close'], window=50)
-    df[f'{prefix}EMA_20_Slope'] = df[f'{prefix}EMA_20'].diff()
-    df[f'{prefix}EMA_50_Slope'] = df[f'{prefix}EMA_50'].diff()
-    
-    adx = ta.trend.ADXIndicator(df['High'], df['Low'], df['Close'], window=14)
-    df[f'{prefix}ADX'] = adx.adx()
-    df[f'{prefix}DMP'] = adx.adx_pos()
-    df[f'{prefix}DMN'] = adx.adx_neg()
-    df[f'{prefix}MACD'] = ta.trend.macd_diff(df['Close'])
+    if wants('EMA_20', 'EMA_20_Slope'):
+        ema_20 = ta.trend.ema_indicator(df['Close'], window=20)
+    if wants('EMA_50', 'EMA_50_Slope'):
+        ema_50 = ta.trend.ema_indicator(df['Close'], window=50)
+    if wants('EMA_20'): df[f'{prefix}EMA_20'] = ema_20
+    if wants('EMA_50'): df[f'{prefix}EMA_50'] = ema_50
+    if wants('EMA_20_Slope'): df[f'{prefix}EMA_20_Slope'] = ema_20.diff()
+    if wants('EMA_50_Slope'): df[f'{prefix}EMA_50_Slope'] = ema_50.diff()
+    
+    if wants('ADX', 'DMP', 'DMN'):
+        adx = ta.trend.ADXIndicator(df['High'], df['Low'], df['Close'], window=14)
+        if wants('ADX'): df[f'{prefix}ADX'] = adx.adx()
+        if wants('DMP'): df[f'{prefix}DMP'] = adx.adx_pos()
+        if wants('DMN'): df[f'{prefix}DMN'] = adx.adx_neg()
+    if wants('MACD'):
+        df[f'{prefix}MACD'] = ta.trend.macd_diff(df['Close'])
     
     # 2. Volatility
-    bb = ta.volatility.BollingerBands(df['Close'], window=20, window_dev=2)
-    df[f'{prefix}BB_Width'] = bb.bollinger_wband()
-    df[f'{prefix}BB_Pband'] = bb.bollinger_pband()
-    df[f'{prefix}ATR'] = ta.volatility.average_true_range(df['High'], df['Low'], df['Close'], window=14)
+    if wants('BB_Width', 'BB_Pband'):
+        bb = ta.volatility.BollingerBands(df['Close'], window=20, window_dev=2)
+        if wants('BB_Width'): df[f'{prefix}BB_Width'] = bb.bollinger_wband()
+        if wants('BB_Pband'): df[f'{prefix}BB_Pband'] = bb.bollinger_pband()
+    if wants('ATR'):
+        df[f'{prefix}ATR'] = ta.volatility.average_true_range(df['High'], df['Low'], df['Close'], window=14)
     
     # 3. Momentum
-    df[f'{prefix}RSI'] = ta.momentum.rsi(df['Close'], window=14)
+    if wants('RSI'):
+        df[f'{prefix}RSI'] = ta.momentum.rsi(df['Close'], window=14)
     
     # 4. Returns
-    df[f'{prefix}Log_Ret'] = np.log(df['Close'] / df['Close'].shift(1))
+    if wants('Log_Ret'):
+        df[f'{prefix}Log_Ret'] = np.log(df['Close'] / df['Close'].shift(1))
     
     # 5. Synthetic Greeks
-    df = add_synthetic_greeks(df, prefix=prefix)
+    df = add_synthetic_greeks(df, prefix=prefix, columns=columns, ladder=ladder)
     
     return df
 
-def resample_and_merge(df_15m, timeframe, prefix):
+@profiled()
+def resample_and_merge(df_15m, timeframe, prefix, columns=None):
     """
     Resamples 15m data to a higher timeframe (e.g., '1H', '4H'),
     calculates features, and merges back to 15m via forward fill.
+    Skipped entirely if columns is given and none of them carry the prefix.
     """
+    if columns is not None and not any(c.startswith(prefix) for c in columns):
+        return df_15m
+        
     agg_dict = {
         'Open': 'first',
         'High': 'max',
@@ -105,7 +191,7 @@ def resample_and_merge(df_15m, timeframe, prefix):
     }
     
     df_resampled = df_15m.resample(timeframe).agg(agg_dict).dropna()
-    df_resampled = add_features(df_resampled, prefix=prefix)
+    df_resampled = add_features(df_resampled, prefix=prefix, columns=columns)
     
     # Select only feature columns to merge back
     feature_cols = [c for c in df_resampled.columns if c not in agg_dict.keys()]
@@ -114,24 +200,36 @@ def resample_and_merge(df_15m, timeframe, prefix):
     # Shift so we use CLOSED candle data
     df_resampled_features = df_resampled_features.shift(1)
     
-    # Merge back to 15m
-    df_merged = df_15m.join(df_resampled_features, how='left')
-    df_merged = df_merged.ffill()  # Forward fill missing values
+    # Merge back to 15m: align the new columns onto the 15m bars and forward fill
+    # only them (the 15m columns are not copied and refilled)
+    df_resampled_features = df_resampled_features.reindex(df_15m.index).ffill()
+    df_merged = pd.concat([df_15m, df_resampled_features], axis=1)
     
     return df_merged
 
-def prepare_pair_features(df_main, df_ref, main_ticker='SPY', ref_ticker='IWM'):
+@profiled()
+def prepare_pair_features(df_main, df_ref, main_ticker='SPY', ref_ticker='IWM', feature_cols=None, compact=False,
+                          ladder=False):
     """
     Combines Main and Ref data and creates spread/correlation features.
+    If feature_cols is given (e.g. the columns a trained model needs), only
+    those features are computed; OHLCV and Target are always kept.
+    compact=True returns the layout of compact_frame (float32 features in
+    one block, float64 prices, int8 Target) at roughly half the memory.
+    ladder=True adds the Greeks ladder features of both 15m series (traded-strike
+    Greeks at the real time to expiry); with feature_cols they follow the model.
     """
+    # Compact: indicators are computed in float64 but kept as float32 after each step
+    shrink = _downcast if compact else (lambda df: df)
+    
     # 1. Base Features for each
-    df_main = add_features(df_main, prefix=f'{main_ticker}_')
-    df_ref = add_features(df_ref, prefix=f'{ref_ticker}_')
+    df_main = shrink(add_features(df_main, prefix=f'{main_ticker}_', columns=feature_cols, ladder=ladder))
+    df_ref = shrink(add_features(df_ref, prefix=f'{ref_ticker}_', columns=feature_cols, ladder=ladder))
     
     # 2. Resampled Features (1H, 4H)
     # Since base is 15m, we resample to 1h and 4h for multi-timeframe analysis
-    df_main = resample_and_merge(df_main, '1h', f'{main_ticker}_1H_')
-    df_main = resample_and_merge(df_main, '4h', f'{main_ticker}_4H_')
+    df_main = shrink(resample_and_merge(df_main, '1h', f'{main_ticker}_1H_', columns=feature_cols))
+    df_main = shrink(resample_and_merge(df_main, '4h', f'{main_ticker}_4H_', columns=feature_cols))
     
     # Rename base columns to match prefix pattern
     map_main = {c: f"{main_ticker}_{c}" for c in ['Open', 'High', 'Low', 'Close', 'Volume'] if c in df_main.columns}
@@ -147,34 +245,86 @@ def prepare_pair_features(df_main, df_ref, main_ticker='SPY', ref_ticker='IWM'):
     main_close = f"{main_ticker}_Close"
     ref_close = f"{ref_ticker}_Close"
     
-    df['Spread_Log'] = np.log(df[main_close]) - np.log(df[ref_close])
-    
-    # Z-Score of Spread (Rolling)
-    window = 50 
-    spread_mean = df['Spread_Log'].rolling(window=window).mean()
-    spread_std = df['Spread_Log'].rolling(window=window).std()
-    df['Spread_Z'] = (df['Spread_Log'] - spread_mean) / spread_std
-    
-    # Rolling Correlation
-    df[f'Corr_{main_ticker}_{ref_ticker}'] = df[main_close].rolling(window=20).corr(df[ref_close])
+    want_spread = _wants(feature_cols, '', 'Spread_Log', 'Spread_Z')
+    corr_col = f'Corr_{main_ticker}_{ref_ticker}'
+    want_corr = _wants(feature_cols, '', corr_col)
+    if want_spread:
+        df['Spread_Log'] = np.log(df[main_close]) - np.log(df[ref_close])
+    
+    # Z-Score of Spread (50 bars) and Rolling Correlation (20 bars): one pass
+    # of rolling_stats over the pair for both windows
+    if want_spread or want_corr:
+        spread_window, corr_window = 50, 20
+        stats = RollingStats(df[[main_close, ref_close] + (['Spread_Log'] if want_spread else [])],
+                             windows=[spread_window, corr_window], pairs=[(0, 1)])
+        if want_spread:
+            df['Spread_Z'] = stats.zscore(spread_window)['Spread_Log']
+        if want_corr:
+            df[corr_col] = stats.corr(corr_window)
     
     # Target Creation: TRENDING STRATEGY
     # Predict movement over next 4 bars (1 hour = 4 * 15min bars)
     lookahead = 4 # 1 Hour (4 bars at 15m)
-    future_ret = np.log(df[main_close].shift(-lookahead) / df[main_close])
     
     # Lower threshold to detect more trends (0.08% move = more sensitive)
     threshold = 0.0008  # Reduced from 0.0015 for better trend detection
     
-    conditions = [
-        (future_ret > threshold),
-        (future_ret < -threshold)
-    ]
-    choices = [1, -1] 
+    # Other lookahead/threshold/barrier definitions: see labels.label_grid
+    df['Target'] = labels.threshold_labels(df[main_close].values, lookahead, threshold).astype(np.int64)
     
-    df['Target'] = np.select(conditions, choices, default=0)
+    base_cols = [f"{t}_{c}" for t in [main_ticker, ref_ticker]
+                 for c in PRICE_COLUMNS if f"{t}_{c}" in df.columns]
+    # Keep only what the model needs (intermediate indicators are dropped)
+    if feature_cols is not None:
+        df = df[base_cols + [c for c in feature_cols if c in df.columns] + ['Target']]
+        
+    if compact:
+        return compact_frame(df, base_cols)
     
     # Drop NaN
     df = df.dropna()
     
     return df
+
+def _downcast(df):
+    return df.astype({c: np.float32 for c in df.columns if c not in PRICE_COLUMNS and df[c].dtype == np.float64})
+
+def compact_frame(df, price_cols, target='Target'):
+    """
+    Drops incomplete rows and repacks the frame as: OHLCV columns (float64,
+    prices must stay exact), all features as one contiguous float32 block
+    (in their original order) and the target as int8. Columns are copied
+    one at a time into the preallocated blocks, so no full-size temporary
+    is created. Models see identical inputs: both engines cast features to
+    float32 anyway (see model.prepare_matrix).
+    """
+    feature_cols = [c for c in df.columns if c not in price_cols and c != target]
+    
+    valid = np.ones(len(df), dtype=bool)
+    for c in df.columns:
+        valid &= df[c].notna().to_numpy()
+    index = df.index[valid]
+    
+    def block(cols, dtype):
+        # Stored column-major, which is pandas' own block layout (no copy on construction)
+        values = np.empty((len(cols), len(index)), dtype=dtype)
+        for i, c in enumerate(cols):
+            values[i] = df[c].to_numpy()[valid]
+        return pd.DataFrame(values.T, index=index, columns=cols, copy=False)
+        
+    parts = [block(price_cols, np.float64), block(feature_cols, np.float32)]
+    if target in df.columns:
+        parts.append(pd.DataFrame({target: df[target].to_numpy()[valid].astype(np.int8)}, index=index))
+    return pd.concat(parts, axis=1)
+
+def memory_report(df):
+    """
+    Bytes per dtype of a feature frame (columns, MB, share of total).
+    """
+    sizes = df.memory_usage(index=False)
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'bytes': sizes})
+    report = report.groupby('dtype').agg(columns=('bytes', 'size'), mb=('bytes', 'sum'))
+    report['mb'] /= 1e6
+    report.loc['index'] = [1, df.index.memory_usage() / 1e6]
+    report['share%'] = report['mb'] / report['mb'].sum() * 100
+    return report
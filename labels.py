@@ -0,0 +1,114 @@
+import json
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from rolling_stats import rolling_std
+
+LABEL_GRID_FILE = 'label_grid.npz' # Saved in each training session folder (main.py 'labels' stage)
+
+def forward_log_returns(close, max_lookahead):
+    """
+    Returns an (n_bars, max_lookahead) matrix where column h-1 holds
+    log(close[t+h] / close[t]). Built from one strided view of the log
+    close array (NaN past the end of the data).
+    """
+    log_close = np.log(np.asarray(close, dtype=np.float64))
+    padded = np.concatenate([log_close, np.full(max_lookahead, np.nan)])
+    windows = sliding_window_view(padded, max_lookahead + 1)
+    return windows[:, 1:] - windows[:, :1]
+
+def rolling_volatility(close, window=20):
+    """
+    Per-bar std of 1-bar log returns over the trailing window (not annualized).
+    """
+    log_ret = np.diff(np.log(np.asarray(close, dtype=np.float64)), prepend=np.nan)
+    return rolling_std(log_ret, window)
+
+def _direction(returns, threshold):
+    """
+    1 above +threshold, -1 below -threshold, 0 otherwise (NaN counts as 0).
+    """
+    with np.errstate(invalid='ignore'):
+        up = returns > threshold
+        down = returns < -threshold
+    return up.astype(np.int8) - down.astype(np.int8)
+
+def threshold_labels(close, lookahead=4, threshold=0.0008):
+    """
+    Fixed-threshold target on the lookahead-bar forward log return.
+    Same definition as the default 'Target' in features.prepare_pair_features.
+    """
+    return _direction(forward_log_returns(close, lookahead)[:, lookahead - 1], threshold)
+
+def barrier_labels(paths, barrier):
+    """
+    First-touch (triple-barrier) labels from forward return paths.
+    1 if +barrier is touched before -barrier within the horizon, -1 for the
+    opposite, 0 if neither is touched (vertical barrier).
+    barrier may be a scalar or a per-bar array.
+    """
+    horizon = paths.shape[1]
+    barrier = np.broadcast_to(np.asarray(barrier, dtype=np.float64), paths.shape[:1])[:, None]
+    with np.errstate(invalid='ignore'):
+        up = paths >= barrier
+        down = paths <= -barrier
+    first_up = np.where(up.any(axis=1), up.argmax(axis=1), horizon)
+    first_down = np.where(down.any(axis=1), down.argmax(axis=1), horizon)
+    return np.sign(first_down - first_up).astype(np.int8)
+
+def label_grid(close, lookaheads=(2, 4, 8, 16), thresholds=(0.0005, 0.0008, 0.0015),
+               vol_multipliers=(0.5, 1.0), barriers=(0.001, 0.002), vol_window=20):
+    """
+    Computes a whole grid of target definitions in one pass over close.
+    Returns (labels, definitions): labels is an int8 array of shape
+    (n_definitions, n_bars) and definitions a list of dicts describing each row.
+    Kinds:
+      'fixed'   - forward return vs a fixed threshold
+      'vol'     - forward return vs k * rolling vol * sqrt(lookahead)
+      'barrier' - first touch of +/- barrier within the lookahead
+    """
+    paths = forward_log_returns(close, max(lookaheads))
+    vol = rolling_volatility(close, vol_window)
+    
+    rows, definitions = [], []
+    for h in lookaheads:
+        returns = paths[:, h - 1]
+        for threshold in thresholds:
+            rows.append(_direction(returns, threshold))
+            definitions.append({'name': f'fixed_h{h}_t{threshold:g}', 'kind': 'fixed', 'lookahead': h, 'threshold': threshold})
+        for k in vol_multipliers:
+            rows.append(_direction(returns, k * vol * np.sqrt(h)))
+            definitions.append({'name': f'vol_h{h}_k{k:g}', 'kind': 'vol', 'lookahead': h, 'multiplier': k})
+        for barrier in barriers:
+            rows.append(barrier_labels(paths[:, :h], barrier))
+            definitions.append({'name': f'barrier_h{h}_b{barrier:g}', 'kind': 'barrier', 'lookahead': h, 'barrier': barrier})
+            
+    return np.stack(rows), definitions
+
+def save_label_grid(path, labels, definitions, index):
+    """
+    Saves the int8 label tensor with its timestamps and definitions (.npz),
+    intended to sit next to the cached feature frame it was built for.
+    """
+    np.savez(path, labels=labels, index=pd.DatetimeIndex(index).as_unit('ns').asi8,
+             tz=str(pd.DatetimeIndex(index).tz or ''), definitions=json.dumps(definitions))
+
+def load_label_grid(path):
+    """
+    Loads a label grid saved by save_label_grid. Returns (labels, definitions, index).
+    """
+    data = np.load(path)
+    index = pd.DatetimeIndex(data['index'])
+    tz = str(data['tz'])
+    if tz:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    return data['labels'], json.loads(str(data['definitions'])), index
+
+def with_target(df, labels, definitions, index, name):
+    """
+    Returns df with 'Target' replaced by the named label definition,
+    aligned on timestamps. Features are reused as-is.
+    """
+    row = [d['name'] for d in definitions].index(name)
+    target = pd.Series(labels[row], index=index).reindex(df.index).fillna(0).astype(np.int8)
+    return df.assign(Target=target)
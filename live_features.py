@@ -0,0 +1,274 @@
+"""
+prepare_pair_features one bar at a time, for the resident live path.
+
+Every indicator keeps its running state (the same recursions as the ta
+library and pandas' ewm(adjust=False)) or a short window of recent values,
+so a new bar costs a few microseconds per feature instead of recomputing
+the whole history. Values match prepare_pair_features run on all bars fed
+so far (the live history plus every bar since), to rounding.
+"""
+from collections import deque
+import numpy as np
+import pandas as pd
+import features
+
+# add_features columns (unprefixed) this module updates incrementally
+SERIES_FEATURES = ['EMA_20', 'EMA_50', 'EMA_20_Slope', 'EMA_50_Slope', 'ADX', 'DMP', 'DMN', 'MACD',
+                   'BB_Width', 'BB_Pband', 'ATR', 'RSI', 'Log_Ret'] + features.ATM_GREEKS + features.LADDER_FEATURES
+
+def _ewm_alpha(span=None, alpha=None):
+    com = (span - 1) / 2.0 if span is not None else 1.0 / alpha - 1.0
+    return 1.0 / (1.0 + com)
+
+class _EWM:
+    """
+    pandas .ewm(adjust=False).mean() of a series without gaps after its first value.
+    """
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        self.alpha = _ewm_alpha(span, alpha)
+        self.min_periods = max(min_periods, 1)
+        self.value = np.nan
+        self.nobs = 0
+
+    def update(self, x):
+        if x != x:
+            return self.value if self.nobs >= self.min_periods else np.nan
+        self.nobs += 1
+        if self.value != self.value:
+            self.value = x
+        elif self.value != x:
+            old_wt = 1.0 - self.alpha
+            self.value = (old_wt * self.value + self.alpha * x) / (old_wt + self.alpha)
+        return self.value if self.nobs >= self.min_periods else np.nan
+
+def _window(values, w):
+    """
+    The last w values as an array, or None while there are fewer or any is NaN.
+    """
+    if len(values) < w:
+        return None
+    x = np.fromiter(values, dtype=np.float64, count=len(values))[-w:]
+    return None if np.isnan(x).any() else x
+
+class _ADX:
+    """
+    ta.trend.ADXIndicator(window=14): Wilder-smoothed true range and
+    directional movement, then the smoothed directional index.
+    """
+    window = 14
+
+    def __init__(self):
+        self.rows = 0
+        self.start = [] # (tr, +dm, -dm) of rows 1..window, summed to seed the smoothing
+        self.dx = []    # directional index of rows window..2*window-1, averaged to seed ADX
+        self.trs = self.dip = self.din = self.adx = 0.0
+        self.prev = None
+
+    def update(self, high, low, close):
+        """
+        (ADX, DMP, DMN) after one bar.
+        """
+        w = self.window
+        r = self.rows
+        self.rows += 1
+        prev, self.prev = self.prev, (high, low, close)
+        if prev is None:
+            return 0.0, 0.0, 0.0
+        high_prev, low_prev, close_prev = prev
+        tr = max(high, close_prev) - min(low, close_prev)
+        up, down = high - high_prev, low_prev - low
+        pos = up if (up > down and up > 0) else 0.0
+        neg = down if (down > up and down > 0) else 0.0
+
+        if r <= w:
+            self.start.append((tr, pos, neg))
+            if r < w:
+                return 0.0, 0.0, 0.0
+            self.trs, self.dip, self.din = (float(pd.Series(v).sum()) for v in zip(*self.start))
+            self.start = None
+        else:
+            self.trs = self.trs - self.trs / float(w) + tr
+            self.dip = self.dip - self.dip / float(w) + pos
+            self.din = self.din - self.din / float(w) + neg
+
+        dmp = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+        dmn = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+        dx = 100 * abs((dmp - dmn) / (dmp + dmn)) if dmp + dmn != 0 else 0.0
+        if r < 2 * w - 1:
+            self.dx.append(dx)
+        elif r == 2 * w - 1:
+            self.dx.append(dx)
+            self.adx = float(np.array(self.dx).mean())
+        else:
+            self.adx = (self.adx * (w - 1) + dx) / float(w)
+        adx = self.adx if r >= 2 * w - 1 else 0.0
+        # The seed row itself reports no direction (as ta)
+        return adx, (dmp if r > w else 0.0), (dmn if r > w else 0.0)
+
+class _ATR:
+    """
+    ta.volatility.average_true_range(window=14).
+    """
+    window = 14
+
+    def __init__(self):
+        self.start = []
+        self.atr = 0.0
+        self.prev_close = np.nan
+
+    def update(self, high, low, close):
+        w = self.window
+        pc, self.prev_close = self.prev_close, close
+        tr = high - low if pc != pc else max(high - low, abs(high - pc), abs(low - pc))
+        if self.start is not None:
+            self.start.append(tr)
+            if len(self.start) < w:
+                return 0.0
+            self.atr = float(pd.Series(self.start).mean())
+            self.start = None
+        else:
+            self.atr = (self.atr * (w - 1) + tr) / float(w)
+        return self.atr
+
+class _SeriesFeatures:
+    """
+    add_features (and add_synthetic_greeks) of one OHLC series, one bar at a time.
+    """
+    def __init__(self, prefix, columns):
+        self.prefix = prefix
+        self.names = [c[len(prefix):] for c in columns if c.startswith(prefix) and c[len(prefix):] in SERIES_FEATURES]
+        wants = lambda *names: any(n in self.names for n in names)
+        self.greeks = [n for n in features.ATM_GREEKS + features.LADDER_FEATURES if n in self.names]
+        self.ema = {span: _EWM(span=span, min_periods=span)
+                    for span in (20, 50) if wants(f'EMA_{span}', f'EMA_{span}_Slope')}
+        self.ema_prev = {span: np.nan for span in self.ema}
+        self.adx = _ADX() if wants('ADX', 'DMP', 'DMN') else None
+        self.macd = (_EWM(span=12, min_periods=12), _EWM(span=26, min_periods=26),
+                     _EWM(span=9, min_periods=9)) if wants('MACD') else None
+        self.atr = _ATR() if wants('ATR') else None
+        self.rsi = (_EWM(alpha=1 / 14, min_periods=14), _EWM(alpha=1 / 14, min_periods=14)) if wants('RSI') else None
+        self.closes = deque(maxlen=20)
+        self.log_rets = deque(maxlen=20)
+        self.prev_close = np.nan
+
+    def update(self, timestamp, high, low, close):
+        """
+        {prefixed feature: value} after one bar.
+        """
+        out = {}
+        pc, self.prev_close = self.prev_close, close
+        self.closes.append(close)
+        log_ret = np.log(close / pc)
+        self.log_rets.append(log_ret)
+
+        for span, ema in self.ema.items():
+            value = ema.update(close)
+            out[f'EMA_{span}'] = value
+            out[f'EMA_{span}_Slope'] = value - self.ema_prev[span]
+            self.ema_prev[span] = value
+        if self.adx is not None:
+            out['ADX'], out['DMP'], out['DMN'] = self.adx.update(high, low, close)
+        if self.macd is not None:
+            fast, slow, signal = self.macd
+            macd = fast.update(close) - slow.update(close)
+            out['MACD'] = macd - signal.update(macd)
+
+        if 'BB_Width' in self.names or 'BB_Pband' in self.names:
+            x = _window(self.closes, 20)
+            width = pband = np.nan
+            if x is not None:
+                mavg, mstd = x.mean(), x.std()
+                hband, lband = mavg + 2 * mstd, mavg - 2 * mstd
+                width = (hband - lband) / mavg * 100
+                pband = (close - lband) / (hband - lband) if hband != lband else np.nan
+            out['BB_Width'], out['BB_Pband'] = width, pband
+        if self.atr is not None:
+            out['ATR'] = self.atr.update(high, low, close)
+
+        if self.rsi is not None:
+            diff = close - pc
+            up, down = self.rsi
+            # The first bar has no change and counts as 0 (as ta)
+            ema_up = up.update(diff if diff > 0 else 0.0)
+            ema_down = down.update(-diff if diff < 0 else -0.0)
+            out['RSI'] = 100.0 if ema_down == 0 else 100 - 100 / (1 + ema_up / ema_down)
+        out['Log_Ret'] = log_ret
+
+        if self.greeks:
+            x = _window(self.log_rets, 20)
+            vol = x.std(ddof=1) * np.sqrt(252 * 26) if x is not None else 0.20
+            values = features.synthetic_greeks(np.array([close]), np.array([vol]), pd.DatetimeIndex([timestamp]),
+                                               self.greeks)
+            out.update({name: v[0] for name, v in values.items()})
+        return {f'{self.prefix}{n}': out[n] for n in self.names}
+
+class _Resampled:
+    """
+    resample_and_merge of the 15m bars: each completed bucket updates the
+    higher timeframe's features, which are taken up (shifted one bucket, as
+    closed candles) at the 15m bar opening the next bucket and carried forward.
+    """
+    def __init__(self, timeframe, prefix, columns):
+        self.freq = pd.tseries.frequencies.to_offset(timeframe)
+        self.series = _SeriesFeatures(prefix, columns)
+        self.label = None
+        self.bucket = None
+        self.closed = {}
+        self.values = {f'{prefix}{n}': np.nan for n in self.series.names}
+
+    def update(self, timestamp, high, low, close):
+        label = timestamp.floor(self.freq)
+        if label != self.label:
+            if self.bucket is not None:
+                self.closed = self.series.update(self.label, *self.bucket)
+            self.label, self.bucket = label, [high, low, close]
+            if timestamp == label:
+                # Forward fill: a feature still NaN for the closed bucket keeps its last value
+                self.values.update({c: v for c, v in self.closed.items() if v == v})
+        else:
+            self.bucket = [max(self.bucket[0], high), min(self.bucket[1], low), close]
+        return self.values
+
+class LiveFeatures:
+    """
+    The feature_cols row of prepare_pair_features(main, ref, ...) for the
+    latest bar, updated with one bar of each symbol at a time.
+    """
+    def __init__(self, main_ticker, ref_ticker, feature_cols):
+        self.feature_cols = list(feature_cols)
+        self.main = _SeriesFeatures(f'{main_ticker}_', feature_cols)
+        self.ref = _SeriesFeatures(f'{ref_ticker}_', feature_cols)
+        self.resampled = [_Resampled(tf, f'{main_ticker}_{name}_', feature_cols)
+                          for tf, name in [('1h', '1H'), ('4h', '4H')]
+                          if any(c.startswith(f'{main_ticker}_{name}_') for c in feature_cols)]
+        self.corr_col = f'Corr_{main_ticker}_{ref_ticker}'
+        self.spread = deque(maxlen=50)
+        self.pair = deque(maxlen=20)
+        self.bars = 0
+
+    def update(self, timestamp, main_bar, ref_bar):
+        """
+        {feature: value} after one bar of each symbol (bars are dicts or
+        Series with High/Low/Close); NaN while a feature is still warming up.
+        """
+        self.bars += 1
+        values = self.main.update(timestamp, main_bar['High'], main_bar['Low'], main_bar['Close'])
+        values.update(self.ref.update(timestamp, ref_bar['High'], ref_bar['Low'], ref_bar['Close']))
+        for frame in self.resampled:
+            values.update(frame.update(timestamp, main_bar['High'], main_bar['Low'], main_bar['Close']))
+
+        spread = np.log(main_bar['Close']) - np.log(ref_bar['Close'])
+        self.spread.append(spread)
+        self.pair.append((main_bar['Close'], ref_bar['Close']))
+        values['Spread_Log'] = spread
+        x = _window(self.spread, 50)
+        std = x.std(ddof=1) if x is not None else np.nan
+        values['Spread_Z'] = (spread - x.mean()) / std if std > 0 else np.nan
+        values[self.corr_col] = np.nan
+        if len(self.pair) == 20:
+            x, y = np.array(self.pair).T
+            x, y = x - x.mean(), y - y.mean()
+            denom = np.sqrt((x @ x) * (y @ y))
+            if denom > 0:
+                values[self.corr_col] = float(np.clip((x @ y) / denom, -1.0, 1.0))
+        return {c: values[c] for c in self.feature_cols}
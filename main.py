@@ -1,99 +1,336 @@
 import data_loader
 import features
+import labels
 import model
+import binned_hgb
 import backtest
+import options_pricing
+import rolling_stats
+import checkpoint
+import profiling
+import model_store
+from model_store import ModelStore
+from pipeline import Pipeline, Stage, init_worker
+import numpy as np
 import pandas as pd
 import joblib
+import contextlib
+import multiprocessing
 import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
-def main():
-    print("🤖 Initializing Professional ML Trading Bot...")
-    
-    # Parse Command Line Arguments
-    symbol = 'SPY'
-    if len(sys.argv) > 1:
-        symbol = sys.argv[1].upper()
-        
-    print(f"🎯 Target Asset: {symbol}")
-    
-    # 1. Data Ingestion
+# Pipeline stages. Each one receives its dependencies' results (in order) and
+# its params; stages with outputs also get the session folder.
+
+def load_stage(symbol, ref_symbol, frames=None):
     print("\n[1/4] Loading Data...")
-    # Use 15m interval for optimal 0DTE trading (yfinance limit: 60d for 15m)
-    df_main = data_loader.load_data(symbol, period="60d", interval="15m")
-    
-    # Determine Reference Asset
-    ref_symbol = 'SPY' if symbol == 'IWM' else 'IWM'
-    if symbol == 'SPY': ref_symbol = 'IWM' # Default case
-    
-    df_ref = data_loader.load_data(ref_symbol, period="60d", interval="15m")
-    
+    if frames is not None:
+        # Preloaded by a multi-symbol run (each distinct ticker is loaded once)
+        df_main, df_ref = frames[symbol], frames[ref_symbol]
+    else:
+        # Use 15m interval for optimal 0DTE trading (yfinance limit: 60d for 15m)
+        df_main = data_loader.load_data(symbol, period="60d", interval="15m")
+        df_ref = data_loader.load_data(ref_symbol, period="60d", interval="15m")
+        
     if df_main.empty or df_ref.empty:
-        print("Critical Error: Could not load data. Exiting.")
-        return
-
+        raise RuntimeError("Critical Error: Could not load data.")
+        
     # Align data
     df_main, df_ref = data_loader.align_data(df_main, df_ref)
     print(f"Data Loaded: {len(df_main)} bars from {df_main.index[0]} to {df_main.index[-1]}")
-    
-    # 2. Feature Engineering
+    return df_main, df_ref
+
+def features_stage(data, symbol, ref_symbol, compact=False, ladder=False):
     print("\n[2/4] Engineering Features...")
+    df_main, df_ref = data
     # Pass symbol as main_ticker
-    df_processed = features.prepare_pair_features(df_main, df_ref, main_ticker=symbol, ref_ticker=ref_symbol)
-    print(f"Features created. Dataset shape: {df_processed.shape}")
-    
-    # 3. Model Training
+    df_processed = features.prepare_pair_features(df_main, df_ref, main_ticker=symbol, ref_ticker=ref_symbol, compact=compact,
+                                                   ladder=ladder)
+    print(f"Features created. Dataset shape: {df_processed.shape} "
+          f"({df_processed.memory_usage().sum() / 1e6:.1f} MB{', compact' if compact else ''})")
+    return df_processed
+
+def labels_stage(data, folder):
+    df_main = data[0]
+    # Alternative targets for model.compare_label_definitions (python cli.py labels)
+    close = np.asarray(df_main['Close'], dtype=np.float64).ravel() # yfinance frames may keep a ticker level
+    grid, definitions = labels.label_grid(close)
+    labels.save_label_grid(os.path.join(folder, labels.LABEL_GRID_FILE), grid, definitions, df_main.index)
+    print(f"Label grid: {len(definitions)} target definitions saved")
+
+def train_stage(df_processed, model_type, prune, folder):
     print("\n[3/4] Training Model...")
-    trained_model, feature_cols = model.train_model(df_processed)
+    trained_model, feature_cols = model.train_model(df_processed, model_type=model_type, prune=prune)
     
-    # Save with symbol and date in organized folder
+    model_filename = os.path.join(folder, 'trained_model.pkl')
+    joblib.dump(trained_model, model_filename)
+    print(f"Model saved to '{model_filename}'")
+    # Memory-mappable copy for fast loading (identical models are stored once)
+    digest, new = ModelStore().save_session(trained_model, folder, {
+        'model_type': model_type, 'pruned': prune, 'features': len(feature_cols), 'rows': len(df_processed),
+        'data_end': str(df_processed.index[-1]), 'trained_at': time.strftime('%Y-%m-%d %H:%M:%S')})
+    print(f"Model store: {digest[:16]} ({'new' if new else 'already stored'})")
+    return trained_model, feature_cols
+
+def backtest_stage(df_processed, trained, symbol, folder, intrabar=False):
+    print("\n[4/4] Running Backtest...")
+    trained_model, feature_cols = trained
+    # Downstream steps only need the model's columns (smaller frame when pruned)
+    all_features = model.get_feature_cols(df_processed)
+    if len(feature_cols) < len(all_features):
+        df_processed = df_processed[[c for c in df_processed.columns if c not in all_features] + feature_cols]
+    bt = backtest.Backtester(df_processed, trained_model, feature_cols, initial_balance=1000, symbol=symbol,
+                             output_folder=folder, intrabar=intrabar)
+    bt.run()
+    return bt.journal
+
+def pnl_chart_stage(journal, folder):
+    print("\n[5/7] Generating P&L Chart...")
+    from utility import pnl_chart
+    pnl_chart.create_pnl_chart(os.path.join(folder, 'trade_journal.csv'))
+
+def live_signal_stage(trained, symbol, render=None, chart=True):
+    print("\n[6/7] Fetching Live Signal...")
+    from utility import predict_signal
+    predict_signal.get_latest_signal(symbol, render=render, chart=chart)
+
+def detail_chart_stage(data, journal, symbol, folder):
+    print("\n[7/7] Generating Detailed Trade Chart...")
+    from utility import detail_trades
+    # Bars already loaded by the pipeline: no download
+    detail_trades.create_detailed_chart(os.path.join(folder, 'trade_journal.csv'), symbol, bars=data[0])
+
+def build_stages(symbol, ref_symbol, model_type='forest', prune=False, frames=None, render=None, compact=False,
+                 ladder=False, chart=True, intrabar=False):
+    """
+    load_data -> features -> train -> backtest -> pnl_chart, detail_chart
+              \\-> labels           \\-> live_signal
+    Data loading and the live signal always run (they read the market);
+    every other stage is skipped when its inputs and code are unchanged.
+    Charts are rendered by `render` (a RenderService) when given, so the
+    live signal never waits for its chart. chart=False leaves out the chart
+    stages and the signal chart (headless runs never import matplotlib).
+    intrabar=True checks exits on the stored 1m bars; that backtest is not
+    cached, as the 1m bars it reads are not part of its inputs.
+    """
+    charts = {}
+    if chart:
+        from utility import pnl_chart, detail_trades
+        charts = {
+            'pnl_chart': Stage('pnl_chart', pnl_chart_stage, deps=['backtest'], code=[pnl_chart],
+                               outputs=['pnl_chart.png'], process=True),
+            'detail_chart': Stage('detail_chart', detail_chart_stage, deps=['load_data', 'backtest'], params={'symbol': symbol},
+                                  code=[detail_trades], outputs=['detail_chart.png'], process=True)
+        }
+        
+    stages = [
+        Stage('load_data', load_stage, params={'symbol': symbol, 'ref_symbol': ref_symbol, 'frames': frames}, cache=False),
+        Stage('features', features_stage, deps=['load_data'], params={'symbol': symbol, 'ref_symbol': ref_symbol, 'compact': compact, 'ladder': ladder},
+              code=[features, labels, options_pricing, rolling_stats]),
+        Stage('labels', labels_stage, deps=['load_data'], code=[labels], outputs=[labels.LABEL_GRID_FILE]),
+        Stage('train', train_stage, deps=['features'], params={'model_type': model_type, 'prune': prune},
+              code=[model, binned_hgb, model_store], outputs=['trained_model.pkl', 'model.json']),
+        Stage('backtest', backtest_stage, deps=['features', 'train'], params={'symbol': symbol, 'intrabar': intrabar},
+              code=[backtest, options_pricing, rolling_stats, model, checkpoint], outputs=['trade_journal.csv'], cache=not intrabar),
+        charts.get('pnl_chart'),
+        Stage('live_signal', live_signal_stage, deps=['train'], params={'symbol': symbol, 'render': render, 'chart': chart},
+              cache=False),
+        charts.get('detail_chart')
+    ]
+    return [stage for stage in stages if stage is not None]
+
+def session_folder_name(symbol):
+    """
+    SYMBOL/HHMM_MM_DD/ for a run started now.
+    """
     from datetime import datetime
-    import os
     
     now = datetime.now()
     # New structure: SYMBOL/HHMM_MM_DD/
     symbol_folder = symbol
     session_folder = f"{now.strftime('%H%M')}_{now.strftime('%m_%d')}"  # e.g., 1230_11_25
-    folder_name = os.path.join(symbol_folder, session_folder)
+    return os.path.join(symbol_folder, session_folder)
+
+def cpu_budget(n_symbols, jobs=None):
+    """
+    Splits the CPUs between symbol processes and the model threads inside each
+    one (the forest's n_jobs=-1, HGB's OpenMP), so the total stays at the CPU count.
+    Returns (processes, threads per process).
+    """
+    cpus = os.cpu_count() or 1
+    processes = max(1, min(n_symbols, jobs or cpus))
+    return processes, max(1, cpus // processes)
+
+def run_symbol(symbol, ref_symbol, frames, model_type, prune, use_cache, threads, profile_mode=None, compact=False,
+               ladder=False, chart=True, intrabar=False):
+    """
+    Process-pool job: the whole stage DAG for one symbol, run sequentially
+    inside the worker. Console output goes to the session folder's run.log.
+    Returns one row of the summary table.
+    """
+    from threadpoolctl import threadpool_limits
+    
+    start = time.perf_counter()
+    folder_name = session_folder_name(symbol)
     os.makedirs(folder_name, exist_ok=True)
+    if profile_mode:
+        profiling.enable(memory=True, cprofile_dir=os.path.join(folder_name, 'profiles') if profile_mode == 'cprofile' else None)
+        
+    pipe = Pipeline(build_stages(symbol, ref_symbol, model_type=model_type, prune=prune, frames=frames, compact=compact,
+                                 ladder=ladder, chart=chart, intrabar=intrabar),
+                    folder_name, use_cache=use_cache, workers=1, processes=False)
+    with open(os.path.join(folder_name, 'run.log'), 'w') as log, contextlib.redirect_stdout(log), threadpool_limits(threads):
+        status = pipe.run()
+        if profile_mode:
+            profiling.summary()
+            profiling.save(os.path.join(folder_name, 'run_profile.json'), symbol=symbol, stages=status)
+            
+    row = {'Symbol': symbol, 'Ref': ref_symbol, 'Bars': None, 'Features': None, 'Trades': None,
+           'WinRate%': None, 'NetPnL': None, 'Return%': None, 'FinalBalance': None}
+    if 'features' in pipe.results:
+        row['Bars'] = len(pipe.results['features'])
+    if 'train' in pipe.results:
+        row['Features'] = len(pipe.results['train'][1])
+    journal = pipe.results.get('backtest')
+    if journal:
+        pnl = pd.Series([t['PnL'] for t in journal])
+        row.update({'Trades': len(journal), 'WinRate%': round((pnl > 0).mean() * 100, 2), 'NetPnL': round(pnl.sum(), 2),
+                    'Return%': round(pnl.sum() / 1000 * 100, 2), 'FinalBalance': journal[-1]['Balance']})
+    failed = [name for name, state in status.items() if state in ('failed', 'skipped')]
+    row['Cached'] = ",".join(name for name, state in status.items() if state == 'cached') or '-'
+    row['Status'] = 'ok' if not failed else 'failed: ' + ",".join(failed)
+    row['Wall s'] = round(time.perf_counter() - start, 1)
+    row['Folder'] = folder_name
+    return row
+
+def run_many(symbols, model_type='forest', prune=False, use_cache=True, jobs=None, profile_mode=None, compact=False,
+             ladder=False, chart=True, intrabar=False):
+    """
+    Trains and backtests several symbols from one invocation:
+    1. Every distinct ticker (symbols + their references) is loaded once, concurrently.
+    2. Each symbol's features/train/backtest/charts run in a process pool sized by cpu_budget.
+    3. A consolidated summary table is printed.
+    """
+    refs = {s: data_loader.get_reference_symbol(s) for s in symbols}
+    distinct = list(dict.fromkeys(symbols + [refs[s] for s in symbols]))
     
-    model_filename = os.path.join(folder_name, 'trained_model.pkl')
-    joblib.dump(trained_model, model_filename)
-    print(f"Model saved to '{model_filename}'")
+    print(f"\n📥 Loading {len(distinct)} distinct tickers for {len(symbols)} symbols...")
+    with ThreadPoolExecutor(max_workers=min(8, len(distinct))) as pool:
+        frames = dict(zip(distinct, pool.map(lambda t: data_loader.load_data(t, period="60d", interval="15m"), distinct)))
+        
+    processes, threads = cpu_budget(len(symbols), jobs)
+    # Caps joblib's n_jobs=-1 and OpenMP in the workers (read at import time, so set before spawning)
+    os.environ['LOKY_MAX_CPU_COUNT'] = str(threads)
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    print(f"🧵 Running {len(symbols)} symbols on {processes} processes x {threads} model threads "
+          f"(logs in each session folder's run.log)...")
+          
+    start = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker) as pool:
+        futures = {pool.submit(run_symbol, s, refs[s], {s: frames[s], refs[s]: frames[refs[s]]},
+                               model_type, prune, use_cache, threads, profile_mode, compact, ladder, chart, intrabar): s for s in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                row = {'Symbol': symbol, 'Ref': refs[symbol], 'Status': f"failed: {e}"}
+            rows.append(row)
+            print(f"  {'✅' if row['Status'] == 'ok' else '⚠️'} {symbol}: {row['Status']}")
+            
+    table = pd.DataFrame(rows).set_index('Symbol').reindex(symbols).reset_index()
+    print("\n" + "=" * 30)
+    print("MULTI-SYMBOL SUMMARY")
+    print("=" * 30)
+    print(table.to_string(index=False))
+    print(f"\nTotal: {len(symbols)} symbols in {time.perf_counter() - start:.1f}s")
+    return table
+
+def train(symbols, model_type='forest', prune=False, use_cache=True, jobs=None, profile_mode=None, compact=False,
+          ladder=False, chart=True, intrabar=False):
+    """
+    The full pipeline for one symbol (stage DAG in this process, charts in
+    a render service) or several (run_many).
+    """
+    if len(symbols) > 1:
+        print(f"🎯 Target Assets: {', '.join(symbols)}")
+        run_many(symbols, model_type=model_type, prune=prune, use_cache=use_cache, jobs=jobs, profile_mode=profile_mode,
+                 compact=compact, ladder=ladder, chart=chart, intrabar=intrabar)
+        return
+        
+    symbol = symbols[0]
+    print(f"🎯 Target Asset: {symbol}")
     
-    # 4. Backtest
-    print("\n[4/4] Running Backtest...")
-    bt = backtest.Backtester(df_processed, trained_model, feature_cols, initial_balance=1000, symbol=symbol)
-    bt.run()
+    # Save with symbol and date in organized folder
+    folder_name = session_folder_name(symbol)
+    os.makedirs(folder_name, exist_ok=True)
     
-    # Define journal file path
-    journal_file = os.path.join(folder_name, 'trade_journal.csv')
-
-    # 5. Generate Visualizations
-    print("\n[5/7] Generating P&L Chart...")
-    try:
-        from utility import pnl_chart
-        pnl_chart.create_pnl_chart(journal_file)
-    except Exception as e:
-        print(f"⚠️ P&L Chart generation failed: {e}")
+    # Determine Reference Asset
+    ref_symbol = data_loader.get_reference_symbol(symbol)
     
-    # 6. Get Live Signal
-    print("\n[6/7] Fetching Live Signal...")
-    try:
-        from utility import predict_signal
-        predict_signal.get_latest_signal(symbol)
-    except Exception as e:
-        print(f"⚠️ Signal prediction failed: {e}")
+    # Charts render in background worker processes (headless, off the training/signal path)
+    render = None
+    if chart:
+        from utility.render_service import RenderService
+        render = RenderService(workers=2)
+    stages = build_stages(symbol, ref_symbol, model_type=model_type, prune=prune, render=render, compact=compact,
+                          ladder=ladder, chart=chart, intrabar=intrabar)
     
-    # 7. Generate Detailed Trade Chart
-    print("\n[7/7] Generating Detailed Trade Chart...")
+    if profile_mode:
+        cprofile_dir = os.path.join(folder_name, 'profiles') if profile_mode == 'cprofile' else None
+        profiling.enable(memory=True, cprofile_dir=cprofile_dir)
+        
     try:
-        from utility import detail_trades
-        detail_trades.create_detailed_chart(journal_file, symbol)
-    except Exception as e:
-        print(f"⚠️ Detailed trade chart generation failed: {e}")
+        status = Pipeline(stages, folder_name, use_cache=use_cache, pool=render).run()
+    finally:
+        if render is not None:
+            render.close()
+    print("\nStages: " + ", ".join(f"{name} ({state})" for name, state in status.items()))
     
+    if profile_mode:
+        profiling.summary()
+        profiling.save(os.path.join(folder_name, 'run_profile.json'), symbol=symbol, argv=sys.argv[1:], stages=status)
+        profiling.disable()
+        
+    if status.get('train') not in ('ran', 'cached'):
+        print("Critical Error: No model was produced. Exiting.")
+        return
+        
     print("\n✅ Process Complete. All outputs saved to '{}'".format(folder_name))
+
+def main():
+    print("🤖 Initializing Professional ML Trading Bot...")
     
+    # Parse Command Line Arguments
+    # Flags: --prune (importance-driven feature pruning), --model=forest|hgb (engine)
+    #        --profile (stage timings/memory -> run_profile.json), --profile=cprofile (+ .prof per stage)
+    #        --no-cache (recompute every stage and refresh the stage cache)
+    #        --jobs=N (multi-symbol runs: max symbol processes, default CPU count)
+    #        --compact (float32 features / int8 target, about half the memory)
+    #        --ladder (adds Greeks of the traded 0DTE strikes at the real time to close)
+    #        --no-chart (headless: no P&L/detail/signal charts, matplotlib is never imported)
+    #        --intrabar (backtest exits on the stored 1m bars while a position is open)
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    prune = '--prune' in sys.argv
+    model_type = next((a.split('=', 1)[1] for a in sys.argv if a.startswith('--model=')), 'forest')
+    profile_mode = next((a.split('=', 1)[1] if '=' in a else 'basic' for a in sys.argv if a.startswith('--profile')), None)
+    use_cache = '--no-cache' not in sys.argv
+    compact = '--compact' in sys.argv
+    ladder = '--ladder' in sys.argv
+    chart = '--no-chart' not in sys.argv
+    intrabar = '--intrabar' in sys.argv
+    
+    jobs = next((int(a.split('=', 1)[1]) for a in sys.argv if a.startswith('--jobs=')), None)
+    
+    # One or more symbols: python main.py SPY IWM QQQ
+    symbols = list(dict.fromkeys(a.upper() for a in args)) or ['SPY']
+    train(symbols, model_type=model_type, prune=prune, use_cache=use_cache, jobs=jobs, profile_mode=profile_mode,
+          compact=compact, ladder=ladder, chart=chart, intrabar=intrabar)
+
 
 if __name__ == "__main__":
     main()
@@ -1,37 +1,86 @@
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import classification_report, accuracy_score
-import joblib
 import pandas as pd
 import numpy as np
+from checkpoint import append_records, read_records, read_snapshot, remove, write_snapshot
+from profiling import profiled
 
-def train_model(df):
+MODEL_TYPES = ['forest', 'hgb']
+
+# sklearn is imported by the functions that train (it takes seconds to load):
+# the backtest and the live signal only need the feature helpers below.
+
+def build_model(model_type='forest'):
     """
-    Trains a RandomForest model with TimeSeriesSplit.
+    Returns an untrained classifier for the given engine.
+    'forest': RandomForestClassifier (default)
+    'hgb': binned_hgb.BinnedHistGradientBoosting
+    """
+    if model_type == 'forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(
+            n_estimators=100,
+            max_depth=5, # Prevent overfitting
+            min_samples_leaf=10,
+            random_state=42,
+            n_jobs=-1,
+            class_weight='balanced'
+        )
+    if model_type == 'hgb':
+        from binned_hgb import BinnedHistGradientBoosting
+        return BinnedHistGradientBoosting()
+    raise ValueError(f"Unknown model type '{model_type}'. Choose from {MODEL_TYPES}")
+
+def prepare_matrix(model, X):
+    """
+    Converts features once to float32, which both engines fit on (trees
+    cast to float32 on every fit otherwise). Nothing learned from the data
+    is applied here: the histogram engine learns its bin edges in each
+    fit, from that fold's training rows.
+    """
+    return X.astype(np.float32)
+
+def get_feature_cols(df):
+    """
+    Returns the model input columns of a processed dataset.
+    Excludes non-feature columns (OHLCV and Target).
     """
-    # Feature Selection
-    # Exclude non-feature columns (OHLCV and Target)
     exclude_keywords = ['Target', 'Open', 'High', 'Low', 'Close', 'Volume']
-    feature_cols = [c for c in df.columns if not any(kw in c for kw in exclude_keywords)]
-    
-    X = df[feature_cols]
-    y = df['Target']
-    
-    # Time Series Split
-    tscv = TimeSeriesSplit(n_splits=5)
-    
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=5, # Prevent overfitting
-        min_samples_leaf=10,
-        random_state=42,
-        n_jobs=-1,
-        class_weight='balanced'
-    )
+    return [c for c in df.columns if not any(kw in c for kw in exclude_keywords)]
+
+def select_features(df, cols):
+    """
+    df[cols], as a view instead of a copy when the columns are one
+    contiguous run (e.g. the full feature list of a compact frame).
+    """
+    positions = df.columns.get_indexer(cols)
+    if len(positions) and (positions >= 0).all() and (np.diff(positions) == 1).all():
+        return df.iloc[:, positions[0]:positions[-1] + 1]
+    return df[cols]
+
+def get_model_features(model):
+    """
+    Returns the feature columns a trained model was fit on (saved with the model).
+    """
+    return list(model.feature_names_in_)
+
+@profiled()
+def cross_validate(model, X, y, tscv, importance=None, columns=None):
+    """
+    Runs Time-Series CV and prints fold accuracies.
+    X may be a DataFrame or an array (see prepare_matrix).
+    If importance is 'impurity' or 'permutation', returns the feature
+    importances averaged over the folds (impurity falls back to permutation
+    for engines without feature_importances_).
+    """
+    from sklearn.inspection import permutation_importance
+    from sklearn.metrics import accuracy_score
     
-    print("Starting Time-Series Cross-Validation...")
+    columns = list(X.columns) if columns is None else columns
+    fold_importances = []
     for fold, (train_index, test_index) in enumerate(tscv.split(X)):
-        X_train, X_test = X.iloc[train_index], X.iloc[test_index]
+        if isinstance(X, np.ndarray):
+            X_train, X_test = X[train_index], X[test_index]
+        else:
+            X_train, X_test = X.iloc[train_index], X.iloc[test_index]
         y_train, y_test = y.iloc[train_index], y.iloc[test_index]
         
         model.fit(X_train, y_train)
@@ -39,13 +88,141 @@ def train_model(df):
         acc = accuracy_score(y_test, preds)
         print(f"Fold {fold+1} Accuracy: {acc:.4f}")
         
+        if importance == 'impurity' and hasattr(model, 'feature_importances_'):
+            fold_importances.append(model.feature_importances_)
+        elif importance in ('impurity', 'permutation'):
+            result = permutation_importance(model, X_test, y_test, n_repeats=5, random_state=42, n_jobs=-1)
+            fold_importances.append(np.clip(result.importances_mean, 0, None))
+            
+    if not fold_importances:
+        return None
+    return pd.Series(np.mean(fold_importances, axis=0), index=columns).sort_values(ascending=False)
+
+def prune_features(X, importances, corr_threshold=0.95, importance_share=0.95, max_features=None):
+    """
+    Reduces the feature set using CV importances.
+    1. Walks features from most to least important and drops any feature whose
+       absolute correlation with an already kept feature exceeds corr_threshold.
+    2. Keeps the top survivors covering importance_share of total importance
+       (optionally capped at max_features).
+    """
+    ranked = list(importances.index)
+    corr = np.nan_to_num(np.abs(np.corrcoef(X[ranked].to_numpy(dtype=float), rowvar=False)))
+    
+    kept = []
+    for i in range(len(ranked)):
+        if all(corr[i, j] < corr_threshold for j in kept):
+            kept.append(i)
+    survivors = importances.iloc[kept]
+    
+    n_keep = len(survivors)
+    if survivors.sum() > 0:
+        share = (survivors.cumsum() / survivors.sum()).values
+        n_keep = int(np.searchsorted(share, importance_share) + 1)
+    if max_features:
+        n_keep = min(n_keep, max_features)
+    return list(survivors.index[:max(1, n_keep)])
+
+@profiled()
+def train_model(df, model_type='forest', prune=False, importance='impurity', corr_threshold=0.95,
+                importance_share=0.95, max_features=None):
+    """
+    Trains a model (see build_model for engines) with TimeSeriesSplit.
+    The feature matrix is converted once and reused by every fold and the final fit.
+    With prune=True, features are ranked by importance over the CV folds,
+    correlated duplicates are removed, and the final model is fit on the
+    reduced set (kept in model.feature_names_in_).
+    """
+    from sklearn.model_selection import TimeSeriesSplit
+    
+    # Feature Selection
+    feature_cols = get_feature_cols(df)
+    
+    X = select_features(df, feature_cols)
+    y = df['Target']
+    
+    # Time Series Split
+    tscv = TimeSeriesSplit(n_splits=5)
+    
+    model = build_model(model_type)
+    X_fit = prepare_matrix(model, X)
+    
+    print(f"Starting Time-Series Cross-Validation ({model_type})...")
+    importances = cross_validate(model, X_fit, y, tscv, importance=importance if prune else None, columns=feature_cols)
+    
+    if prune:
+        feature_cols = prune_features(X, importances, corr_threshold, importance_share, max_features)
+        X = X[feature_cols]
+        X_fit = prepare_matrix(model, X)
+        print(f"\n✂️ Pruned features: {len(importances)} -> {len(feature_cols)} "
+              f"(|corr| < {corr_threshold}, {importance_share:.0%} of {importance} importance)")
+        print("Re-running Cross-Validation on pruned features...")
+        cross_validate(model, X_fit, y, tscv, columns=feature_cols)
+        
     # Final Train on all data
     print("Training final model on full dataset...")
-    model.fit(X, y)
+    model.fit(X_fit, y)
     
     # Feature Importance
-    importances = pd.Series(model.feature_importances_, index=feature_cols).sort_values(ascending=False)
-    print("\nTop 10 Features:")
-    print(importances.head(10))
-    
+    if hasattr(model, 'feature_importances_'):
+        importances = pd.Series(model.feature_importances_, index=feature_cols).sort_values(ascending=False)
+        print("\nTop 10 Features:")
+        print(importances.head(10))
+        
     return model, feature_cols
+
+def compare_label_definitions(df, grid, model_type='forest', names=None, checkpoint=None):
+    """
+    Cross-validates one engine against each label definition of a grid
+    (see labels.label_grid). The feature matrix is prepared once and reused,
+    so no feature engineering is redone. Returns a table ranked by balanced accuracy.
+    grid: the label_grid.npz a training session saved (labels.save_label_grid)
+    or its (labels, definitions, index); only bars it covers are used.
+    checkpoint: snapshot path; each finished definition is recorded there,
+    and a restarted sweep on the same data skips the ones already done.
+    """
+    from sklearn.metrics import accuracy_score, balanced_accuracy_score
+    from sklearn.model_selection import TimeSeriesSplit
+    from labels import load_label_grid
+    
+    labels, definitions, index = load_label_grid(grid) if isinstance(grid, str) else grid
+    df = df[df.index.isin(index)]
+    feature_cols = get_feature_cols(df)
+    model = build_model(model_type)
+    X_fit = prepare_matrix(model, df[feature_cols])
+    tscv = TimeSeriesSplit(n_splits=5)
+    
+    rows, offset = [], 0
+    key = {'model_type': model_type, 'rows': len(df), 'first': str(df.index[0]), 'last': str(df.index[-1]),
+           'features': feature_cols, 'definitions': definitions}
+    if checkpoint:
+        snapshot = read_snapshot(checkpoint)
+        if snapshot is not None and snapshot[0] == key:
+            offset = int(snapshot[1]['offset'])
+            rows = read_records(f"{checkpoint}.rows", offset)
+            print(f"Resuming sweep: {len(rows)} definitions already done")
+    done = {r['name'] for r in rows}
+    
+    for row, definition in enumerate(definitions):
+        if (names and definition['name'] not in names) or definition['name'] in done:
+            continue
+        y = pd.Series(labels[row], index=index).reindex(df.index).fillna(0).astype(np.int8).values
+        accs, bal_accs = [], []
+        for train_index, test_index in tscv.split(X_fit):
+            X_train = X_fit[train_index] if isinstance(X_fit, np.ndarray) else X_fit.iloc[train_index]
+            X_test = X_fit[test_index] if isinstance(X_fit, np.ndarray) else X_fit.iloc[test_index]
+            model.fit(X_train, y[train_index])
+            preds = model.predict(X_test)
+            accs.append(accuracy_score(y[test_index], preds))
+            bal_accs.append(balanced_accuracy_score(y[test_index], preds))
+        shares = {c: np.mean(y == c) for c in (-1, 0, 1)}
+        rows.append({**definition, 'accuracy': np.mean(accs), 'balanced_accuracy': np.mean(bal_accs),
+                     'share_down': shares[-1], 'share_flat': shares[0], 'share_up': shares[1]})
+        print(f"{definition['name']:<22} acc {np.mean(accs):.4f} | balanced {np.mean(bal_accs):.4f}")
+        if checkpoint:
+            offset = append_records(f"{checkpoint}.rows", rows[-1:], offset)
+            write_snapshot(checkpoint, key, offset=np.int64(offset))
+            
+    if checkpoint:
+        remove(checkpoint, f"{checkpoint}.rows")
+    return pd.DataFrame(rows).sort_values('balanced_accuracy', ascending=False).reset_index(drop=True)
@@ -0,0 +1,418 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+
+MODEL_STORE_DIR = 'model_store'
+MANIFEST_FILE = 'manifest.json'
+SESSION_REF = 'model.json' # Per-session pointer into the store
+FORMAT_VERSION = 1
+CHUNK_ROWS = 4096 # Rows traversed at once (bounds the rows x trees node matrix)
+
+def _forest_arrays(model):
+    """
+    All trees of a RandomForestClassifier as flat node arrays. Child indices
+    are global (offset per tree), -1 marks a leaf; leaf values are class
+    probabilities.
+    """
+    offsets = np.cumsum([0] + [e.tree_.node_count for e in model.estimators_])
+    left, right, feature, threshold, missing_left, value = [], [], [], [], [], []
+    for offset, estimator in zip(offsets, model.estimators_):
+        tree = estimator.tree_
+        leaf = tree.children_left < 0
+        left.append(np.where(leaf, -1, tree.children_left + offset))
+        right.append(np.where(leaf, -1, tree.children_right + offset))
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        missing_left.append(tree.missing_go_to_left.astype(bool))
+        counts = tree.value[:, 0, :]
+        value.append(counts / counts.sum(axis=1, keepdims=True))
+    arrays = {
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'missing_left': np.concatenate(missing_left),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': offsets[:-1].astype(np.int32)
+    }
+    return arrays, {'kind': 'forest', 'max_depth': int(max(e.tree_.max_depth for e in model.estimators_))}
+
+def _hgb_arrays(model):
+    """
+    BinnedHistGradientBoosting: the boosted trees (one per class and
+    iteration) as flat node arrays, plus the quantile bin edges used to turn
+    raw features into the codes the trees were fit on.
+    """
+    estimator = model.estimator_
+    predictors = [p for iteration in estimator._predictors for p in iteration]
+    offsets = np.cumsum([0] + [len(p.nodes) for p in predictors])
+    left, right, feature, threshold, missing_left, value = [], [], [], [], [], []
+    for offset, predictor in zip(offsets, predictors):
+        nodes = predictor.nodes
+        leaf = nodes['is_leaf'].astype(bool)
+        left.append(np.where(leaf, -1, nodes['left'].astype(np.int64) + offset))
+        right.append(np.where(leaf, -1, nodes['right'].astype(np.int64) + offset))
+        feature.append(np.where(leaf, 0, nodes['feature_idx']))
+        threshold.append(nodes['num_threshold'])
+        missing_left.append(nodes['missing_go_to_left'].astype(bool))
+        value.append(nodes['value'])
+    n_per_iteration = estimator.n_trees_per_iteration_
+    arrays = {
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'missing_left': np.concatenate(missing_left),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': offsets[:-1].astype(np.int32),
+        'tree_class': np.tile(np.arange(n_per_iteration, dtype=np.int32), len(estimator._predictors)),
+        'baseline': np.asarray(estimator._baseline_prediction, dtype=np.float64).ravel(),
+        'bin_edges': np.concatenate(model.bin_edges_),
+        'bin_offsets': np.cumsum([0] + [len(e) for e in model.bin_edges_]).astype(np.int64)
+    }
+    max_depth = int(max(p.nodes['depth'].max() for p in predictors))
+    return arrays, {'kind': 'hgb', 'max_depth': max_depth}
+
+def model_arrays(model):
+    """
+    Returns (arrays, manifest) for a trained forest or binned HGB model.
+    """
+    if hasattr(model, 'estimators_'):
+        arrays, manifest = _forest_arrays(model)
+    elif hasattr(model, 'bin_edges_'):
+        arrays, manifest = _hgb_arrays(model)
+    else:
+        raise TypeError(f"Unsupported model type {type(model).__name__}")
+    manifest.update({
+        'classes': np.asarray(model.classes_).tolist(),
+        'features': [str(f) for f in model.feature_names_in_]
+    })
+    return arrays, manifest
+
+def model_digest(arrays, manifest):
+    """
+    Content hash of the trees, classes and features (not the training
+    metadata), so identical models trained in different sessions share one entry.
+    """
+    h = hashlib.sha256(json.dumps({k: manifest[k] for k in ('kind', 'classes', 'features')}).encode())
+    for name in sorted(arrays):
+        h.update(f"{name}:{arrays[name].dtype.str}:{arrays[name].shape}".encode())
+        h.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return h.hexdigest()
+
+def model_id(model):
+    """
+    Digest identifying a model: its store digest (the same for a trained
+    model and the ArrayModel opened from its entry), or a hash of the
+    pickled model for types the store does not hold.
+    """
+    if isinstance(model, ArrayModel):
+        return model.manifest['digest']
+    try:
+        return model_digest(*model_arrays(model))
+    except (TypeError, AttributeError):
+        return hashlib.sha256(pickle.dumps(model)).hexdigest()
+
+class ArrayModel:
+    """
+    Predict-only model backed by the stored node arrays. Opening it reads
+    only the manifest; the arrays are memory-mapped on first use. Offers
+    the parts of the sklearn API the backtest and signal code use
+    (predict, predict_proba, classes_, feature_names_in_).
+    """
+    def __init__(self, folder, manifest=None, mmap=True):
+        self.folder = folder
+        if manifest is None:
+            with open(os.path.join(folder, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+        self.manifest = manifest
+        self.mmap = mmap
+        self.kind = manifest['kind']
+        self.classes_ = np.asarray(manifest['classes'])
+        self.feature_names_in_ = np.asarray(manifest['features'], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.metadata = manifest.get('metadata', {})
+        self._arrays = None
+        
+    @property
+    def arrays(self):
+        if self._arrays is None:
+            mode = 'r' if self.mmap else None
+            self._arrays = {name: np.load(os.path.join(self.folder, f"{name}.npy"), mmap_mode=mode)
+                            for name in self.manifest['arrays']}
+        return self._arrays
+        
+    def _matrix(self, X):
+        if hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)].to_numpy(dtype=np.float32)
+        X = np.asarray(X, dtype=np.float32)
+        if self.kind != 'hgb':
+            return X
+        # Same codes as BinnedHistGradientBoosting.transform
+        edges, offsets = self.arrays['bin_edges'], self.arrays['bin_offsets']
+        codes = np.empty(X.shape, dtype=np.uint8)
+        for j in range(X.shape[1]):
+            codes[:, j] = np.searchsorted(edges[offsets[j]:offsets[j + 1]], X[:, j], side='left')
+        return codes
+        
+    def _leaves(self, X):
+        """
+        Leaf node of every tree for every row: all trees advance one level
+        per step, so the loop runs max_depth times regardless of tree count.
+        """
+        a = self.arrays
+        left, right, feature, threshold, missing_left = (a['left'], a['right'], a['feature'],
+                                                         a['threshold'], a['missing_left'])
+        node = np.repeat(np.asarray(a['roots'])[None, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.manifest['max_depth']):
+            next_left = left[node]
+            active = next_left >= 0
+            if not active.any():
+                break
+            x = X[rows, feature[node]].astype(np.float64)
+            go_left = (x <= threshold[node]) | (np.isnan(x) & missing_left[node])
+            node = np.where(active, np.where(go_left, next_left, right[node]), node)
+        return node
+        
+    def predict_proba(self, X):
+        X = self._matrix(X)
+        out = np.empty((len(X), len(self.classes_)))
+        for start in range(0, len(X), CHUNK_ROWS):
+            leaves = self._leaves(X[start:start + CHUNK_ROWS])
+            out[start:start + CHUNK_ROWS] = self._proba(leaves)
+        return out
+        
+    def _proba(self, leaves):
+        value = self.arrays['value']
+        if self.kind == 'forest':
+            return value[leaves].mean(axis=1)
+        # Boosting: baseline + sum of each class's trees, then sigmoid / softmax
+        tree_class = np.asarray(self.arrays['tree_class'])
+        raw = np.repeat(np.asarray(self.arrays['baseline'])[None, :], len(leaves), axis=0)
+        leaf_values = value[leaves]
+        for k in range(raw.shape[1]):
+            raw[:, k] += leaf_values[:, tree_class == k].sum(axis=1)
+        if raw.shape[1] == 1:
+            p = 1 / (1 + np.exp(-raw[:, 0]))
+            return np.column_stack([1 - p, p])
+        raw -= raw.max(axis=1, keepdims=True)
+        e = np.exp(raw)
+        return e / e.sum(axis=1, keepdims=True)
+        
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+class ModelStore:
+    """
+    Content-addressed model storage: model_store/<digest>/ holds one
+    uncompressed .npy per node array plus manifest.json. Sessions keep a
+    small model.json pointing at their entry, so retraining an identical
+    model in another session stores nothing new. archive() swaps an entry
+    for a compressed .npz; opening an archived model restores it first.
+    """
+    def __init__(self, root=MODEL_STORE_DIR):
+        self.root = root
+        
+    def _dir(self, digest):
+        return os.path.join(self.root, digest[:16])
+        
+    def _archive_file(self, digest):
+        return os.path.join(self.root, 'archive', f"{digest[:16]}.npz")
+        
+    def has(self, digest):
+        return os.path.exists(os.path.join(self._dir(digest), MANIFEST_FILE)) or os.path.exists(self._archive_file(digest))
+        
+    def put(self, model, metadata=None):
+        """
+        Stores a trained model. Returns (digest, True if newly written).
+        """
+        arrays, manifest = model_arrays(model)
+        digest = model_digest(arrays, manifest)
+        if self.has(digest):
+            return digest, False
+            
+        manifest.update({'format': FORMAT_VERSION, 'digest': digest, 'arrays': sorted(arrays),
+                         'metadata': metadata or {}})
+        folder = self._dir(digest)
+        tmp = f"{folder}.tmp{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), array)
+        with open(os.path.join(tmp, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=1)
+        try:
+            os.replace(tmp, folder)
+        except OSError: # Another process stored the same model first
+            shutil.rmtree(tmp, ignore_errors=True)
+            return digest, False
+        return digest, True
+        
+    def open(self, digest, mmap=True):
+        if not os.path.exists(os.path.join(self._dir(digest), MANIFEST_FILE)):
+            self.restore(digest)
+        return ArrayModel(self._dir(digest), mmap=mmap)
+        
+    def archive(self, digest):
+        """
+        Replaces an entry by a compressed .npz (arrays + manifest). Returns bytes saved.
+        """
+        folder = self._dir(digest)
+        if not os.path.isdir(folder):
+            return 0
+        with open(os.path.join(folder, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        arrays = {name: np.load(os.path.join(folder, f"{name}.npy")) for name in manifest['arrays']}
+        target = self._archive_file(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.tmp{os.getpid()}.npz"
+        np.savez_compressed(tmp, __manifest__=np.frombuffer(json.dumps(manifest).encode(), dtype=np.uint8), **arrays)
+        os.replace(tmp, target)
+        before = sum(os.path.getsize(p) for p in glob.glob(os.path.join(folder, '*')))
+        shutil.rmtree(folder)
+        return before - os.path.getsize(target)
+        
+    def restore(self, digest):
+        """
+        Unpacks an archived entry back into memory-mappable files.
+        """
+        with np.load(self._archive_file(digest)) as archive:
+            manifest = json.loads(archive['__manifest__'].tobytes())
+            folder = self._dir(digest)
+            tmp = f"{folder}.tmp{os.getpid()}"
+            os.makedirs(tmp, exist_ok=True)
+            for name in manifest['arrays']:
+                np.save(os.path.join(tmp, f"{name}.npy"), archive[name])
+        with open(os.path.join(tmp, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=1)
+        try:
+            os.replace(tmp, folder)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        os.remove(self._archive_file(digest))
+        
+    def digests(self):
+        if not os.path.isdir(self.root):
+            return [], []
+        live = [json.load(open(p))['digest'] for p in glob.glob(os.path.join(self.root, '*', MANIFEST_FILE))]
+        archived = []
+        for path in glob.glob(os.path.join(self.root, 'archive', '*.npz')):
+            with np.load(path) as archive:
+                archived.append(json.loads(archive['__manifest__'].tobytes())['digest'])
+        return live, archived
+        
+    def save_session(self, model, folder, metadata=None):
+        """
+        Stores the model and writes the session's model.json pointer.
+        Returns (digest, True if newly written).
+        """
+        digest, new = self.put(model, metadata)
+        ref = {'digest': digest, 'store': os.path.relpath(self.root, folder), 'metadata': metadata or {}}
+        with open(os.path.join(folder, SESSION_REF), 'w') as f:
+            json.dump(ref, f, indent=1)
+        return digest, new
+
+def load_session_model(folder, mmap=True):
+    """
+    Opens the model a session folder points to (model.json), or None if the
+    session has no pointer or its store entry is gone.
+    """
+    ref_file = os.path.join(folder, SESSION_REF)
+    if not os.path.exists(ref_file):
+        return None
+    with open(ref_file) as f:
+        ref = json.load(f)
+    store = ModelStore(os.path.normpath(os.path.join(folder, ref['store'])))
+    if not store.has(ref['digest']):
+        return None
+    return store.open(ref['digest'], mmap=mmap)
+
+def import_sessions(store, root='.', symbols=None, verify=True):
+    """
+    Converts every session's trained_model.pkl into the store (model.json
+    pointer next to it). Returns (imported, new entries, pickle bytes).
+    """
+    import joblib
+    import pandas as pd
+    import warnings
+    
+    imported = new = pickle_bytes = 0
+    for path in sorted(glob.glob(os.path.join(root, '*', '*', 'trained_model.pkl'))):
+        folder = os.path.dirname(path)
+        symbol = os.path.basename(os.path.dirname(folder))
+        if symbols and symbol not in symbols:
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore') # sklearn version mismatch on old pickles
+            model = joblib.load(path)
+        digest, is_new = store.save_session(model, folder, {'symbol': symbol, 'source': 'trained_model.pkl'})
+        if verify and is_new:
+            columns = list(model.feature_names_in_)
+            check = pd.DataFrame(np.random.default_rng(0).normal(size=(64, len(columns))), columns=columns)
+            if not np.array_equal(model.predict(check), store.open(digest).predict(check)):
+                raise RuntimeError(f"{path}: stored model predictions differ from the pickle")
+        imported += 1
+        new += is_new
+        pickle_bytes += os.path.getsize(path)
+    return imported, new, pickle_bytes
+
+def session_refs(root='.'):
+    """
+    {digest: newest modification time of a session model.json pointing to it}.
+    """
+    last_used = {}
+    for path in glob.glob(os.path.join(root, '*', '*', SESSION_REF)):
+        with open(path) as f:
+            digest = json.load(f)['digest']
+        last_used[digest] = max(last_used.get(digest, 0), os.path.getmtime(path))
+    return last_used
+
+def _size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(p) for p in glob.glob(os.path.join(path, '**', '*'), recursive=True) if os.path.isfile(p))
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mappable model store (import session pickles, archive, list)")
+    parser.add_argument('command', choices=['import', 'list', 'archive', 'restore'])
+    parser.add_argument('symbols', nargs='*', help="import: only these symbols")
+    parser.add_argument('--root', default='.', help="Folder containing the SYMBOL/ session folders")
+    parser.add_argument('--store', default=MODEL_STORE_DIR)
+    parser.add_argument('--older-than', type=float, default=30,
+                        help="archive: entries no session has pointed to in this many days")
+    args = parser.parse_args()
+    
+    store = ModelStore(args.store)
+    if args.command == 'import':
+        start = time.perf_counter()
+        imported, new, pickle_bytes = import_sessions(store, args.root, [s.upper() for s in args.symbols])
+        print(f"📦 {imported} session models -> {new} new store entries in {time.perf_counter() - start:.1f}s "
+              f"(pickles {pickle_bytes / 1e6:.1f} MB, store {_size(store.root) / 1e6:.1f} MB)")
+    elif args.command == 'archive':
+        cutoff = time.time() - args.older_than * 86400
+        last_used = session_refs(args.root)
+        saved = count = 0
+        for digest in store.digests()[0]:
+            if last_used.get(digest, 0) < cutoff:
+                saved += store.archive(digest)
+                count += 1
+        print(f"🗜️ Archived {count} models, saved {saved / 1e6:.1f} MB")
+    elif args.command == 'restore':
+        for digest in store.digests()[1]:
+            store.restore(digest)
+            print(f"Restored {digest[:16]}")
+    live, archived = store.digests()
+    print(f"{len(live)} live, {len(archived)} archived models in {store.root} ({_size(store.root) / 1e6:.1f} MB)")
+    if args.command == 'list':
+        for digest in live:
+            model = store.open(digest)
+            print(f"{digest[:16]}  {model.kind:<6} {len(model.feature_names_in_):>3} features  {_size(model.folder) / 1e3:8.0f} KB  {model.metadata}")
+
+if __name__ == "__main__":
+    main()
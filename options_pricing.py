@@ -1,6 +1,18 @@
 import numpy as np
-from scipy.stats import norm
+# scipy.special only: scipy.stats costs ~1 s of import time for the normal CDF/PDF
+from scipy.special import ndtr
 import math
+from rolling_stats import rolling_std
+
+LADDER_GREEKS = ('delta', 'gamma', 'theta', 'vega')
+MINUTES_PER_YEAR = 252 * 6.5 * 60 # Trading minutes, as the backtest annualizes 0DTE expiries
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+def norm_pdf(x):
+    """
+    Standard normal density (same formula as scipy.stats.norm.pdf).
+    """
+    return np.exp(-x ** 2 / 2.0) / SQRT_2PI
 
 class OptionsPricing:
     def __init__(self, risk_free_rate=0.045):
@@ -22,12 +34,32 @@ class OptionsPricing:
         d2 = d1 - sigma * np.sqrt(T)
         
         if option_type == 'call':
-            price = S * norm.cdf(d1) - K * np.exp(-self.r * T) * norm.cdf(d2)
+            price = S * ndtr(d1) - K * np.exp(-self.r * T) * ndtr(d2)
         else:
-            price = K * np.exp(-self.r * T) * norm.cdf(-d2) - S * norm.cdf(-d1)
+            price = K * np.exp(-self.r * T) * ndtr(-d2) - S * ndtr(-d1)
             
         return price
 
+    def black_scholes_batch(self, S, K, T, sigma, option_type='call'):
+        """
+        black_scholes over arrays (broadcast): one call prices every path or
+        strike. Expired entries (T <= 0) are worth their intrinsic value.
+        """
+        S, K, T, sigma = (np.asarray(v, dtype=np.float64) for v in (S, K, T, sigma))
+        live = T > 0
+        T_live = np.where(live, T, 1.0)
+        vol_sqrt_T = sigma * np.sqrt(T_live)
+        d1 = (np.log(S / K) + (self.r + 0.5 * sigma ** 2) * T_live) / vol_sqrt_T
+        d2 = d1 - vol_sqrt_T
+        discounted_K = K * np.exp(-self.r * T_live)
+        if option_type == 'call':
+            price = S * ndtr(d1) - discounted_K * ndtr(d2)
+            intrinsic = np.maximum(S - K, 0)
+        else:
+            price = discounted_K * ndtr(-d2) - S * ndtr(-d1)
+            intrinsic = np.maximum(K - S, 0)
+        return np.where(live, price, intrinsic)
+
     def calculate_greeks(self, S, K, T, sigma, option_type='call'):
         """
         Calculate Greeks for an option.
@@ -38,16 +70,16 @@ class OptionsPricing:
         d1 = (np.log(S / K) + (self.r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
         d2 = d1 - sigma * np.sqrt(T)
         
-        N_prime_d1 = norm.pdf(d1)
+        N_prime_d1 = norm_pdf(d1)
         
         if option_type == 'call':
-            delta = norm.cdf(d1)
+            delta = ndtr(d1)
             theta = (- (S * sigma * N_prime_d1) / (2 * np.sqrt(T)) 
-                     - self.r * K * np.exp(-self.r * T) * norm.cdf(d2))
+                     - self.r * K * np.exp(-self.r * T) * ndtr(d2))
         else:
-            delta = norm.cdf(d1) - 1
+            delta = ndtr(d1) - 1
             theta = (- (S * sigma * N_prime_d1) / (2 * np.sqrt(T)) 
-                     + self.r * K * np.exp(-self.r * T) * norm.cdf(-d2))
+                     + self.r * K * np.exp(-self.r * T) * ndtr(-d2))
 
         gamma = N_prime_d1 / (S * sigma * np.sqrt(T))
         vega = S * np.sqrt(T) * N_prime_d1 / 100 # Vega is usually per 1% change in vol
@@ -59,6 +91,39 @@ class OptionsPricing:
             'vega': vega
         }
 
+    def greeks_ladder(self, S, sigma, moneyness, minutes, option_type='call'):
+        """
+        Black-Scholes Greeks for every bar x strike x expiry in one broadcast.
+        S, sigma: per-bar arrays (n,); moneyness: strike offsets as fractions
+        of spot (m,), e.g. 0.003 = 0.3% above; minutes: minutes to expiry,
+        either a tenor grid (t,) or per-bar tenors (n, t).
+        Returns float32 (n, m, t, 4) with LADDER_GREEKS along the last axis
+        (theta per day, vega per 1 vol point, as calculate_greeks).
+        """
+        S = np.asarray(S, dtype=np.float64)[:, None, None]
+        sigma = np.asarray(sigma, dtype=np.float64)[:, None, None]
+        K = S * (1 + np.asarray(moneyness, dtype=np.float64))[None, :, None]
+        minutes = np.asarray(minutes, dtype=np.float64)
+        T = np.maximum(minutes.reshape(1, 1, -1) if minutes.ndim == 1 else minutes[:, None, :], 1) / MINUTES_PER_YEAR
+        
+        sqrt_T = np.sqrt(T)
+        vol_sqrt_T = sigma * sqrt_T
+        d1 = (np.log(S / K) + (self.r + 0.5 * sigma ** 2) * T) / vol_sqrt_T
+        d2 = d1 - vol_sqrt_T
+        pdf_d1 = np.exp(-0.5 * d1 ** 2) / np.sqrt(2 * np.pi)
+        discounted_K = self.r * K * np.exp(-self.r * T)
+        
+        out = np.empty(np.broadcast_shapes(d1.shape, K.shape) + (4,), dtype=np.float32)
+        if option_type == 'call':
+            out[..., 0] = ndtr(d1)
+            out[..., 2] = (-(S * sigma * pdf_d1) / (2 * sqrt_T) - discounted_K * ndtr(d2)) / 365
+        else:
+            out[..., 0] = ndtr(d1) - 1
+            out[..., 2] = (-(S * sigma * pdf_d1) / (2 * sqrt_T) + discounted_K * ndtr(-d2)) / 365
+        out[..., 1] = pdf_d1 / (S * vol_sqrt_T)
+        out[..., 3] = S * sqrt_T * pdf_d1 / 100
+        return out
+        
     def get_atm_strike(self, price):
         """Returns the nearest integer strike price."""
         return round(price)
@@ -73,5 +138,5 @@ class OptionsPricing:
         # 15m in trading day (6.5 hours) = 26 periods.
         # 252 trading days.
         # Total periods = 26 * 252 = 6552
-        vol = log_returns.rolling(window=window).std() * np.sqrt(6552)
-        return vol.iloc[-1] if not np.isnan(vol.iloc[-1]) else 0.20 # Default to 20% if nan
+        vol = rolling_std(log_returns, window) * np.sqrt(6552)
+        return vol.iloc[-1] if len(vol) and not np.isnan(vol.iloc[-1]) else 0.20 # Default to 20% if nan (or no history)
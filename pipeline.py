@@ -0,0 +1,265 @@
+import hashlib
+import inspect
+import multiprocessing
+import os
+import pickle
+import shutil
+import sys
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import profiling
+
+CACHE_DIR = '.pipeline_cache'
+
+class Stage:
+    """
+    One pipeline step. fn receives the results of `deps` positionally (in
+    order) followed by `params` as keywords. Stages that declare `outputs`
+    (file names) also get `folder=` and must write those files there.
+    
+    code: extra modules whose source is part of the cache key (fn's own
+    source and the in-repo modules it uses always are, with their imports;
+    see stage_code). cache=False always runs the stage; its result is then
+    keyed by content, so unchanged data still hits downstream caches.
+    process=True runs fn in a worker process (for pyplot rendering, which is
+    not thread safe); fn and its inputs must be picklable.
+    """
+    def __init__(self, name, fn, deps=(), params=None, code=(), outputs=(), cache=True, process=False):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.code = tuple(code)
+        self.outputs = tuple(outputs)
+        self.cache = cache
+        self.process = process
+
+def _update(h, obj):
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr((list(obj.columns), [str(d) for d in obj.dtypes])).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(repr((obj.name, str(obj.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"{type(obj).__name__}:{len(obj)}".encode())
+        for item in obj:
+            _update(h, item)
+    elif isinstance(obj, dict):
+        h.update(f"dict:{len(obj)}".encode())
+        for k in sorted(obj, key=repr):
+            _update(h, k)
+            _update(h, obj[k])
+    elif obj is None or isinstance(obj, (str, int, float, bool)):
+        h.update(f"{type(obj).__name__}:{obj!r}".encode())
+    else:
+        h.update(pickle.dumps(obj))
+
+def fingerprint(obj):
+    """
+    Content hash (sha256 hex) of DataFrames, arrays, containers and plain values.
+    """
+    h = hashlib.sha256()
+    _update(h, obj)
+    return h.hexdigest()
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _repo_module(obj):
+    """
+    The in-repo module obj is (or was defined in); None for libraries and builtins.
+    """
+    module = obj if inspect.ismodule(obj) else sys.modules.get(getattr(obj, '__module__', None) or '')
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return None
+    path = os.path.abspath(path)
+    return module if path.startswith(REPO_DIR + os.sep) and 'site-packages' not in path else None
+
+def _code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const): # Nested functions, comprehensions
+            names |= _code_names(const)
+    return names
+
+def stage_code(stage):
+    """
+    What a stage's results depend on: its function plus the helpers from the
+    same module it calls, and every in-repo module they or stage.code reach,
+    following imports transitively (a change in, e.g., a module features
+    imports invalidates the features stage). Returns (functions, modules).
+    """
+    functions, pending, roots = [], [inspect.unwrap(stage.fn)], list(stage.code)
+    while pending:
+        fn = pending.pop()
+        if fn in functions:
+            continue
+        functions.append(fn)
+        for name in sorted(_code_names(fn.__code__)):
+            value = fn.__globals__.get(name)
+            if inspect.isfunction(value) and value.__module__ == fn.__module__:
+                pending.append(inspect.unwrap(value))
+                continue
+            module = _repo_module(value)
+            if module is not None and module.__name__ != fn.__module__:
+                roots.append(module)
+                
+    modules = {}
+    while roots:
+        module = roots.pop()
+        if module.__name__ in modules:
+            continue
+        modules[module.__name__] = module
+        for value in list(vars(module).values()):
+            dep = _repo_module(value)
+            if dep is not None and dep.__name__ not in modules:
+                roots.append(dep)
+    return functions, [modules[name] for name in sorted(modules)]
+
+def code_version(stage):
+    """
+    Hash of the source of everything stage_code finds.
+    """
+    functions, modules = stage_code(stage)
+    h = hashlib.sha256()
+    for fn in functions:
+        h.update(inspect.getsource(fn).encode())
+    for module in modules:
+        h.update(module.__name__.encode())
+        h.update(inspect.getsource(module).encode())
+    return h.hexdigest()
+
+def init_worker():
+    """
+    Process pool initializer: workers are headless (no GUI backend, plt.show() is a no-op).
+    """
+    os.environ['MPLBACKEND'] = 'Agg'
+    if 'matplotlib' in sys.modules: # Already imported while unpickling the job
+        sys.modules['matplotlib'].use('Agg')
+
+class Pipeline:
+    """
+    Runs stages as a DAG: a stage starts as soon as its dependencies are done,
+    so independent stages run in parallel. A stage whose key (stage name, code
+    version, params and dependency keys) matches a cached artifact is not run;
+    its result is loaded and its output files are copied into the run folder.
+    A failed stage skips everything downstream of it.
+    processes=False runs process stages inline (when the pipeline itself is
+    already running inside a worker process; use workers=1 then). pool: an
+    executor for process stages owned by the caller (e.g. a RenderService);
+    by default the pipeline starts and stops its own.
+    """
+    def __init__(self, stages, folder, cache_dir=CACHE_DIR, use_cache=True, workers=4, processes=True, pool=None):
+        names = set()
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in names]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on {missing}, which must be declared before it")
+            names.add(stage.name)
+        self.stages = stages
+        self.folder = folder
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.workers = workers
+        self.processes = processes
+        self.results = {}
+        self.keys = {}
+        self.status = {}
+        self.pool = pool
+        self._processes = None
+        self._lock = threading.Lock()
+        
+    def _process_pool(self):
+        if self.pool is not None:
+            return self.pool
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn'),
+                                                      initializer=init_worker)
+            return self._processes
+            
+    def _entry(self, stage, key):
+        return os.path.join(self.cache_dir, stage.name, key[:20])
+        
+    def _run_stage(self, stage, inputs, dep_keys):
+        code = code_version(stage)
+        key = fingerprint([stage.name, code, stage.params, dep_keys]) if stage.cache else None
+        
+        with profiling.span(stage.name) as record:
+            entry = self._entry(stage, key) if stage.cache else None
+            result_file = os.path.join(entry, 'result.pkl') if entry else None
+            if (self.use_cache and entry and os.path.exists(result_file)
+                    and all(os.path.exists(os.path.join(entry, f)) for f in stage.outputs)):
+                result = joblib.load(result_file)
+                for f in stage.outputs:
+                    shutil.copy2(os.path.join(entry, f), os.path.join(self.folder, f))
+                record['cached'] = True
+                print(f"♻️ Stage '{stage.name}' unchanged, reused cached result ({key[:10]})")
+                return result, key, 'cached'
+                
+            kwargs = dict(stage.params)
+            if stage.outputs:
+                kwargs['folder'] = self.folder
+            if stage.process and self.processes:
+                result = self._process_pool().submit(stage.fn, *inputs, **kwargs).result()
+            else:
+                result = stage.fn(*inputs, **kwargs)
+                
+            if not stage.cache:
+                return result, fingerprint([stage.name, code, result]), 'ran'
+                
+            # Only complete runs are cached (e.g. a chart that could not fetch data is retried next time)
+            if all(os.path.exists(os.path.join(self.folder, f)) for f in stage.outputs):
+                tmp = f"{entry}.tmp{os.getpid()}_{threading.get_ident()}"
+                os.makedirs(tmp, exist_ok=True)
+                joblib.dump(result, os.path.join(tmp, 'result.pkl'))
+                for f in stage.outputs:
+                    shutil.copy2(os.path.join(self.folder, f), os.path.join(tmp, f))
+                shutil.rmtree(entry, ignore_errors=True)
+                os.replace(tmp, entry)
+            return result, key, 'ran'
+            
+    def run(self):
+        """
+        Executes the DAG. Returns {stage name: 'ran' | 'cached' | 'failed' | 'skipped'}.
+        """
+        pending = list(self.stages)
+        running = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as threads:
+                while pending or running:
+                    # Stages are declared in dependency order, so one pass propagates skips
+                    for stage in list(pending):
+                        if any(self.status.get(d) in ('failed', 'skipped') for d in stage.deps):
+                            pending.remove(stage)
+                            self.status[stage.name] = 'skipped'
+                            print(f"⏭️ Stage '{stage.name}' skipped (upstream failure)")
+                        elif all(d in self.results for d in stage.deps):
+                            pending.remove(stage)
+                            future = threads.submit(self._run_stage, stage, [self.results[d] for d in stage.deps],
+                                                    [self.keys[d] for d in stage.deps])
+                            running[future] = stage
+                            
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage = running.pop(future)
+                        try:
+                            self.results[stage.name], self.keys[stage.name], self.status[stage.name] = future.result()
+                        except Exception as e:
+                            self.status[stage.name] = 'failed'
+                            print(f"⚠️ Stage '{stage.name}' failed: {e}")
+        finally:
+            if self._processes is not None:
+                self._processes.shutdown()
+                self._processes = None
+        return self.status
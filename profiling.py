@@ -0,0 +1,199 @@
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+class RunProfile:
+    """
+    Collected spans for one run. Disabled by default: span() and @profiled
+    then cost a flag check and nothing else. Nesting is tracked per thread so
+    stages running in parallel each get their own span tree (tracemalloc
+    peaks are process-wide and include the other threads' allocations).
+    """
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.cprofile_dir = None
+        self.spans = []
+        self.started = None
+        self.local = threading.local()
+        
+    @property
+    def depth(self):
+        return getattr(self.local, 'depth', 0)
+        
+    @depth.setter
+    def depth(self, value):
+        self.local.depth = value
+        
+    @property
+    def peaks(self):
+        if not hasattr(self.local, 'peaks'):
+            self.local.peaks = []
+        return self.local.peaks
+
+_profile = RunProfile()
+
+def enable(memory=True, cprofile_dir=None):
+    """
+    Starts recording spans. memory=True also traces Python allocations
+    (tracemalloc peak per span, adds overhead). cprofile_dir dumps a
+    cProfile .prof per top-level stage (view with snakeviz or flameprof).
+    """
+    _profile.enabled = True
+    _profile.memory = memory
+    _profile.cprofile_dir = cprofile_dir
+    _profile.spans = []
+    _profile.started = time.time()
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if cprofile_dir:
+        os.makedirs(cprofile_dir, exist_ok=True)
+
+def disable():
+    _profile.enabled = False
+    if _profile.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def is_enabled():
+    return _profile.enabled
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None where the
+    resource module is missing (Windows).
+    """
+    try:
+        import resource # Unix only
+    except ImportError:
+        return None
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+@contextmanager
+def span(name, rows=None):
+    """
+    Times a block: wall, CPU, peak RSS and (if enabled) tracemalloc peak.
+    Yields a dict; set record['rows'] inside the block to log row counts.
+    """
+    if not _profile.enabled:
+        yield {}
+        return
+        
+    record = {'name': name, 'depth': _profile.depth, 'rows': rows, 'thread': threading.current_thread().name}
+    _profile.spans.append(record)
+    _profile.depth += 1
+    
+    if _profile.memory:
+        # Fold the running peak into the parent before resetting for this span
+        if _profile.peaks:
+            _profile.peaks[-1] = max(_profile.peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        _profile.peaks.append(0)
+        
+    profiler = None
+    if _profile.cprofile_dir and record['depth'] == 0:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError: # Another stage's profiler is active in a parallel thread
+            profiler = None
+            
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall_s'] = round(time.perf_counter() - wall_start, 6)
+        record['cpu_s'] = round(time.process_time() - cpu_start, 6)
+        rss_peak = peak_rss_mb()
+        if rss_peak is not None:
+            record['rss_peak_mb'] = round(rss_peak, 2)
+        
+        if profiler:
+            profiler.disable()
+            path = os.path.join(_profile.cprofile_dir, f"{len(_profile.spans):02d}_{name.replace(' ', '_')}.prof")
+            profiler.dump_stats(path)
+            record['cprofile'] = path
+            
+        if _profile.memory:
+            peak = max(_profile.peaks.pop(), tracemalloc.get_traced_memory()[1])
+            record['traced_peak_mb'] = round(peak / 1e6, 2)
+            if _profile.peaks:
+                _profile.peaks[-1] = max(_profile.peaks[-1], peak)
+                
+        _profile.depth -= 1
+
+def _result_mb(result):
+    # Steady-state size of what a stage hands on (frames/arrays, also inside tuples)
+    if isinstance(result, (tuple, list)):
+        sizes = [_result_mb(r) for r in result]
+        sizes = [s for s in sizes if s is not None]
+        return round(sum(sizes), 2) if sizes else None
+    if hasattr(result, 'memory_usage'):
+        # Per column for a DataFrame, one int for a Series
+        usage = result.memory_usage(index=True)
+        return round((usage.sum() if hasattr(usage, 'sum') else usage) / 1e6, 2)
+    if hasattr(result, 'nbytes'):
+        return round(result.nbytes / 1e6, 2)
+    return None
+
+def profiled(name=None):
+    """
+    Decorator form of span(). Rows are taken from the first argument with a
+    shape; the size of a returned frame/array is logged as result_mb.
+    """
+    def decorator(fn):
+        label = name or fn.__qualname__
+        
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _profile.enabled:
+                return fn(*args, **kwargs)
+            rows = next((a.shape[0] for a in args if hasattr(a, 'shape') and len(a.shape)), None)
+            with span(label, rows=rows) as record:
+                result = fn(*args, **kwargs)
+                record['result_mb'] = _result_mb(result)
+                return result
+        return wrapper
+    return decorator
+
+def summary():
+    """
+    Prints the recorded spans as an indented table.
+    """
+    print("\n" + "=" * 88)
+    print(f"{'STAGE':<40}{'WALL s':>9}{'CPU s':>9}{'ROWS':>9}{'PEAK MB':>11}{'OUT MB':>10}")
+    print("=" * 88)
+    for s in _profile.spans:
+        label = ('  ' * s['depth'] + s['name'])[:39]
+        rows = '' if s.get('rows') is None else s['rows']
+        peak = s.get('traced_peak_mb', s.get('rss_peak_mb', 0))
+        out = '' if s.get('result_mb') is None else f"{s['result_mb']:.1f}"
+        print(f"{label:<40}{s.get('wall_s', 0):>9.3f}{s.get('cpu_s', 0):>9.3f}{rows:>9}{peak:>11.1f}{out:>10}")
+    print("=" * 88)
+
+def save(path, **meta):
+    """
+    Writes the run profile as JSON (spans in execution order plus run metadata).
+    """
+    data = {
+        'started': datetime.fromtimestamp(_profile.started).isoformat() if _profile.started else None,
+        'total_wall_s': round(time.time() - _profile.started, 3) if _profile.started else None,
+        'python': platform.python_version(),
+        'machine': platform.node(),
+        'memory_tracing': _profile.memory,
+        **meta,
+        'spans': _profile.spans
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    print(f"⏱️ Run profile saved to '{path}'")
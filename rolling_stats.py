@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+# Rows per block (at least 4 windows): cumulative sums restart, re-centered,
+# every block, so their magnitude stays bounded however long the series is
+BLOCK_ROWS = 1024
+# Relative precision of a window sum: smaller differences are rounding noise
+NOISE = 16 * np.finfo(np.float64).eps
+
+class RollingStats:
+    """
+    Trailing-window mean/var/std/zscore/cov/corr/beta for many columns,
+    windows and column pairs from one pass of cumulative sums, O(n) per
+    window whatever its length.
+    Each block of rows is centered on its own mean before the sums are
+    taken (variance and covariance are shift-invariant), which keeps the
+    sums small and `S2 - S1^2 / w` well conditioned where a plain cumsum
+    over prices would cancel catastrophically; the cumulative sums carry
+    their rounding error along (compensated, as in Kahan summation), so a
+    window sum is accurate to its own size rather than the running total.
+    Same conventions as pandas .rolling(w): NaN until w values are
+    available and wherever the window contains a NaN.
+    
+    X: (n,) or (n, k) array, Series or DataFrame.
+    pairs: (i, j) column-index pairs for cov/corr/beta (i regressed on j).
+    Results are arrays, or Series/DataFrames when X was a pandas object.
+    """
+    def __init__(self, X, windows, pairs=(), block=BLOCK_ROWS):
+        self.index = X.index if isinstance(X, (pd.Series, pd.DataFrame)) else None
+        self.columns = list(X.columns) if isinstance(X, pd.DataFrame) else None
+        X = np.asarray(X, dtype=np.float64)
+        self.squeeze = X.ndim == 1
+        # Explicit column count: reshape(0, -1) is ambiguous for empty input
+        self.X = np.ascontiguousarray(X.reshape(len(X), 1 if X.ndim == 1 else X.shape[1]))
+        self.windows = sorted({int(w) for w in np.atleast_1d(windows)})
+        self.pairs = [tuple(p) for p in pairs]
+        self._i = np.array([p[0] for p in self.pairs], dtype=np.intp)
+        self._j = np.array([p[1] for p in self.pairs], dtype=np.intp)
+        self._compute(max(block, 4 * self.windows[-1]))
+        
+    def _compute(self, block):
+        # One pass: per block of rows, cumulative sums of centered x, x^2, x*y
+        # (pairs) and NaN counts; any window is then two slices of these
+        X = self.X
+        n, k = X.shape
+        W = self.windows[-1]
+        self._shift = np.empty((n, k))
+        self._blocks = []
+        self._cached = self._cached_ss = (None, None)
+        
+        for start in range(0, n, block):
+            end = min(start + block, n)
+            # The block plus the W-1 rows its first windows reach back into
+            first = max(0, start - W + 1)
+            seg = X[first:end]
+            nan = np.isnan(seg)
+            count = (~nan).sum(axis=0)
+            shift = np.where(count > 0, np.where(nan, 0.0, seg).sum(axis=0) / np.maximum(count, 1), 0.0)
+            centered = np.where(nan, 0.0, seg - shift)
+            self._shift[start:end] = shift
+            
+            cnan = np.zeros((len(seg) + 1, k), dtype=np.int64)
+            np.cumsum(nan, axis=0, out=cnan[1:])
+            self._blocks.append((start, end, first, _CompensatedSum(centered), _CompensatedSum(centered * centered),
+                                 _CompensatedSum(centered[:, self._i] * centered[:, self._j]), cnan))
+                                 
+    def _sums(self, w):
+        """
+        Window sums (S1, S2, Sxy) of the centered data and the rows to blank
+        (warm-up or a NaN in the window). The last window's sums are cached,
+        so asking for several statistics of one window sums once.
+        """
+        if w not in self.windows:
+            raise KeyError(f"Window {w} was not computed (windows: {self.windows})")
+        if self._cached[0] == w:
+            return self._cached[1]
+        n, k = self.X.shape
+        s1, s2 = np.zeros((n, k)), np.zeros((n, k))
+        sxy = np.zeros((n, len(self.pairs)))
+        bad = np.ones((n, k), dtype=bool)
+        for start, end, first, c1, c2, cxy, cnan in self._blocks:
+            # Leading zero row: the window ending at segment row r sums c[r+1] - c[r+1-w]
+            a = max(start - first, w - 1) + 1
+            hi, lo = slice(a, end - first + 1), slice(a - w, end - first + 1 - w)
+            rows = slice(first + a - 1, end)
+            s1[rows] = c1.window(hi, lo)
+            s2[rows] = c2.window(hi, lo)
+            sxy[rows] = cxy.window(hi, lo)
+            bad[rows] = cnan[hi] - cnan[lo] > 0
+        self._cached = (w, (s1, s2, sxy, bad))
+        return self._cached[1]
+        
+    def _var(self, w, ddof=1):
+        s1, s2, _, _ = self._sums(w)
+        if self._cached_ss[0] != w:
+            ss = s2 - s1 * s1 / w
+            # Constant windows come out exactly 0 rather than as rounding noise
+            self._cached_ss = (w, np.where(ss > NOISE * s2, ss, 0.0))
+        return self._cached_ss[1] / (w - ddof)
+        
+    def _cov(self, w):
+        s1, _, sxy, _ = self._sums(w)
+        # Columns are centered on different shifts: cov is shift-invariant
+        return (sxy - s1[:, self._i] * s1[:, self._j] / w) / (w - 1)
+        
+    def _result(self, values, bad, pairs=False):
+        values = np.where(bad, np.nan, values)
+        if pairs:
+            labels = [f"{self.columns[i]}/{self.columns[j]}" for i, j in self.pairs] if self.columns else None
+        else:
+            labels = self.columns
+        if (self.squeeze and not pairs) or (pairs and len(self.pairs) == 1):
+            values = values[:, 0]
+            return pd.Series(values, index=self.index) if self.index is not None else values
+        return pd.DataFrame(values, index=self.index, columns=labels) if self.index is not None else values
+        
+    def _pair_bad(self, w):
+        bad = self._sums(w)[3]
+        return bad[:, self._i] | bad[:, self._j]
+        
+    def mean(self, w):
+        s1, _, _, bad = self._sums(w)
+        return self._result(self._shift + s1 / w, bad)
+        
+    def var(self, w, ddof=1):
+        return self._result(self._var(w, ddof), self._sums(w)[3])
+        
+    def std(self, w, ddof=1):
+        return self._result(np.sqrt(self._var(w, ddof)), self._sums(w)[3])
+        
+    def zscore(self, w):
+        """
+        (x - rolling mean) / rolling std, the window including the current row.
+        """
+        s1, _, _, bad = self._sums(w)
+        std = np.sqrt(self._var(w))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Relative to the block shift: x - mean = (x - shift) - S1 / w
+            z = (self.X - self._shift - s1 / w) / std
+        return self._result(z, bad | ~(std > 0))
+        
+    def cov(self, w):
+        return self._result(self._cov(w), self._pair_bad(w), pairs=True)
+        
+    def corr(self, w):
+        var = self._var(w)
+        denom = np.sqrt(var[:, self._i] * var[:, self._j])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.clip(self._cov(w) / denom, -1.0, 1.0)
+        return self._result(corr, self._pair_bad(w) | ~(denom > 0), pairs=True)
+        
+    def beta(self, w):
+        """
+        Slope of column i on column j for each pair (i, j): cov / var(j).
+        """
+        var = self._var(w)[:, self._j]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beta = self._cov(w) / var
+        return self._result(beta, self._pair_bad(w) | ~(var > 0), pairs=True)
+        
+class _CompensatedSum:
+    """
+    Running sums c (leading zero row) plus the running total of the rounding
+    error of each addition (exact TwoSum terms, recovered after the fact
+    because cumsum adds sequentially), so c[b] - c[a] + err[b] - err[a] is the
+    window sum to within rounding of the window sum itself.
+    """
+    def __init__(self, a):
+        c = np.zeros((len(a) + 1,) + a.shape[1:], dtype=np.float64)
+        np.cumsum(a, axis=0, out=c[1:])
+        prev, total = c[:-1], c[1:]
+        step = total - prev
+        err = np.zeros_like(c)
+        np.cumsum((prev - (total - step)) + (a - step), axis=0, out=err[1:])
+        self.c, self.err = c, err
+        
+    def window(self, hi, lo):
+        return (self.c[hi] - self.c[lo]) + (self.err[hi] - self.err[lo])
+
+def rolling_std(x, window):
+    """
+    Shortcut for one series and one window (pandas .rolling(window).std()).
+    """
+    return RollingStats(x, window).std(window)
@@ -0,0 +1,225 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import uuid
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from pipeline import init_worker
+
+# tmpfs on Linux: the files live in RAM and every process maps the same pages
+SHARED_ROOT = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+PREFIX = 'ptd_dataset_'
+
+class DatasetHandle:
+    """
+    Small picklable description of a published dataset (folder + layout).
+    Send this to workers instead of the frame.
+    """
+    def __init__(self, path, rows, blocks, target, target_dtype, index_tz, index_name):
+        self.path = path
+        self.rows = rows
+        self.blocks = blocks # [(dtype str, [columns])]
+        self.target = target
+        self.target_dtype = target_dtype
+        self.index_tz = index_tz
+        self.index_name = index_name
+        
+    @property
+    def columns(self):
+        return [c for _, cols in self.blocks for c in cols]
+        
+    def to_json(self):
+        return dict(vars(self), pid=os.getpid())
+
+class SharedDataset:
+    """
+    Zero-copy view of a published feature frame. Columns are grouped by
+    dtype into one column-major block each (a column is contiguous, a row
+    range of a column is a slice), the target and the int64 ns timestamps
+    are separate arrays. All arrays are read-only np.memmap views, so N
+    workers cost one copy of the data in total.
+    """
+    def __init__(self, handle, owner=False):
+        self.handle = handle
+        self.owner = owner
+        self.blocks = {}
+        for dtype, cols in handle.blocks:
+            data = np.memmap(os.path.join(handle.path, f"X_{dtype}.bin"), dtype=dtype, mode='r',
+                             shape=(len(cols), handle.rows))
+            self.blocks[dtype] = (cols, data)
+        self._target = self._array('y.bin', handle.target_dtype) if handle.target else None
+        self._index = self._array('index.bin', np.int64)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, handle.path, True) if owner else None
+        
+    def _array(self, name, dtype):
+        return np.memmap(os.path.join(self.handle.path, name), dtype=dtype, mode='r', shape=(self.handle.rows,))
+        
+    @property
+    def columns(self):
+        return self.handle.columns
+        
+    @property
+    def index(self):
+        index = pd.DatetimeIndex(np.asarray(self._index).view('datetime64[ns]'), name=self.handle.index_name)
+        return index.tz_localize('UTC').tz_convert(self.handle.index_tz) if self.handle.index_tz else index
+        
+    @property
+    def y(self):
+        return self._target
+        
+    def column(self, name):
+        for cols, data in self.blocks.values():
+            if name in cols:
+                return data[cols.index(name)]
+        raise KeyError(name)
+        
+    def matrix(self, columns=None, rows=slice(None)):
+        """
+        Rows x columns array of one dtype. A view when the columns form a
+        block (default: all columns of a single-dtype dataset), else a copy
+        of just the requested columns.
+        """
+        if columns is None and len(self.blocks) == 1:
+            return next(iter(self.blocks.values()))[1][:, rows].T
+        columns = columns or self.columns
+        return np.column_stack([self.column(c)[rows] for c in columns])
+        
+    def frame(self, columns=None, rows=slice(None), target=True):
+        """
+        DataFrame over the shared arrays (no copy of the column data).
+        rows: a slice (e.g. a CV fold or walk-forward window).
+        """
+        columns = columns or self.columns
+        data = {c: self.column(c)[rows] for c in columns}
+        if target and self._target is not None:
+            data[self.handle.target] = self._target[rows]
+        return pd.DataFrame(data, index=self.index[rows], copy=False)
+        
+    def close(self):
+        """
+        Drops this process's mappings (the files stay for other processes).
+        """
+        self.blocks = {}
+        self._target = self._index = None
+        
+    def unlink(self):
+        """
+        Owner only: removes the shared files. Workers that are still attached
+        keep their mappings until they close.
+        """
+        self.close()
+        if self._finalizer is not None:
+            self._finalizer()
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+def publish(df, target='Target', compact=False, root=SHARED_ROOT):
+    """
+    Writes the frame once into shared memory and returns the owning
+    SharedDataset (its .handle is what workers attach to). Columns keep their
+    dtype unless compact=True, which stores float64 features as float32.
+    The files are removed by unlink(), on leaving the `with` block, or when
+    the owner is garbage collected / exits.
+    """
+    if df.empty:
+        raise ValueError("Cannot publish an empty frame")
+    path = os.path.join(root, f"{PREFIX}{os.getpid()}_{uuid.uuid4().hex[:8]}")
+    os.makedirs(path)
+    features = [c for c in df.columns if c != target]
+    groups = {}
+    for c in features:
+        dtype = np.dtype(df[c].dtype)
+        if dtype.kind not in 'fiub':
+            raise TypeError(f"Column '{c}' is {dtype}; only numeric columns can be shared")
+        if compact and dtype == np.float64:
+            dtype = np.dtype(np.float32)
+        groups.setdefault(dtype.str.lstrip('<>|='), []).append(c)
+        
+    blocks = []
+    for dtype, cols in groups.items():
+        # Column by column: never materializes a converted copy of the whole frame
+        out = np.memmap(os.path.join(path, f"X_{dtype}.bin"), dtype=dtype, mode='w+', shape=(len(cols), len(df)))
+        for i, c in enumerate(cols):
+            out[i] = df[c].to_numpy(dtype=dtype)
+        out.flush()
+        del out
+        blocks.append((dtype, cols))
+        
+    index = pd.DatetimeIndex(df.index)
+    index_tz = str(index.tz) if index.tz is not None else None
+    if index_tz:
+        index = index.tz_convert('UTC').tz_localize(None)
+    index.as_unit('ns').asi8.astype(np.int64).tofile(os.path.join(path, 'index.bin'))
+    target_dtype = None
+    if target in df.columns:
+        y = df[target].to_numpy()
+        target_dtype = np.dtype(np.int8 if compact and y.dtype.kind in 'iu' else y.dtype).str.lstrip('<>|=')
+        y.astype(target_dtype).tofile(os.path.join(path, 'y.bin'))
+        
+    handle = DatasetHandle(path, len(df), blocks, target if target_dtype else None, target_dtype, index_tz, df.index.name)
+    with open(os.path.join(path, 'spec.json'), 'w') as f:
+        json.dump(handle.to_json(), f)
+    return SharedDataset(handle, owner=True)
+
+def attach(handle):
+    """
+    Maps a published dataset into this process (read-only, zero-copy).
+    """
+    if not os.path.exists(os.path.join(handle.path, 'spec.json')):
+        raise FileNotFoundError(f"Shared dataset {handle.path} is gone (owner unlinked it or exited)")
+    return SharedDataset(handle)
+
+def cleanup_stale(root=SHARED_ROOT):
+    """
+    Removes datasets whose owning process no longer exists (e.g. killed
+    before it could unlink). Returns the number removed.
+    """
+    removed = 0
+    for name in os.listdir(root):
+        if not name.startswith(PREFIX):
+            continue
+        path = os.path.join(root, name)
+        try:
+            with open(os.path.join(path, 'spec.json')) as f:
+                pid = json.load(f)['pid']
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        except (OSError, ValueError, KeyError):
+            continue
+    return removed
+
+# Dataset attached by this worker process (set by the pool initializer)
+_worker_dataset = None
+
+def _init_dataset_worker(handle):
+    global _worker_dataset
+    init_worker()
+    _worker_dataset = attach(handle)
+
+def worker_dataset():
+    """
+    The shared dataset inside a worker started by dataset_pool().
+    """
+    return _worker_dataset
+
+def dataset_pool(dataset, workers):
+    """
+    Spawned process pool whose workers attach the dataset once at start-up;
+    tasks call worker_dataset() instead of receiving the frame.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_dataset_worker, initargs=(dataset.handle,))
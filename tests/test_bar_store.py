@@ -0,0 +1,43 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bar_store import OHLCV, BarAggregator, BarStore, ingest_csv
+
+def _write_1m_csv(path, start='2024-03-04 13:00', minutes=480):
+    # One day of 1m bars from 8:00 ET: an hour of pre-market, then the session
+    index = pd.date_range(start, periods=minutes, freq='1min')
+    close = 100 + np.cumsum(np.sin(np.arange(minutes) / 7.0))
+    df = pd.DataFrame({'Open': close - 0.05, 'High': close + 0.1, 'Low': close - 0.1, 'Close': close,
+                       'Volume': np.arange(minutes, dtype=np.float64) + 1}, index=index.rename('Datetime'))
+    df.index = df.index.strftime('%Y-%m-%d %H:%M:%S')
+    df.to_csv(path)
+
+def test_feed_without_completed_bucket_is_empty_utc_frame():
+    aggregator = BarAggregator('1h')
+    times = pd.date_range('2024-03-04 14:30', periods=10, freq='1min', tz='UTC').asi8
+    out = aggregator.feed(times, np.ones((10, 5)))
+    assert out.empty
+    assert list(out.columns) == OHLCV
+    assert isinstance(out.index, pd.DatetimeIndex) and str(out.index.tz) == 'UTC'
+
+def test_append_empty_frame(tmp_path):
+    store = BarStore(str(tmp_path))
+    assert store.append('SPY', '1h', BarAggregator('1h').feed(np.empty(0, np.int64), np.empty((0, 5)))) == 0
+    assert store.append('SPY', '1h', pd.DataFrame(columns=OHLCV)) == 0
+
+def test_ingest_chunks_smaller_than_one_interval(tmp_path):
+    path = str(tmp_path / 'SPY_1m.csv')
+    _write_1m_csv(path)
+    small = BarStore(str(tmp_path / 'small'))
+    whole = BarStore(str(tmp_path / 'whole'))
+    # 37-row chunks: the first ones are all pre-market and most complete no 1h bucket
+    stats = ingest_csv(small, 'SPY', path, ('15m', '1h'), chunk_rows=37, progress=False)
+    ingest_csv(whole, 'SPY', path, ('15m', '1h'), chunk_rows=100_000, progress=False)
+
+    assert stats['written'] == {'15m': 26, '1h': 7}
+    for interval in ('15m', '1h'):
+        pd.testing.assert_frame_equal(small.read('SPY', interval), whole.read('SPY', interval))
@@ -0,0 +1,67 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import checkpoint
+from backtest import Backtester
+
+class _SignalModel:
+    # Trades the sign of its one feature, so the test needs no training
+    def predict(self, X):
+        return np.sign(X['Signal'].to_numpy()).astype(int)
+
+def _bars(days=15, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.DatetimeIndex([t for day in pd.bdate_range('2024-03-04', periods=days, tz='UTC')
+                              for t in pd.date_range(day + pd.Timedelta('13:30:00'), periods=26, freq='15min')])
+    close = 500 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    signal = rng.choice([-1.0, 0.0, 1.0], len(index), p=[0.3, 0.4, 0.3])
+    return pd.DataFrame({'SPY_Close': close, 'Signal': signal}, index=index)
+
+class _Interrupted(Backtester):
+    # Stops the run (as Ctrl+C would) on the n-th exit check
+    stop_after = 0
+
+    def check_exit(self, bar, timestamp):
+        self.stop_after -= 1
+        if self.stop_after == 0:
+            raise KeyboardInterrupt
+        super().check_exit(bar, timestamp)
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'state.npz')
+    assert checkpoint.read_snapshot(path) is None
+    checkpoint.write_snapshot(path, {'rows': 3}, cursor=np.int64(7), x=np.arange(3.0))
+    checkpoint.write_snapshot(path, {'rows': 4}, cursor=np.int64(8), x=np.arange(4.0))
+    meta, arrays = checkpoint.read_snapshot(path)
+    assert meta == {'rows': 4} and int(arrays['cursor']) == 8
+    np.testing.assert_array_equal(arrays['x'], np.arange(4.0))
+    assert os.listdir(tmp_path) == ['state.npz']
+
+@pytest.mark.parametrize('stop_after', [1, 40, 150])
+def test_resumed_backtest_matches_uninterrupted_run(tmp_path, stop_after):
+    df = _bars()
+    model = _SignalModel()
+    reference = Backtester(df, model, ['Signal'], output_folder=str(tmp_path))
+    reference.run(report=False)
+    assert len(reference.journal) > 20
+
+    path = str(tmp_path / 'backtest_checkpoint.npz')
+    interrupted = _Interrupted(df, model, ['Signal'], output_folder=str(tmp_path), checkpoint=path,
+                               checkpoint_seconds=0)
+    interrupted.stop_after = stop_after
+    with pytest.raises(KeyboardInterrupt):
+        interrupted.run(report=False)
+    # Resumed from the bar it stopped at, not started over
+    meta, state = checkpoint.read_snapshot(path)
+    assert int(state['cursor']) > 20
+
+    resumed = Backtester(df, model, ['Signal'], output_folder=str(tmp_path), checkpoint=path, resume=True)
+    resumed.run(report=False)
+    assert resumed.journal == reference.journal
+    assert resumed.balance == reference.balance
+    assert not os.path.exists(path) and not os.path.exists(f"{path}.journal")
@@ -0,0 +1,80 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import labels
+
+def _close(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 400 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+
+def _scalar_direction(r, threshold):
+    # NaN (past the end of the data) compares False: 0
+    return 1 if r > threshold else -1 if r < -threshold else 0
+
+def _scalar_barrier(close, t, h, barrier):
+    for k in range(t + 1, min(t + h, len(close) - 1) + 1):
+        r = np.log(close[k] / close[t])
+        if r >= barrier:
+            return 1
+        if r <= -barrier:
+            return -1
+    return 0
+
+def test_threshold_labels_match_scalar_baseline():
+    close = _close()
+    expected = [_scalar_direction(np.log(close[t + 4] / close[t]) if t + 4 < len(close) else np.nan, 0.0008)
+                for t in range(len(close))]
+    got = labels.threshold_labels(close, 4, 0.0008)
+    assert got.dtype == np.int8
+    np.testing.assert_array_equal(got, expected)
+    assert (got[-4:] == 0).all()
+
+def test_barrier_labels_first_touch():
+    paths = np.array([[0.001, 0.003, -0.003],   # up first
+                      [-0.0025, 0.003, 0.0],    # down first
+                      [0.001, -0.001, np.nan],  # neither (vertical barrier, NaN past the end)
+                      [0.002, 0.0, 0.0]])       # touching the barrier counts
+    np.testing.assert_array_equal(labels.barrier_labels(paths, 0.002), [1, -1, 0, 1])
+    # Per-bar barriers
+    np.testing.assert_array_equal(labels.barrier_labels(paths, [0.004, 0.002, 0.0005, 0.01]), [0, -1, 1, 0])
+
+def test_label_grid_matches_scalar_definitions():
+    close = _close(600)
+    grid, definitions = labels.label_grid(close)
+    assert grid.dtype == np.int8 and grid.shape == (len(definitions), len(close))
+    assert len({d['name'] for d in definitions}) == len(definitions)
+    vol = pd.Series(np.log(close)).diff().rolling(20).std().to_numpy()
+    for row, d in zip(grid, definitions):
+        h = d['lookahead']
+        forward = [np.log(close[t + h] / close[t]) if t + h < len(close) else np.nan for t in range(len(close))]
+        if d['kind'] == 'fixed':
+            expected = [_scalar_direction(r, d['threshold']) for r in forward]
+        elif d['kind'] == 'vol':
+            expected = [_scalar_direction(r, d['multiplier'] * v * np.sqrt(h)) for r, v in zip(forward, vol)]
+        else:
+            expected = [_scalar_barrier(close, t, h, d['barrier']) for t in range(len(close))]
+        np.testing.assert_array_equal(row, expected, err_msg=d['name'])
+
+def test_default_target_is_in_the_grid():
+    close = _close()
+    grid, definitions = labels.label_grid(close)
+    row = [d['name'] for d in definitions].index('fixed_h4_t0.0008')
+    np.testing.assert_array_equal(grid[row], labels.threshold_labels(close, 4, 0.0008))
+
+@pytest.mark.parametrize('tz', ['UTC', 'America/New_York', None])
+def test_save_load_round_trip(tmp_path, tz):
+    close = _close(300)
+    index = pd.date_range('2024-03-04 13:30', periods=len(close), freq='15min', tz=tz)
+    grid, definitions = labels.label_grid(close)
+    path = str(tmp_path / labels.LABEL_GRID_FILE)
+    labels.save_label_grid(path, grid, definitions, index)
+    loaded, loaded_definitions, loaded_index = labels.load_label_grid(path)
+    np.testing.assert_array_equal(loaded, grid)
+    assert loaded.dtype == np.int8
+    assert loaded_definitions == definitions
+    pd.testing.assert_index_equal(loaded_index, index.as_unit('ns'), check_names=False)
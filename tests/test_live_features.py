@@ -0,0 +1,58 @@
+import os
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import features
+from live_features import LiveFeatures
+
+def _bars(index, seed):
+    rng = np.random.default_rng(seed)
+    close = 400 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.001, (2, len(index)))) * close
+    return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + spread[0],
+                         'Low': np.minimum(open_, close) - spread[1], 'Close': close,
+                         'Volume': rng.integers(10**5, 10**6, len(index)).astype(np.float64)}, index=index)
+
+@pytest.fixture(scope='module')
+def pair():
+    # 40 sessions of 15m bars (13:30-19:45 UTC)
+    index = pd.DatetimeIndex([t for day in pd.bdate_range('2024-03-04', periods=40, tz='UTC')
+                              for t in pd.date_range(day + pd.Timedelta('13:30:00'), periods=26, freq='15min')],
+                             name='Datetime')
+    main, ref = _bars(index, 1), _bars(index, 2)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        full = features.prepare_pair_features(main, ref, 'SPY', 'IWM', ladder=True)
+    cols = [c for c in full.columns if c != 'Target' and
+            not any(c == f'{t}_{p}' for t in ('SPY', 'IWM') for p in features.PRICE_COLUMNS)]
+    return main, ref, cols
+
+def test_update_matches_last_row_of_batch_features(pair):
+    main, ref, cols = pair
+    live = LiveFeatures('SPY', 'IWM', cols)
+    rows = {ts: live.update(ts, main.loc[ts], ref.loc[ts]) for ts in main.index}
+    # Every few bars: the batch features of the bars fed so far, last row
+    for end in range(800, len(main) + 1, 47):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            batch = features.prepare_pair_features(main.iloc[:end], ref.iloc[:end], 'SPY', 'IWM', feature_cols=cols)
+        ts = main.index[end - 1]
+        assert batch.index[-1] == ts
+        expected = batch.loc[ts, cols].astype(np.float64)
+        got = pd.Series(rows[ts])[cols].astype(np.float64)
+        # Bollinger columns: ta's rolling std versus one over the window (last digits)
+        pd.testing.assert_series_equal(got, expected, check_names=False, rtol=1e-5, atol=1e-9)
+
+def test_warming_up_features_are_nan(pair):
+    main, ref, cols = pair
+    live = LiveFeatures('SPY', 'IWM', cols)
+    ts = main.index[0]
+    row = live.update(ts, main.loc[ts], ref.loc[ts])
+    assert list(row) == cols
+    assert np.isnan(row['Spread_Z']) and np.isnan(row['Corr_SPY_IWM']) and np.isnan(row['SPY_EMA_50'])
@@ -0,0 +1,70 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import build_model
+from model_store import MANIFEST_FILE, ArrayModel, ModelStore, load_session_model, model_id
+
+def _data(n=1500, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 6)), columns=[f'f{i}' for i in range(6)]).astype(np.float32)
+    X.iloc[rng.choice(n, 30, replace=False), 2] = np.nan
+    score = X['f0'] + 0.5 * X['f1'].fillna(0) - 0.3 * X['f3'] + rng.normal(0, 0.5, n)
+    y = np.where(score > 0.6, 1, np.where(score < -0.6, -1, 0))
+    return X, y
+
+def _fit(model_type, X, y):
+    model = build_model(model_type)
+    if model_type == 'forest':
+        model.set_params(n_estimators=15, n_jobs=1)
+    else:
+        model.max_iter = 20
+    return model.fit(X, y)
+
+@pytest.mark.parametrize('model_type', ['forest', 'hgb'])
+def test_identical_models_are_stored_once(tmp_path, model_type):
+    X, y = _data()
+    first, second = _fit(model_type, X, y), _fit(model_type, X, y)
+    store = ModelStore(str(tmp_path / 'model_store'))
+    sessions = [tmp_path / 'SPY' / '0930_01_02', tmp_path / 'SPY' / '1030_01_02']
+    for folder in sessions:
+        os.makedirs(folder)
+
+    digest, new = store.save_session(first, str(sessions[0]))
+    assert new
+    assert store.save_session(second, str(sessions[1])) == (digest, False)
+    entries = [d for d in os.listdir(store.root) if os.path.exists(os.path.join(store.root, d, MANIFEST_FILE))]
+    assert entries == [digest[:16]]
+    assert store.digests() == ([digest], [])
+    assert model_id(first) == model_id(second) == digest
+    assert {load_session_model(str(folder)).manifest['digest'] for folder in sessions} == {digest}
+
+@pytest.mark.parametrize('model_type', ['forest', 'hgb'])
+@pytest.mark.parametrize('mmap', [True, False])
+def test_array_model_predicts_like_the_estimator(tmp_path, model_type, mmap):
+    X, y = _data()
+    model = _fit(model_type, X.iloc[:1000], y[:1000])
+    store = ModelStore(str(tmp_path))
+    digest, _ = store.put(model)
+    loaded = store.open(digest, mmap=mmap)
+    assert isinstance(loaded, ArrayModel) and model_id(loaded) == digest
+
+    test = X.iloc[1000:]
+    np.testing.assert_allclose(loaded.predict_proba(test), model.predict_proba(test), rtol=1e-9, atol=1e-12)
+    np.testing.assert_array_equal(loaded.predict(test), model.predict(test))
+    np.testing.assert_array_equal(loaded.classes_, model.classes_)
+    assert list(loaded.feature_names_in_) == list(model.feature_names_in_)
+
+def test_archived_entry_opens_like_the_original(tmp_path):
+    X, y = _data()
+    model = _fit('forest', X, y)
+    store = ModelStore(str(tmp_path))
+    digest, _ = store.put(model)
+    expected = store.open(digest).predict_proba(X)
+    assert store.archive(digest) > 0
+    assert store.digests() == ([], [digest])
+    np.testing.assert_array_equal(store.open(digest).predict_proba(X), expected)
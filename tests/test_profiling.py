@@ -0,0 +1,40 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiling
+
+@pytest.fixture
+def recording():
+    profiling.enable(memory=False)
+    yield
+    profiling.disable()
+
+@pytest.mark.parametrize('make', [
+    lambda n: pd.Series(np.arange(n, dtype=np.float64)),
+    lambda n: pd.DataFrame({'a': np.arange(n, dtype=np.float64), 'b': np.ones(n)}),
+    lambda n: (pd.Series(np.ones(n)), np.ones(n)),
+    lambda n: np.ones(n)
+])
+def test_profiled_records_result_size(recording, make):
+    @profiling.profiled('make')
+    def build(n):
+        return make(n)
+
+    result = build(100_000)
+    span = profiling._profile.spans[-1]
+    assert span['name'] == 'make'
+    assert span['result_mb'] > 0
+    assert isinstance(result, type(make(1)))
+
+def test_profiled_ignores_other_results(recording):
+    @profiling.profiled()
+    def scalar():
+        return 3
+
+    assert scalar() == 3
+    assert profiling._profile.spans[-1]['result_mb'] is None
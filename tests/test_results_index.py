@@ -0,0 +1,47 @@
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utility import results_index
+from utility.results_index import ResultsIndex
+
+def _journal(folder, exits):
+    os.makedirs(folder, exist_ok=True)
+    exits = pd.to_datetime(exits, utc=True)
+    pd.DataFrame({'EntryTime': exits - pd.Timedelta(minutes=30), 'ExitTime': exits, 'Type': 'call', 'Strike': 500,
+                  'PnL%': 10.0, 'PnL': 100.0, 'Balance': 1000 + 100.0 * (1 + pd.RangeIndex(len(exits)))}
+                 ).to_csv(os.path.join(folder, 'trade_journal.csv'), index=False)
+
+def test_session_year_comes_from_the_trades(tmp_path):
+    # Files written now (a fresh clone): the year still follows the journal
+    _journal(tmp_path / 'SPY' / '1230_11_26', ['2024-11-20 15:00', '2024-11-25 19:00'])
+    _journal(tmp_path / 'SPY' / '0930_01_02', ['2024-12-30 15:00', '2024-12-31 19:00'])
+    index = ResultsIndex(str(tmp_path))
+    assert index.scan() == (2, 0)
+    started = dict(zip(index.runs['session'].astype(str), index.runs['started']))
+    assert started['SPY/1230_11_26'] == pd.Timestamp('2024-11-26 12:30')
+    assert started['SPY/0930_01_02'] == pd.Timestamp('2025-01-02 09:30')
+    assert index.latest('SPY').endswith('0930_01_02')
+
+def test_session_time_never_after_mtime():
+    mtime = pd.Timestamp('2025-03-01').timestamp()
+    assert results_index._session_time('1200_06_01', mtime) == pd.Timestamp('2024-06-01 12:00')
+
+def test_unreadable_journal_is_not_parsed_again(tmp_path, monkeypatch):
+    folder = tmp_path / 'SPY' / '1230_11_26'
+    os.makedirs(folder)
+    (folder / 'trade_journal.csv').write_text('EntryTime,ExitTime\n')
+    assert ResultsIndex(str(tmp_path)).scan() == (0, 0)
+
+    reads = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, 'read_csv', lambda *a, **k: reads.append(a) or read_csv(*a, **k))
+    index = ResultsIndex(str(tmp_path))
+    assert index.scan() == (0, 0)
+    assert reads == [] and index.runs.empty
+
+    monkeypatch.undo()
+    _journal(folder, ['2024-11-25 19:00'])
+    assert index.scan() == (1, 0)
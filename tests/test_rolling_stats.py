@@ -0,0 +1,68 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rolling_stats import RollingStats, rolling_std
+
+def _frame(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    # Price-like levels (large mean, small variance) plus scattered NaNs
+    a = 400 + np.cumsum(rng.normal(0, 0.5, n))
+    b = 0.5 * a + rng.normal(0, 1, n)
+    c = rng.normal(0, 1e-3, n)
+    df = pd.DataFrame({'a': a, 'b': b, 'c': c})
+    for col in df:
+        df.loc[rng.choice(n, 15, replace=False), col] = np.nan
+    return df
+
+@pytest.mark.parametrize('w', [2, 20, 50, 300])
+def test_matches_pandas_rolling(w):
+    df = _frame()
+    stats = RollingStats(df, windows=[w], pairs=[(0, 1), (1, 2)], block=256)
+    pd.testing.assert_frame_equal(stats.mean(w), df.rolling(w).mean(), rtol=1e-9)
+    # Second moments against pandas on centered data: its online updates lose
+    # digits on raw price levels (all of these are shift-invariant)
+    centered = df - df.mean()
+    rolling = centered.rolling(w)
+    pd.testing.assert_frame_equal(stats.std(w), rolling.std(), rtol=1e-7)
+    pd.testing.assert_frame_equal(stats.var(w, ddof=0), rolling.var(ddof=0), rtol=1e-7)
+    z = (centered - rolling.mean()) / rolling.std()
+    pd.testing.assert_frame_equal(stats.zscore(w), z, rtol=1e-6, atol=1e-9)
+    corr = stats.corr(w)
+    pd.testing.assert_series_equal(corr['a/b'], centered['a'].rolling(w).corr(centered['b']), check_names=False,
+                                   atol=1e-8)
+    pd.testing.assert_series_equal(stats.cov(w)['b/c'], centered['b'].rolling(w).cov(centered['c']),
+                                   check_names=False, rtol=1e-7, atol=1e-12)
+
+def test_series_and_array_inputs():
+    s = _frame()['a']
+    pd.testing.assert_series_equal(rolling_std(s, 20), (s - s.mean()).rolling(20).std(), check_names=False, rtol=1e-7)
+    out = RollingStats(s.to_numpy(), 20).mean(20)
+    assert isinstance(out, np.ndarray) and out.shape == (len(s),)
+    np.testing.assert_allclose(out, s.rolling(20).mean().to_numpy(), rtol=1e-9)
+
+def test_constant_window_is_exactly_zero():
+    s = pd.Series(np.r_[np.linspace(1, 2, 30), np.full(30, 123.456)])
+    std = rolling_std(s, 10)
+    assert (std.iloc[-20:] == 0).all()
+    assert RollingStats(s, 10).zscore(10).iloc[-20:].isna().all()
+
+@pytest.mark.parametrize('n', [0, 1, 5])
+def test_empty_and_short_inputs(n):
+    # Fewer rows than the window: NaN everywhere (as pandas), never an error
+    x = np.arange(n, dtype=np.float64)
+    std = rolling_std(pd.Series(x), 20)
+    assert len(std) == n and std.isna().all()
+    df = pd.DataFrame({'a': x, 'b': x[::-1].copy()})
+    stats = RollingStats(df, windows=[20, 50], pairs=[(0, 1)])
+    assert stats.zscore(50).shape == (n, 2) and stats.zscore(50).isna().all().all()
+    assert len(stats.corr(20)) == n
+    assert RollingStats(x, 3).mean(3).shape == (n,)
+
+def test_unknown_window():
+    with pytest.raises(KeyError):
+        RollingStats(np.ones(10), [5]).std(6)
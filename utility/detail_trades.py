@@ -1,14 +1,24 @@
+import argparse
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import yfinance as yf
+from matplotlib.collections import LineCollection, PolyCollection
 import sys
 import os
 from datetime import datetime, timedelta
 
+# Allow running as a script from the utility folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bar_store import BarStore, OHLCV
+
+MAX_ANNOTATIONS = 40 # Trade labels beyond this would overlap; boxes are still drawn
+
 def plot_candlesticks(ax, df):
     """
-    Plots candlestick chart on the given axes.
+    Plots candlestick chart on the given axes (bodies as one collection,
+    wicks as one line collection).
     """
     # Reset index to get integer indices for x-axis (avoids gaps)
     df = df.reset_index()
@@ -17,19 +27,79 @@ def plot_candlesticks(ax, df):
     col_up = '#26a69a' # Green
     col_down = '#ef5350' # Red
     
-    # Plot Up Candles
-    up = df[df['Close'] >= df['Open']]
-    ax.bar(up.index, up['Close'] - up['Open'], width=0.6, bottom=up['Open'], color=col_up, alpha=1.0)
-    ax.vlines(up.index, up['Low'], up['High'], color=col_up, linewidth=1)
+    x = np.arange(len(df), dtype=float)
+    opens, closes = df['Open'].to_numpy(dtype=float), df['Close'].to_numpy(dtype=float)
+    colors = np.where(closes >= opens, col_up, col_down)
     
-    # Plot Down Candles
-    down = df[df['Close'] < df['Open']]
-    ax.bar(down.index, down['Close'] - down['Open'], width=0.6, bottom=down['Open'], color=col_down, alpha=1.0)
-    ax.vlines(down.index, down['Low'], down['High'], color=col_down, linewidth=1)
+    left, right = x - 0.3, x + 0.3
+    bodies = np.stack([np.column_stack([left, opens]), np.column_stack([left, closes]),
+                       np.column_stack([right, closes]), np.column_stack([right, opens])], axis=1)
+    ax.add_collection(PolyCollection(bodies, facecolors=colors, edgecolors=colors, linewidths=0.5))
+    ax.vlines(x, df['Low'], df['High'], colors=colors, linewidth=1)
     
     return df # Return df with reset index for mapping
 
-def create_detailed_chart(csv_file, symbol=None):
+def resample_bars(df, rule):
+    """
+    Aggregates OHLCV bars to a coarser interval (e.g. 15m -> 1h).
+    """
+    return df.resample(rule).agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last',
+                                  'Volume': 'sum'}).dropna(subset=['Close'])
+
+def load_bars(symbol, start, end, bars=None, store=None):
+    """
+    Price bars for the chart, local first: the in-memory frame, the bar store,
+    then SYMBOL_15m.csv. Only downloads from yfinance when none of them exist.
+    """
+    if bars is not None:
+        if isinstance(bars.columns, pd.MultiIndex):
+            bars = bars.set_axis(bars.columns.get_level_values(0), axis=1)
+        return bars[OHLCV], 'memory'
+        
+    store = store or BarStore()
+    for interval in ('15m', '5m', '1m', '1h'):
+        if store.has(symbol, interval):
+            return store.read(symbol, interval, start, end), f'bar store ({interval})'
+            
+    file_path = f"{symbol}_15m.csv"
+    if os.path.exists(file_path):
+        return pd.read_csv(file_path, parse_dates=['Datetime'], index_col='Datetime')[OHLCV], file_path
+        
+    import yfinance as yf
+    print(f"Fetching data from {start} to {end}...")
+    df_price = yf.download(symbol, start=start, end=end, interval='1h', progress=False, auto_adjust=True)
+    # Flatten MultiIndex columns if present (yfinance update)
+    if isinstance(df_price.columns, pd.MultiIndex):
+        df_price.columns = df_price.columns.get_level_values(0)
+    return df_price, 'yfinance'
+
+def _as_utc_ns(times):
+    times = pd.DatetimeIndex(times)
+    if times.tz is not None:
+        times = times.tz_convert('UTC').tz_localize(None)
+    return times.as_unit('ns').asi8
+
+def map_to_bars(index, times):
+    """
+    Nearest bar position for every timestamp with a single searchsorted.
+    """
+    bar_ns = _as_utc_ns(index)
+    ns = _as_utc_ns(times)
+    pos = np.clip(np.searchsorted(bar_ns, ns), 1, len(bar_ns) - 1) if len(bar_ns) > 1 else np.zeros(len(ns), dtype=np.int64)
+    if len(bar_ns) > 1:
+        pos = np.where(np.abs(ns - bar_ns[pos - 1]) <= np.abs(bar_ns[pos] - ns), pos - 1, pos)
+    return pos
+
+def create_detailed_chart(csv_file, symbol=None, show=False, bars=None, trades=10, start=None, end=None,
+                          interval='1h', store=None):
+    """
+    Candlestick chart of a trade window with every trade drawn as a box from
+    the underlying's entry to exit price.
+    bars: in-memory OHLCV frame (e.g. the pipeline's df_main); otherwise the
+          bar store or local CSV is used (see load_bars), without network access.
+    trades: last N trades of the window (None = all); start/end: date span of
+          trades to show. interval: bar size drawn (finer bars are resampled).
+    """
     # 1. Load Trade Journal
     try:
         journal = pd.read_csv(csv_file)
@@ -47,10 +117,10 @@ def create_detailed_chart(csv_file, symbol=None):
         print("Error: 'EntryTime' column missing. Please re-run backtest to generate new journal format.")
         return
         
-    journal['EntryTime'] = pd.to_datetime(journal['EntryTime'])
-    journal['ExitTime'] = pd.to_datetime(journal['ExitTime'])
+    journal['EntryTime'] = pd.to_datetime(journal['EntryTime'], utc=True)
+    journal['ExitTime'] = pd.to_datetime(journal['ExitTime'], utc=True)
     
-    # 2. Determine Symbol and Date Range
+    # 2. Determine Symbol and Trade Window
     if not symbol:
         # Try to infer from filename
         base = os.path.basename(csv_file)
@@ -58,124 +128,91 @@ def create_detailed_chart(csv_file, symbol=None):
         if len(parts) >= 3:
             symbol = parts[2] # trade_journal_SYMBOL_DATE.csv
         else:
-            symbol = 'SPY' # Default
+            # Session folders are SYMBOL/HHMM_MM_DD/trade_journal.csv
+            symbol = os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(csv_file)))) or 'SPY'
             
     print(f"Generating chart for {symbol}...")
     
-    # Get range
-    start_date = journal['EntryTime'].min() - timedelta(days=2)
-    end_date = journal['ExitTime'].max() + timedelta(days=1)
+    window = journal
+    if start is not None:
+        window = window[window['EntryTime'] >= pd.Timestamp(start, tz='UTC')]
+    if end is not None:
+        window = window[window['ExitTime'] <= pd.Timestamp(end, tz='UTC') + timedelta(days=1)]
+    if trades:
+        window = window.tail(trades)
+    if window.empty:
+        print("No trades in the requested window.")
+        return
     
-    # 3. Fetch Price Data
-    print(f"Fetching data from {start_date} to {end_date}...")
-    df_price = yf.download(symbol, start=start_date, end=end_date, interval='1h', progress=False, auto_adjust=True)
+    plot_start = window['EntryTime'].min() - timedelta(days=1)
+    plot_end = window['ExitTime'].max() + timedelta(hours=4)
     
+    # 3. Price Data (local unless nothing is stored)
+    df_price, source = load_bars(symbol, plot_start, plot_end, bars=bars, store=store)
     if df_price.empty:
         print("Error: No price data found.")
         return
         
-    # Flatten MultiIndex columns if present (yfinance update)
-    if isinstance(df_price.columns, pd.MultiIndex):
-        df_price.columns = df_price.columns.get_level_values(0)
-        
-    # 4. Plotting
-    # We'll plot the last 100 bars or a specific window. 
-    # Since there are many trades, let's plot the last 5 days of trading activity.
-    # Or plot the whole thing? 1 year is too much for detailed view.
-    # Let's plot the last 10 trades context.
-    
-    last_trades = journal.tail(10)
-    if last_trades.empty: return
-    
-    plot_start = last_trades['EntryTime'].min() - timedelta(days=1)
-    plot_end = last_trades['ExitTime'].max() + timedelta(hours=4)
-    
-    subset = df_price.loc[plot_start:plot_end].copy()
+    bar_ns = _as_utc_ns(df_price.index)
+    lo, hi = np.searchsorted(bar_ns, _as_utc_ns([plot_start, plot_end]), side='left')
+    subset = df_price.iloc[lo:hi + 1]
+    if interval:
+        bar_size = pd.Series(subset.index).diff().median() if len(subset) > 1 else pd.Timedelta(0)
+        if bar_size < pd.Timedelta(interval):
+            subset = resample_bars(subset, interval)
     if subset.empty:
         print("No data in the trade window.")
         return
+    print(f"Using {len(subset)} bars from {source}")
         
     # Setup Figure
     plt.style.use('dark_background')
     fig, ax = plt.subplots(figsize=(16, 9))
     
     # Plot Candlesticks
-    subset_reset = plot_candlesticks(ax, subset)
-    
-    # Map timestamps to x-indices
-    time_to_idx = {t: i for i, t in enumerate(subset.index)}
-    
-    # Overlay Trades
-    for _, trade in last_trades.iterrows():
-        entry_time = trade['EntryTime']
-        exit_time = trade['ExitTime']
-        
-        # Find closest indices
-        # We need to handle exact match or closest
-        # Since we downloaded 1h data, timestamps should match if aligned.
-        # But yfinance timestamps might be slightly different (timezone).
-        # Let's try to match by nearest.
-        
-        try:
-            # Find index of nearest timestamp in subset
-            start_idx = subset.index.get_indexer([entry_time], method='nearest')[0]
-            end_idx = subset.index.get_indexer([exit_time], method='nearest')[0]
-            
-            # Get price levels
-            # We don't have exact entry price in journal, but we can estimate from strike/premium or just use the bar's close.
-            # Actually, we want to draw the box based on Strike? 
-            # The user image shows P/$235.
-            # Let's draw the box from Entry Price to Exit Price?
-            # Or just mark the trade.
-            # Let's use the Strike price as a reference level, or the underlying price at entry.
-            # We can get underlying price from subset at start_idx.
-            
-            entry_price = subset.iloc[start_idx]['Close']
-            exit_price = subset.iloc[end_idx]['Close']
-            
-            # Color: Green if PnL > 0, Red if PnL <= 0
-            is_win = trade['PnL'] > 0
-            color = '#00ff00' if is_win else '#ff0000'
-            fill_color = color
+    plot_candlesticks(ax, subset)
+    
+    # 4. Map all entries and exits to bar positions at once
+    n_trades = len(window)
+    positions = map_to_bars(subset.index, pd.concat([window['EntryTime'], window['ExitTime']]))
+    start_idx, end_idx = positions[:n_trades], positions[n_trades:]
+    closes = subset['Close'].to_numpy(dtype=float)
+    entry_price, exit_price = closes[start_idx], closes[end_idx]
             
-            # Draw Box/Rectangle covering the trade duration
-            # Width = end_idx - start_idx
-            # Height? Let's make it cover the price movement or a fixed height relative to price.
-            # Let's draw a rectangle from Entry Price to Exit Price.
+    # Color: Green if PnL > 0, Red if PnL <= 0
+    is_win = window['PnL'].to_numpy() > 0
+    colors = np.where(is_win, '#00ff00', '#ff0000')
             
-            rect_width = max(1, end_idx - start_idx)
-            rect_height = exit_price - entry_price
+    # Boxes covering the trade duration, from entry to exit price (one collection)
+    rect_width = np.maximum(1, end_idx - start_idx)
+    rect_height = exit_price - entry_price
+    # If height is 0 (same bar), make it visible
+    rect_height = np.where(np.abs(rect_height) < 0.1, np.where(is_win, 0.5, -0.5), rect_height)
+    x0, x1, y0, y1 = start_idx, start_idx + rect_width, entry_price, entry_price + rect_height
+    boxes = np.stack([np.column_stack([x0, y0]), np.column_stack([x0, y1]),
+                      np.column_stack([x1, y1]), np.column_stack([x1, y0])], axis=1)
+    ax.add_collection(PolyCollection(boxes, facecolors=colors, edgecolors=colors, alpha=0.3))
             
-            # If height is 0 (same bar), make it visible
-            if abs(rect_height) < 0.1: rect_height = 0.5 if is_win else -0.5
+    # Lines connecting Entry to Exit (one collection)
+    segments = np.stack([np.column_stack([start_idx, entry_price]), np.column_stack([end_idx, exit_price])], axis=1)
+    ax.add_collection(LineCollection(segments, colors=colors, linestyles='--', linewidths=1))
             
-            # Draw Rectangle
-            rect = plt.Rectangle((start_idx, entry_price), rect_width, rect_height, 
-                                 facecolor=fill_color, alpha=0.3, edgecolor=color)
-            ax.add_patch(rect)
+    # Annotation Text
+    # Format: (Call/Put) / $Strike / PnL%
+    # Example: C / $245 / +50%
+    if n_trades <= MAX_ANNOTATIONS:
+        offset = (subset['High'].max() - subset['Low'].min()) * 0.02
+        for i, (trade_type, strike, pnl_pct) in enumerate(zip(window['Type'], window['Strike'], window['PnL%'])):
+            type_str = "C" if trade_type == 'call' else "P"
+            text = f"{type_str} / ${strike} / {pnl_pct:+.0f}%"
+            ax.text(start_idx[i], max(entry_price[i], exit_price[i]) + offset, text, color='white', fontsize=9,
+                    fontweight='bold', bbox=dict(facecolor=colors[i], alpha=0.5, edgecolor='none', pad=2))
             
-            # Draw Line connecting Entry to Exit
-            ax.plot([start_idx, end_idx], [entry_price, exit_price], color=color, linestyle='--', linewidth=1)
-            
-            # Annotation Text
-            # Format: (Call/Put) / $Strike / PnL%
-            # Example: C / $245 / +50%
-            type_str = "C" if trade['Type'] == 'call' else "P"
-            pnl_str = f"{trade['PnL%']:+.0f}%"
-            text = f"{type_str} / ${trade['Strike']} / {pnl_str}"
-            
-            # Position text above or below
-            text_y = max(entry_price, exit_price) + (subset['High'].max() - subset['Low'].min()) * 0.02
-            
-            ax.text(start_idx, text_y, text, color='white', fontsize=9, fontweight='bold',
-                    bbox=dict(facecolor=color, alpha=0.5, edgecolor='none', pad=2))
-            
-        except Exception as e:
-            print(f"Skipping trade at {entry_time}: {e}")
-            continue
+    ax.set_xlim(-1, len(subset))
+    ax.set_ylim(subset['Low'].min() * 0.998, subset['High'].max() * 1.002)
 
     # Formatting
-    ax.set_title(f"Detailed Trade Analysis: {symbol} (Last 10 Trades)", fontsize=16, fontweight='bold')
+    ax.set_title(f"Detailed Trade Analysis: {symbol} ({'Last ' if trades else ''}{n_trades} Trades)", fontsize=16, fontweight='bold')
     ax.set_ylabel("Price")
     ax.grid(True, alpha=0.1)
     
@@ -194,10 +231,20 @@ def create_detailed_chart(csv_file, symbol=None):
     
     plt.savefig(output_file, dpi=150)
     print(f"📸 Detailed Chart saved to '{output_file}'")
-    plt.show()
+    if show:
+        plt.show()
+    plt.close(fig)
+    return output_file
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python detail_trades.py <csv_file>")
-    else:
-        create_detailed_chart(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Detailed candlestick chart of backtest trades")
+    parser.add_argument('csv_file')
+    parser.add_argument('--symbol', default=None)
+    parser.add_argument('--trades', default='10', help="Last N trades, or 'all'")
+    parser.add_argument('--start', default=None, help="Only trades from this date")
+    parser.add_argument('--end', default=None, help="Only trades up to this date")
+    parser.add_argument('--interval', default='1h', help="Bar size drawn (finer stored bars are resampled)")
+    args = parser.parse_args()
+
+    create_detailed_chart(args.csv_file, args.symbol, show=True, trades=None if args.trades == 'all' else int(args.trades),
+                          start=args.start, end=args.end, interval=args.interval)
@@ -4,11 +4,95 @@ import numpy as np
 import sys
 import os
 from datetime import datetime
+from matplotlib.collections import PolyCollection
 
-def create_pnl_chart(csv_file):
+LARGE_JOURNAL_TRADES = 5000 # Above this, large-journal mode is used automatically
+PIXEL_BUDGET = 2000 # Max bars/curve points drawn in large-journal mode (~ chart width in pixels)
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keeps the first and last
+    points and, per bucket, the point forming the largest triangle with the
+    previously kept point and the next bucket's mean. Preserves peaks and
+    drawdowns of the curve. Returns the kept indices.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+        
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nxt_lo, nxt_hi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        mean_x, mean_y = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[prev] - mean_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (mean_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        kept[b + 1] = prev
+    return kept
+
+def bucket_extremes(values, n_buckets):
+    """
+    Reduces per-trade bars to one positive (max) and one negative (min) bar
+    per bucket of consecutive trades. At one bucket per pixel column this
+    draws the same image as every individual bar.
+    Returns (x, height) with x at the bucket's first trade.
+    """
+    n = len(values)
+    starts = np.linspace(0, n, min(n, n_buckets) + 1).astype(np.int64)[:-1]
+    highs = np.maximum.reduceat(np.maximum(values, 0), starts)
+    lows = np.minimum.reduceat(np.minimum(values, 0), starts)
+    x = np.concatenate([starts, starts])
+    height = np.concatenate([highs, lows])
+    mask = height != 0
+    return x[mask], height[mask]
+
+def bar_collection(x, height, width, colors, **kwargs):
+    """
+    All bars as one PolyCollection (one artist instead of one Rectangle per bar).
+    """
+    left, right = x - width / 2, x + width / 2
+    zeros = np.zeros_like(height, dtype=float)
+    verts = np.stack([np.column_stack([left, zeros]), np.column_stack([left, height]),
+                      np.column_stack([right, height]), np.column_stack([right, zeros])], axis=1)
+    return PolyCollection(verts, facecolors=colors, **kwargs)
+
+def journal_stats(pnl, pnl_pct, balance):
+    """
+    Summary statistics from the P&L arrays with one pass per quantity
+    (no repeated DataFrame filtering).
+    """
+    win = pnl > 0
+    wins = int(np.count_nonzero(win))
+    total_trades = len(pnl)
+    losses = total_trades - wins
+    win_pct_sum = float(np.dot(pnl_pct, win))
+    net_pnl = float(pnl.sum())
+    initial_balance = balance[0] - pnl[0]
+    return {
+        'total_trades': total_trades,
+        'wins': wins,
+        'losses': losses,
+        'win_rate': wins / total_trades * 100 if total_trades > 0 else 0,
+        'avg_win': win_pct_sum / wins if wins else np.nan,
+        'avg_loss': (float(pnl_pct.sum()) - win_pct_sum) / losses if losses else np.nan,
+        'net_pnl': net_pnl,
+        'final_balance': balance[-1],
+        'initial_balance': initial_balance,
+        'return_pct': net_pnl / initial_balance * 100
+    }
+
+def create_pnl_chart(csv_file, show=False, large=None):
     """
     Creates a candlestick-style P&L chart from trade journal.
     Green bars for winning trades, red bars for losing trades.
+    show=True opens the chart window (blocks until closed).
+    large: large-journal mode (default: automatic above LARGE_JOURNAL_TRADES).
+    It draws bucketed bars as a single collection and an LTTB-downsampled
+    balance curve, so render time stays flat as the journal grows.
+    Returns the saved image path.
     """
     # Read the trade journal
     try:
@@ -21,9 +105,14 @@ def create_pnl_chart(csv_file):
         print("Error: Trade journal is empty.")
         return
     
+    if large is None:
+        large = len(df) > LARGE_JOURNAL_TRADES
+        
     # Convert DateTime to datetime objects
     # Handle new format (ExitTime) vs old format (DateTime)
-    if 'ExitTime' in df.columns:
+    if large and ('ExitTime' in df.columns or 'DateTime' in df.columns):
+        pass # Times are not plotted; skip parsing hundreds of thousands of timestamps
+    elif 'ExitTime' in df.columns:
         df['DateTime'] = pd.to_datetime(df['ExitTime'])
     elif 'DateTime' in df.columns:
         df['DateTime'] = pd.to_datetime(df['DateTime'])
@@ -37,21 +126,33 @@ def create_pnl_chart(csv_file):
     
     # === Chart 1: P&L Candlesticks ===
     
-    # Prepare data for candlestick-style bars
-    for idx, row in df.iterrows():
-        # Determine color based on P&L
-        color = '#00ff00' if row['PnL'] > 0 else '#ff0000'
-        alpha = 0.8
+    pnl = df['PnL'].to_numpy(dtype=float)
+    pnl_pct = df['PnL%'].to_numpy(dtype=float)
+    
+    if large:
+        # One collection of per-bucket extreme bars (bucket = pixel column)
+        x, height = bucket_extremes(pnl_pct, PIXEL_BUDGET)
+        width = max(1.0, len(df) / PIXEL_BUDGET)
+        colors = np.where(height > 0, '#00ff00', '#ff0000')
+        ax1.add_collection(bar_collection(x + width / 2, height, width, colors, alpha=0.8, linewidth=0))
+        ax1.set_xlim(-width, len(df) + width)
+        ax1.set_ylim(min(pnl_pct.min(), -40) * 1.1, max(pnl_pct.max(), 500) * 1.1)
+    else:
+        # Prepare data for candlestick-style bars
+        for idx, row in df.iterrows():
+            # Determine color based on P&L
+            color = '#00ff00' if row['PnL'] > 0 else '#ff0000'
+            alpha = 0.8
         
-        # Draw vertical line (wick) from entry to exit premium
-        entry_prem = row['EntryPremium']
-        exit_prem = row['ExitPremium']
+            # Draw vertical line (wick) from entry to exit premium
+            entry_prem = row['EntryPremium']
+            exit_prem = row['ExitPremium']
         
-        # Bar height represents P&L percentage
-        pnl_pct = row['PnL%']
+            # Bar height represents P&L percentage
+            pnl_pct_row = row['PnL%']
         
-        # Draw bar
-        ax1.bar(idx, pnl_pct, color=color, alpha=alpha, width=0.8, edgecolor='white', linewidth=0.5)
+            # Draw bar
+            ax1.bar(idx, pnl_pct_row, color=color, alpha=alpha, width=0.8, edgecolor='white', linewidth=0.5)
     
     # Add horizontal line at 0%
     ax1.axhline(y=0, color='white', linestyle='--', linewidth=1, alpha=0.5)
@@ -75,14 +176,21 @@ def create_pnl_chart(csv_file):
     # === Chart 2: Cumulative Balance ===
     
     # Calculate cumulative balance
-    balance_curve = df['Balance'].values
+    balance_curve = df['Balance'].to_numpy(dtype=float)
+    stats = journal_stats(pnl, pnl_pct, balance_curve)
     
-    # Plot balance curve
-    ax2.plot(range(len(balance_curve)), balance_curve, color='#00ffff', linewidth=2, label='Account Balance')
-    ax2.fill_between(range(len(balance_curve)), balance_curve, alpha=0.3, color='#00ffff')
+    # Plot balance curve (shape-preserving downsample to the pixel budget in large mode)
+    trade_numbers = np.arange(len(balance_curve))
+    if large:
+        kept = lttb(trade_numbers.astype(float), balance_curve, PIXEL_BUDGET)
+        trade_numbers, balance_plot = trade_numbers[kept], balance_curve[kept]
+    else:
+        balance_plot = balance_curve
+    ax2.plot(trade_numbers, balance_plot, color='#00ffff', linewidth=2, label='Account Balance')
+    ax2.fill_between(trade_numbers, balance_plot, alpha=0.3, color='#00ffff')
     
     # Add starting balance line
-    ax2.axhline(y=balance_curve[0] - df.iloc[0]['PnL'], color='yellow', linestyle='--', linewidth=1, alpha=0.5, label='Starting Balance')
+    ax2.axhline(y=stats['initial_balance'], color='yellow', linestyle='--', linewidth=1, alpha=0.5, label='Starting Balance')
     
     # Formatting
     ax2.set_xlabel('Trade Number', fontsize=12, fontweight='bold')
@@ -99,16 +207,13 @@ def create_pnl_chart(csv_file):
     ax2.set_xticklabels(tick_labels, rotation=45)
     
     # Add statistics box
-    total_trades = len(df)
-    wins = len(df[df['PnL'] > 0])
-    losses = len(df[df['PnL'] <= 0])
-    win_rate = (wins / total_trades) * 100 if total_trades > 0 else 0
-    avg_win = df[df['PnL'] > 0]['PnL%'].mean()
-    avg_loss = df[df['PnL'] <= 0]['PnL%'].mean()
-    net_pnl = df['PnL'].sum()
-    final_balance = balance_curve[-1]
-    initial_balance = balance_curve[0] - df.iloc[0]['PnL']
-    return_pct = (net_pnl / initial_balance) * 100
+    total_trades = stats['total_trades']
+    wins, losses = stats['wins'], stats['losses']
+    win_rate = stats['win_rate']
+    avg_win, avg_loss = stats['avg_win'], stats['avg_loss']
+    net_pnl = stats['net_pnl']
+    final_balance = stats['final_balance']
+    return_pct = stats['return_pct']
     
     stats_text = f"""
     Total Trades: {total_trades}
@@ -136,7 +241,10 @@ def create_pnl_chart(csv_file):
     print(f"📊 P&L Chart saved to '{output_file}'")
     
     # Show plot
-    plt.show()
+    if show:
+        plt.show()
+    plt.close(fig)
+    return output_file
 
 def main():
     """
@@ -179,7 +287,7 @@ def main():
             print(f"Please run: python main.py {symbol}")
             return
     
-    create_pnl_chart(csv_file)
+    create_pnl_chart(csv_file, show=True)
 
 if __name__ == "__main__":
     main()
@@ -1,50 +1,91 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import joblib
-import matplotlib.pyplot as plt
 import features
-from options_pricing import OptionsPricing
+from data_loader import get_reference_symbol
+from model import get_model_features
+from model_store import load_session_model, SESSION_REF
+from options_pricing import OptionsPricing, MINUTES_PER_YEAR
+from exit_simulator import live_exit_odds
+from backtest import OTM_PCT, SL_PCT, TP_PCT
 from datetime import datetime, timedelta
 import sys
+import time
 import warnings
 
 # Suppress matplotlib's internal FutureWarnings (library issue, not our code)
 warnings.filterwarnings('ignore', category=FutureWarning, module='matplotlib')
 
-def get_latest_signal(symbol='SPY'):
-    print(f"🚀 Fetching Live Market Data for {symbol}...")
-    
-    # Determine reference symbol
-    ref_symbol = 'SPY' if symbol == 'IWM' else 'IWM'
-    if symbol == 'SPY': ref_symbol = 'IWM'
-    
-    # Fetch enough data for feature engineering (need ~200 bars for rolling windows)
-    # Use 15m interval to match training data
-    df_main = yf.download(symbol, period='60d', interval='15m', progress=False, auto_adjust=True)
-    df_ref = yf.download(ref_symbol, period='60d', interval='15m', progress=False, auto_adjust=True)
-    
-    if df_main.empty or df_ref.empty:
-        print("Error: No data fetched.")
-        return
+# Signal Rules
+CONFIDENCE_THRESHOLD = 25.0 # Lower threshold to 25% to detect more signals
+MOMENTUM_THRESHOLD = 0.5 # % move over the last 20 bars that overrides a weak model
+MOMENTUM_BARS = 20 # Last 20 bars (5 hours)
 
-    # Align
-    common_index = df_main.index.intersection(df_ref.index)
-    df_main = df_main.loc[common_index]
-    df_ref = df_ref.loc[common_index]
-    
-    # Feature Engineering
-    print("🧠 Processing Features...")
-    df_processed = features.prepare_pair_features(df_main, df_ref, main_ticker=symbol, ref_ticker=ref_symbol)
-    
-    if df_processed.empty:
-        print("Error: Not enough data for features.")
-        return
+def momentum_pct(closes, bars=MOMENTUM_BARS):
+    """
+    Percent change of the close over the last `bars` bars.
+    """
+    recent = closes[-bars:]
+    return (recent[-1] - recent[0]) / recent[0] * 100
 
-    # Load Model
-    print("🔮 Loading AI Model...")
+def decide_signal(prob_map, price_change_pct, confidence_threshold=CONFIDENCE_THRESHOLD):
+    """
+    Turns class probabilities (in %) and recent momentum into a trade direction.
+    Returns (prediction, win_prob, reason) with reason 'model', 'momentum' or 'neutral'.
+    """
+    # Use probability-based decision (more sensitive to trends)
+    bullish_prob = prob_map.get(1, 0)
+    bearish_prob = prob_map.get(-1, 0)
+    neutral_prob = prob_map.get(0, 0)
     
-    # Try to load symbol-specific model from folder first
+    # Determine signal based on probabilities
+    if bullish_prob >= confidence_threshold and bullish_prob > bearish_prob:
+        return 1, bullish_prob, 'model'
+    if bearish_prob >= confidence_threshold and bearish_prob > bullish_prob:
+        return -1, bearish_prob, 'model'
+    # Override: If strong price momentum detected (>0.5% move), follow the trend
+    if abs(price_change_pct) > MOMENTUM_THRESHOLD:
+        if price_change_pct > 0:
+            return 1, max(bullish_prob, 30.0), 'momentum' # Minimum 30% confidence
+        return -1, max(bearish_prob, 30.0), 'momentum'
+    return 0, neutral_prob, 'neutral'
+
+def option_targets(last_price, prediction, T_years=1 / 252, sigma=0.15):
+    """
+    Recommended 0.3% OTM contract with theoretical entry, TP and SL premiums.
+    Defaults: 1 day to expiry, ~15% IV.
+    """
+    op = OptionsPricing()
+    if prediction == 1:
+        strike = round(last_price * (1 + OTM_PCT))
+        opt_type = 'call'
+    else:
+        strike = round(last_price * (1 - OTM_PCT))
+        opt_type = 'put'
+        
+    entry_premium = op.black_scholes(last_price, strike, T_years, sigma, opt_type)
+    return {
+        'strike': strike,
+        'option_type': opt_type,
+        'entry_premium': float(entry_premium),
+        'tp_premium': float(entry_premium * (1 + TP_PCT)),
+        'sl_premium': float(entry_premium * (1 - SL_PCT))
+    }
+
+def _load_model(folder_name, model_filename):
+    model = load_session_model(folder_name)
+    if model is not None:
+        print(f"Model store: {model.folder}")
+        return model
+    import joblib
+    return joblib.load(model_filename)
+
+def load_latest_model(symbol):
+    """
+    Loads the model from the current session folder, falling back to the
+    latest session under SYMBOL/. Returns (model, folder_name) or (None, None).
+    Sessions with a model store pointer (model.json) open the memory-mapped
+    arrays instead of unpickling the forest.
+    """
     import os
     now = datetime.now()
     # New structure: SYMBOL/HHMM_MM_DD/ - try to find latest session
@@ -54,8 +95,9 @@ def get_latest_signal(symbol='SPY'):
     model_filename = os.path.join(folder_name, 'trained_model.pkl')
     
     try:
-        model = joblib.load(model_filename)
+        model = _load_model(folder_name, model_filename)
         print(f"Loaded model: {model_filename}")
+        return model, folder_name
     except:
         # Try to find any model in symbol folder (latest session)
         try:
@@ -65,30 +107,67 @@ def get_latest_signal(symbol='SPY'):
                     latest_session = sessions[0]
                     folder_name = os.path.join(symbol_folder, latest_session)
                     models = [f for f in os.listdir(folder_name) if f.startswith('trained_model') and f.endswith('.pkl')]
-                    if models:
-                        model_filename = os.path.join(folder_name, models[0])
-                        model = joblib.load(model_filename)
+                    if models or os.path.exists(os.path.join(folder_name, SESSION_REF)):
+                        model_filename = os.path.join(folder_name, models[0] if models else 'trained_model.pkl')
+                        model = _load_model(folder_name, model_filename)
                         print(f"Loaded model: {model_filename}")
-                    else:
-                        raise FileNotFoundError
-                else:
-                    raise FileNotFoundError
-            else:
-                raise FileNotFoundError
+                        return model, folder_name
         except:
-            print(f"Error: No model found. Please train first with: python main.py {symbol}")
-            return
+            pass
+    return None, None
+
+def get_latest_signal(symbol='SPY', render=None, show=False, chart=True):
+    """
+    Prints the live signal for the latest bar and saves signal_chart.png.
+    With a render service (utility.render_service.RenderService) the chart is
+    submitted to it and this returns without waiting for the image.
+    chart=False skips the chart (matplotlib is never imported).
+    """
+    import yfinance as yf
+    
+    print(f"🚀 Fetching Live Market Data for {symbol}...")
+    
+    # Determine reference symbol
+    ref_symbol = get_reference_symbol(symbol)
+    
+    # Fetch enough data for feature engineering (need ~200 bars for rolling windows)
+    # Use 15m interval to match training data
+    df_main = yf.download(symbol, period='60d', interval='15m', progress=False, auto_adjust=True)
+    df_ref = yf.download(ref_symbol, period='60d', interval='15m', progress=False, auto_adjust=True)
+    
+    if df_main.empty or df_ref.empty:
+        print("Error: No data fetched.")
+        return
+
+    # Align
+    common_index = df_main.index.intersection(df_ref.index)
+    df_main = df_main.loc[common_index]
+    df_ref = df_ref.loc[common_index]
+    
+    # Load Model first so only the features it needs are computed
+    print("🔮 Loading AI Model...")
+    model, folder_name = load_latest_model(symbol)
+    if model is None:
+        print(f"Error: No model found. Please train first with: python main.py {symbol}")
+        return
+        
+    # Predict - use the feature list saved with the model
+    feature_cols = get_model_features(model)
+    
+    # Feature Engineering
+    print(f"🧠 Processing Features ({len(feature_cols)} used by model)...")
+    df_processed = features.prepare_pair_features(df_main, df_ref, main_ticker=symbol, ref_ticker=ref_symbol,
+                                                  feature_cols=feature_cols)
+    
+    if df_processed.empty:
+        print("Error: Not enough data for features.")
+        return
 
     # Get Latest Data Point
     last_row = df_processed.iloc[[-1]]
     last_price = last_row[f'{symbol}_Close'].values[0]
     last_time = last_row.index[0]
     
-    # Predict - use same feature selection as training
-    # Exclude OHLCV and Target columns
-    exclude_keywords = ['Target', 'Open', 'High', 'Low', 'Close', 'Volume']
-    feature_cols = [c for c in df_processed.columns if not any(kw in c for kw in exclude_keywords)]
-    
     X_new = last_row[feature_cols]
     
     prediction = model.predict(X_new)[0]
@@ -106,48 +185,26 @@ def get_latest_signal(symbol='SPY'):
     print(f"\n🔎 ANALYSIS FOR {last_time} (Latest Closed Bar)")
     print(f"Current {symbol} Price: ${last_price:.2f}")
     
-    # Use probability-based decision (more sensitive to trends)
-    bullish_prob = prob_map.get(1, 0)
-    bearish_prob = prob_map.get(-1, 0)
-    neutral_prob = prob_map.get(0, 0)
-    
-    # Lower threshold to 25% to detect more signals
-    confidence_threshold = 25.0
-    
     # Check recent price momentum for trend confirmation
-    recent_bars = df_main.iloc[-20:]  # Last 20 bars (5 hours)
     # Handle potential MultiIndex columns from yfinance
-    if isinstance(recent_bars.columns, pd.MultiIndex):
+    if isinstance(df_main.columns, pd.MultiIndex):
         close_col = ('Close', df_main.columns.get_level_values(1)[0]) if len(df_main.columns.levels) > 1 else 'Close'
     else:
         close_col = 'Close'
-    price_change_pct = ((recent_bars[close_col].iloc[-1] - recent_bars[close_col].iloc[0]) / recent_bars[close_col].iloc[0]) * 100
+    price_change_pct = momentum_pct(df_main[close_col].values)
     
-    # Determine signal based on probabilities
-    if bullish_prob >= confidence_threshold and bullish_prob > bearish_prob:
-        prediction = 1
-        win_prob = bullish_prob
-    elif bearish_prob >= confidence_threshold and bearish_prob > bullish_prob:
-        prediction = -1
-        win_prob = bearish_prob
-    # Override: If strong price momentum detected (>0.5% move), follow the trend
-    elif abs(price_change_pct) > 0.5:
-        if price_change_pct > 0:
-            prediction = 1
-            win_prob = max(bullish_prob, 30.0)  # Minimum 30% confidence
+    prediction, win_prob, reason = decide_signal(prob_map, price_change_pct)
+    if reason == 'momentum':
+        if prediction == 1:
             print(f"📈 Strong Bullish Momentum Detected: +{price_change_pct:.2f}% (Last 5 hours)")
         else:
-            prediction = -1
-            win_prob = max(bearish_prob, 30.0)
             print(f"📉 Strong Bearish Momentum Detected: {price_change_pct:.2f}% (Last 5 hours)")
-    else:
-        prediction = 0
-        win_prob = neutral_prob
     
     if prediction == 0:
         print("Signal: NEUTRAL (No Trade Triggered)")
         print("Market is currently consolidating or trend is weak.")
-        generate_chart(df_main, last_row, 0, 0, 0, 0, symbol, 50, 0, 0)
+        if chart:
+            _chart(render, (df_main, last_row, 0, 0, 0, 0, symbol, 50, 0, 0), folder_name, show)
         return
     
     direction = "BULLISH (Call)" if prediction == 1 else "BEARISH (Put)"
@@ -155,34 +212,26 @@ def get_latest_signal(symbol='SPY'):
     
     print(f"Confidence: {win_prob:.2f}%")
     
-    # Option Selection (0.3% OTM)
-    op = OptionsPricing()
-    otm_pct = 0.003
-    if prediction == 1:
-        strike = round(last_price * (1 + otm_pct))
-        opt_type = 'call'
-    else:
-        strike = round(last_price * (1 - otm_pct))
-        opt_type = 'put'
+    # Exit odds under the backtest's rules, from recent realized vol and the real time to the close
+    start = time.perf_counter()
+    odds = live_exit_odds(df_main[close_col].values, last_time, prediction)
+    sim_ms = (time.perf_counter() - start) * 1000
         
-    print(f"Recommended Option: {symbol} {strike} {opt_type.upper()}")
-    
-    # Calculate Theoretical Entry/Exit
-    T_years = 1 / 252 # 1 Day
-    sigma = 0.15 # Approx IV
-    
-    entry_premium = op.black_scholes(last_price, strike, T_years, sigma, opt_type)
-    
-    # Strategy Targets
-    tp_pct = 5.0 # 500%
-    sl_pct = 0.40 # 40%
-    
-    tp_premium = entry_premium * (1 + tp_pct)
-    sl_premium = entry_premium * (1 - sl_pct)
-    
-    print(f"Est. Entry Premium: ${entry_premium:.2f}")
-    print(f"Target Premium (500%): ${tp_premium:.2f}")
-    print(f"Stop Loss Premium (-40%): ${sl_premium:.2f}")
+    # Option Selection and Theoretical Entry/Exit (same sigma and expiry as the simulation)
+    targets = option_targets(last_price, prediction, T_years=odds['minutes_to_close'] / MINUTES_PER_YEAR,
+                             sigma=odds['sigma'])
+    strike = targets['strike']
+    print(f"Recommended Option: {symbol} {strike} {targets['option_type'].upper()}")
+    
+    print(f"Est. Entry Premium: ${targets['entry_premium']:.2f}")
+    print(f"Target Premium (500%): ${targets['tp_premium']:.2f}")
+    print(f"Stop Loss Premium (-40%): ${targets['sl_premium']:.2f}")
+    
+    when = "next session open" if odds['next_session'] else f"{odds['minutes_to_close']} min to close"
+    print(f"\n🎲 EXIT SIMULATION ({odds['paths']:,} paths, {when}, vol {odds['sigma'] * 100:.1f}%, {sim_ms:.0f} ms):")
+    print(" | ".join(f"{name}: {p * 100:.1f}%" for name, p in odds['probabilities'].items()))
+    print(f"Expected PnL: {odds['expected_pnl_pct']:+.1f}% (${odds['expected_pnl']:+.2f}/contract) | "
+          f"P(profit): {odds['prob_profit'] * 100:.1f}% | Avg hold: {odds['mean_hold_minutes']:.0f} min")
     
     # Calculate 1-Hour Price Prediction
     # Based on model confidence and historical volatility
@@ -201,9 +250,21 @@ def get_latest_signal(symbol='SPY'):
     print(f"Risk/Reward Ratio: {abs(predicted_price_1h - last_price) / abs(stop_price_1h - last_price):.2f}:1")
     
     # Charting
-    generate_chart(df_main, last_row, prediction, strike, tp_pct, sl_pct, symbol, win_prob, predicted_price_1h, stop_price_1h, output_folder=folder_name)
+    if not chart:
+        return
+    _chart(render, (df_main, last_row, prediction, strike, TP_PCT, SL_PCT, symbol, win_prob, predicted_price_1h,
+                    stop_price_1h), folder_name, show)
 
-def generate_chart(df, last_row, signal, strike, tp_pct, sl_pct, symbol, confidence=50, target_price=0, stop_price=0, output_folder=None):
+def _chart(render, chart_args, folder_name, show):
+    # Off the critical path when a render service is given, else drawn here
+    if render is not None:
+        render.submit(generate_chart, *chart_args, output_folder=folder_name)
+    else:
+        generate_chart(*chart_args, output_folder=folder_name, show=show)
+
+def generate_chart(df, last_row, signal, strike, tp_pct, sl_pct, symbol, confidence=50, target_price=0, stop_price=0, output_folder=None, show=False):
+    import matplotlib.pyplot as plt
+    
     # Plot last 50 bars
     subset = df.iloc[-50:]
     last_price = last_row[f'{symbol}_Close'].values[0]
@@ -303,6 +364,10 @@ def generate_chart(df, last_row, signal, strike, tp_pct, sl_pct, symbol, confide
     filename = os.path.join(folder_name, 'signal_chart.png')
     plt.savefig(filename, dpi=150, bbox_inches='tight')
     print(f"📸 Chart saved to '{filename}'")
+    if show:
+        plt.show()
+    plt.close(fig)
+    return filename
 
 if __name__ == "__main__":
     # Parse command line argument
@@ -310,4 +375,4 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         symbol = sys.argv[1].upper()
     
-    get_latest_signal(symbol)
+    get_latest_signal(symbol, show=True)
@@ -0,0 +1,131 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+# Allow running as a script from the utility folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import fingerprint, init_worker
+
+SESSION_PATTERN = re.compile(r'^\d{4}_\d{2}_\d{2}$') # HHMM_MM_DD
+
+def _render(fn, args, kwargs):
+    """
+    Worker: runs one chart function and always releases its figures,
+    so long-lived workers do not accumulate pyplot state.
+    """
+    import matplotlib.pyplot as plt
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        plt.close('all')
+
+def _file_state(value):
+    # Journal paths are keyed by their content state, so an edited file is re-rendered
+    if isinstance(value, str) and os.path.isfile(value):
+        stat = os.stat(value)
+        return [value, stat.st_mtime_ns, stat.st_size]
+    return value
+
+class RenderService:
+    """
+    Background chart rendering in headless (Agg) worker processes.
+    submit() returns a Future immediately; identical requests (same function,
+    arguments and input file state) share one job. Use as a context manager,
+    or call close() to wait for outstanding charts before exiting.
+    """
+    def __init__(self, workers=2):
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_worker)
+        self.jobs = {}
+        self.submitted = 0
+        self.deduped = 0
+        self._lock = threading.Lock()
+        
+    def submit(self, fn, *args, **kwargs):
+        key = fingerprint([f"{fn.__module__}.{fn.__qualname__}", [_file_state(a) for a in args],
+                           {k: _file_state(v) for k, v in kwargs.items()}])
+        with self._lock:
+            future = self.jobs.get(key)
+            if future is not None and not (future.done() and future.exception()):
+                self.deduped += 1
+                return future
+            future = self.pool.submit(_render, fn, args, kwargs)
+            self.jobs[key] = future
+            self.submitted += 1
+            return future
+            
+    def wait(self):
+        """
+        Blocks until every submitted chart is done. Returns (done, failed) counts.
+        """
+        futures = list(self.jobs.values())
+        wait(futures)
+        failed = [f for f in futures if f.exception()]
+        for f in failed:
+            print(f"⚠️ Chart rendering failed: {f.exception()}")
+        return len(futures) - len(failed), len(failed)
+        
+    def close(self):
+        self.wait()
+        self.pool.shutdown()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+
+def find_sessions(root='.', symbols=None):
+    """
+    Trade journals of all historical session folders (SYMBOL/HHMM_MM_DD/trade_journal.csv).
+    """
+    journals = []
+    for path in sorted(glob.glob(os.path.join(root, '*', '*', 'trade_journal.csv'))):
+        session = os.path.dirname(path)
+        symbol = os.path.basename(os.path.dirname(session))
+        if SESSION_PATTERN.match(os.path.basename(session)) and (not symbols or symbol in symbols):
+            journals.append((symbol, path))
+    return journals
+
+def rerender_sessions(service, root='.', symbols=None, kinds=('pnl', 'detail')):
+    """
+    Submits P&L and/or detail charts for every historical session. Returns the futures.
+    """
+    from utility import pnl_chart, detail_trades
+    
+    futures = []
+    for symbol, journal_file in find_sessions(root, symbols):
+        if 'pnl' in kinds:
+            futures.append(service.submit(pnl_chart.create_pnl_chart, journal_file))
+        if 'detail' in kinds:
+            futures.append(service.submit(detail_trades.create_detailed_chart, journal_file, symbol))
+    return futures
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-render charts for all historical session folders")
+    parser.add_argument('symbols', nargs='*', help="Only these symbols (default: all)")
+    parser.add_argument('--root', default='.', help="Folder containing the SYMBOL/ session folders")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--kinds', default='pnl,detail', help="Comma-separated chart kinds: pnl, detail")
+    args = parser.parse_args()
+    
+    symbols = [s.upper() for s in args.symbols]
+    kinds = args.kinds.split(',')
+    start = time.perf_counter()
+    with RenderService(workers=args.workers) as service:
+        futures = rerender_sessions(service, args.root, symbols, kinds)
+        print(f"🖼️ Rendering {len(futures)} charts on {args.workers} workers...")
+        
+    failed = sum(1 for f in futures if f.exception() or f.result() is None)
+    print(f"✅ {len(futures) - failed}/{len(futures)} charts rendered in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
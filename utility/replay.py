@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Allow running as a script from the utility folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_loader
+import features
+from backtest import Backtester
+from bar_feed import ReplayFeed
+from model import get_model_features
+from utility.predict_signal import load_latest_model
+from utility.signal_daemon import SignalEngine, run_daemon
+
+class RecordingSink:
+    """
+    Keeps every emitted signal in memory.
+    """
+    def __init__(self):
+        self.signals = []
+        
+    async def emit(self, signal):
+        self.signals.append(signal)
+        
+    async def close(self):
+        pass
+
+def replay_live_path(symbol, frames, model, warmup=1560, speed=None):
+    """
+    Streams stored bars through the live path (SignalEngine: incremental
+    features, model, signal rules). Returns (signals DataFrame, elapsed seconds, bars streamed).
+    """
+    ref_symbol = data_loader.get_reference_symbol(symbol)
+    feed = ReplayFeed({symbol: frames[symbol], ref_symbol: frames[ref_symbol]}, warmup=warmup, speed=speed)
+    engine = SignalEngine(symbol, model, feed.history(), ref_symbol=ref_symbol, max_bars=warmup)
+    sink = RecordingSink()
+    
+    start = time.perf_counter()
+    asyncio.run(run_daemon(engine, feed, [sink]))
+    elapsed = time.perf_counter() - start
+    
+    signals = pd.DataFrame(sink.signals)
+    if not signals.empty:
+        signals.index = pd.to_datetime(signals['time'])
+    return signals, elapsed, len(feed.index) - feed.warmup
+
+def backtest_decisions(symbol, frames, model):
+    """
+    Runs the Backtester on the full stored history (batch features) and
+    returns per-bar model signals, batch probabilities and entry decisions.
+    """
+    ref_symbol = data_loader.get_reference_symbol(symbol)
+    feature_cols = get_model_features(model)
+    df_main, df_ref = data_loader.align_data(frames[symbol], frames[ref_symbol])
+    df = features.prepare_pair_features(df_main, df_ref, main_ticker=symbol, ref_ticker=ref_symbol,
+                                        feature_cols=feature_cols)
+                                        
+    bt = Backtester(df, model, feature_cols, symbol=symbol)
+    with contextlib.redirect_stdout(io.StringIO()):
+        bt.run(report=False)
+        
+    probs = model.predict_proba(df[feature_cols])
+    decisions = pd.DataFrame({'bt_signal': bt.signals}, index=df.index)
+    for c, name in [(-1, 'bt_prob_bearish'), (0, 'bt_prob_neutral'), (1, 'bt_prob_bullish')]:
+        decisions[name] = probs[:, list(model.classes_).index(c)] * 100 if c in model.classes_ else 0.0
+    entries = {t['EntryTime']: (1 if t['Type'] == 'call' else -1) for t in bt.journal}
+    decisions['bt_entry'] = [entries.get(t, 0) for t in df.index]
+    return decisions
+
+def compare(signals, decisions):
+    """
+    Aligns live signals with backtest decisions on the same bars.
+    """
+    diff = signals[['direction', 'reason', 'prob_bearish', 'prob_neutral', 'prob_bullish', 'latency_ms']].join(decisions, how='inner')
+    diff['signal_match'] = diff['direction'] == diff['bt_signal']
+    diff['entry_match'] = (diff['bt_entry'] == 0) | (diff['bt_entry'] == diff['direction'])
+    diff['prob_drift'] = np.abs(diff[['prob_bearish', 'prob_neutral', 'prob_bullish']].values -
+                                diff[['bt_prob_bearish', 'bt_prob_neutral', 'bt_prob_bullish']].values).max(axis=1)
+    return diff
+
+def print_report(symbol, diff, elapsed, n_bars):
+    latency = diff['latency_ms']
+    n_entries = int((diff['bt_entry'] != 0).sum())
+    print("\n" + "=" * 30)
+    print(f"LIVE vs BACKTEST REPLAY: {symbol}")
+    print("=" * 30)
+    print(f"Bars Replayed: {n_bars} in {elapsed:.2f}s ({n_bars / elapsed:,.1f} bars/s)")
+    print(f"Latency: p50 {np.percentile(latency, 50):.1f} ms | p95 {np.percentile(latency, 95):.1f} ms | max {latency.max():.1f} ms")
+    print(f"Signal Agreement: {diff['signal_match'].mean() * 100:.2f}% of {len(diff)} bars")
+    for reason, group in diff.groupby('reason'):
+        print(f"  {reason:<9} {len(group):>6} bars | agreement {group['signal_match'].mean() * 100:.2f}%")
+    print(f"Backtest Entries Matched: {int(diff.loc[diff['bt_entry'] != 0, 'entry_match'].sum())}/{n_entries}")
+    print(f"Probability Drift: mean {diff['prob_drift'].mean():.2f} pts | max {diff['prob_drift'].max():.2f} pts")
+    print("=" * 30)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay stored bars through the live signal path and diff against the backtest")
+    parser.add_argument('symbol', nargs='?', default='SPY')
+    parser.add_argument('--speed', type=float, default=None, help="Replay speed multiplier (default: as fast as possible)")
+    parser.add_argument('--warmup', type=int, default=1560, help="Bars of history before the first replayed bar")
+    parser.add_argument('--synthetic', type=int, default=None, help="Use N days of synthetic bars instead of SYMBOL_15m.csv")
+    parser.add_argument('--output', default='.', help="Folder for replay_signals.csv and replay_diff.csv")
+    args = parser.parse_args()
+    
+    symbol = args.symbol.upper()
+    ref_symbol = data_loader.get_reference_symbol(symbol)
+    model, _ = load_latest_model(symbol)
+    if model is None:
+        print(f"Error: No model found. Please train first with: python main.py {symbol}")
+        return
+        
+    if args.synthetic:
+        frames = {s: data_loader.generate_synthetic_data(args.synthetic, seed=i) for i, s in enumerate([symbol, ref_symbol])}
+    else:
+        frames = {s: data_loader.load_data(s) for s in [symbol, ref_symbol]}
+    frames = {s: df.set_axis(df.columns.get_level_values(0), axis=1) for s, df in frames.items()}
+    
+    print(f"▶️ Replaying {symbol} through the live path...")
+    signals, elapsed, n_bars = replay_live_path(symbol, frames, model, warmup=args.warmup, speed=args.speed)
+    if signals.empty:
+        print("No signals emitted (not enough bars after warm-up).")
+        return
+        
+    print("📊 Running Backtester on the same bars...")
+    decisions = backtest_decisions(symbol, frames, model)
+    diff = compare(signals, decisions)
+    
+    os.makedirs(args.output, exist_ok=True)
+    signals.to_csv(os.path.join(args.output, 'replay_signals.csv'), index=False)
+    diff.to_csv(os.path.join(args.output, 'replay_diff.csv'))
+    print_report(symbol, diff, elapsed, n_bars)
+    print(f"Signals and diff saved to '{args.output}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Allow running as a script from the utility folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import position_size
+
+METHODS = ['block', 'bootstrap', 'shuffle']
+PATHS = 100_000
+CHUNK_PATHS = 20_000 # Paths per vectorized batch (bounds memory to a few (trades x chunk) arrays)
+BLOCK_TRADES = 10 # Block length for the block bootstrap (keeps streaks of wins/losses together)
+RUIN_LEVEL = 0.5 # A path is ruined once its balance falls below this fraction of the start
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+def journal_trades(journal):
+    """
+    What a resampled trade needs: its entry premium (for sizing) and its
+    P&L per contract. The initial balance is recovered from the first row.
+    """
+    pnl = journal['PnL'].to_numpy(dtype=float)
+    premium = journal['EntryPremium'].to_numpy(dtype=float)
+    per_contract = pnl / journal['Contracts'].to_numpy(dtype=float)
+    initial_balance = journal['Balance'].iloc[0] - pnl[0]
+    return premium, per_contract, initial_balance
+
+def sample_order(rng, n_trades, n_paths, method='block', block=BLOCK_TRADES):
+    """
+    (n_trades, n_paths) trade indices, one column per path:
+    bootstrap = trades drawn with replacement, block = circular blocks of
+    consecutive trades drawn with replacement, shuffle = a permutation of
+    the journal (same trades, different order).
+    """
+    if method == 'bootstrap':
+        return rng.integers(0, n_trades, size=(n_trades, n_paths), dtype=np.int32)
+    if method == 'block':
+        n_blocks = -(-n_trades // block)
+        starts = rng.integers(0, n_trades, size=(n_blocks, 1, n_paths), dtype=np.int32)
+        order = (starts + np.arange(block, dtype=np.int32)[None, :, None]) % n_trades
+        return order.reshape(n_blocks * block, n_paths)[:n_trades]
+    if method == 'shuffle':
+        return rng.permuted(np.tile(np.arange(n_trades, dtype=np.int32)[:, None], (1, n_paths)), axis=0)
+    raise ValueError(f"Unknown method '{method}' (expected one of {METHODS})")
+
+def simulate(premium, per_contract, initial_balance=1000, paths=PATHS, method='block', block=BLOCK_TRADES,
+             ruin_level=RUIN_LEVEL, seed=42):
+    """
+    Re-runs the journal's trades in resampled orders with the backtest's
+    sizing (backtest.position_size): every path compounds its own balance,
+    so the same trade is sized differently after a win streak than after a
+    drawdown. Vectorized over paths (in CHUNK_PATHS batches), one step per
+    trade. Returns per-path arrays: final balance, max drawdown %, ruined,
+    trades taken.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(premium)
+    out = {'final_balance': np.empty(paths), 'max_drawdown_pct': np.empty(paths),
+           'ruined': np.empty(paths, dtype=bool), 'trades': np.empty(paths, dtype=np.int32)}
+    for start in range(0, paths, CHUNK_PATHS):
+        size = min(CHUNK_PATHS, paths - start)
+        order = sample_order(rng, n, size, method, block)
+        premiums, pnls = premium[order], per_contract[order]
+        balance = np.full(size, float(initial_balance))
+        peak = balance.copy()
+        drawdown = np.zeros(size)
+        ruined = np.zeros(size, dtype=bool)
+        taken = np.zeros(size, dtype=np.int32)
+        for t in range(n):
+            contracts = position_size(balance, premiums[t])
+            balance += contracts * pnls[t]
+            np.maximum(peak, balance, out=peak)
+            np.minimum(drawdown, balance / peak - 1, out=drawdown)
+            ruined |= balance < initial_balance * ruin_level
+            taken += contracts > 0
+        rows = slice(start, start + size)
+        out['final_balance'][rows] = balance
+        out['max_drawdown_pct'][rows] = drawdown * 100
+        out['ruined'][rows] = ruined
+        out['trades'][rows] = taken
+    return out
+
+def summarize(result, initial_balance):
+    """
+    Distribution summary of simulate() paths: return quantiles, probability
+    of ending down, ruin probability and drawdown quantiles.
+    """
+    returns = (result['final_balance'] / initial_balance - 1) * 100
+    drawdown = result['max_drawdown_pct']
+    summary = {'paths': len(returns), 'mean_return_pct': returns.mean()}
+    summary.update({f"return_p{int(q * 100)}": v for q, v in zip(QUANTILES, np.quantile(returns, QUANTILES))})
+    summary.update({
+        'prob_loss': (returns < 0).mean(),
+        'prob_ruin': result['ruined'].mean(),
+        'drawdown_median': np.median(drawdown),
+        # Worst 5% of paths (drawdowns are negative)
+        'drawdown_p95': np.quantile(drawdown, 0.05),
+        'mean_trades': result['trades'].mean()
+    })
+    return summary
+
+def resample_journal(journal, **kwargs):
+    """
+    simulate() + summarize() for one trade journal, with the journal's own
+    return for comparison.
+    """
+    premium, per_contract, initial_balance = journal_trades(journal)
+    summary = summarize(simulate(premium, per_contract, initial_balance, **kwargs), initial_balance)
+    summary['actual_return_pct'] = (journal['Balance'].iloc[-1] / initial_balance - 1) * 100
+    return summary
+
+def resample_sessions(root='.', paths=PATHS, method='block', block=BLOCK_TRADES, ruin_level=RUIN_LEVEL, seed=42,
+                      **filters):
+    """
+    One summary row per indexed session (utility/results_index.py), read
+    from the index's columnar trade table rather than each CSV.
+    filters: symbol / since / until, as ResultsIndex.query.
+    """
+    from utility.results_index import ResultsIndex
+    
+    index = ResultsIndex(root)
+    index.scan()
+    runs = index.query(**filters)
+    if runs.empty:
+        return pd.DataFrame()
+    trades = index.trades[index.trades['session'].isin(runs['session'])]
+    rows = []
+    for session, journal in trades.groupby('session', observed=True, sort=False):
+        rows.append({'session': session, 'n_trades': len(journal),
+                     **resample_journal(journal, paths=paths, method=method, block=block,
+                                        ruin_level=ruin_level, seed=seed)})
+    return pd.DataFrame(rows)
+
+def print_summary(summary, label=''):
+    print(f"🎲 Monte Carlo{f' {label}' if label else ''}: {summary['paths']:,} paths")
+    print(f"   Return: p5 {summary['return_p5']:,.0f}% | median {summary['return_p50']:,.0f}% | "
+          f"p95 {summary['return_p95']:,.0f}% (actual {summary['actual_return_pct']:,.0f}%)")
+    print(f"   P(loss) {summary['prob_loss'] * 100:.1f}% | P(ruin) {summary['prob_ruin'] * 100:.1f}% | "
+          f"Max DD median {summary['drawdown_median']:.1f}%, worst 5% {summary['drawdown_p95']:.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap / shuffled-sequence Monte Carlo of trade journals")
+    parser.add_argument('sessions', nargs='*', help="Session folders or trade_journal.csv files (default: all indexed sessions)")
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--symbol', nargs='*', default=None)
+    parser.add_argument('--since', default=None)
+    parser.add_argument('--until', default=None)
+    parser.add_argument('--paths', type=int, default=PATHS)
+    parser.add_argument('--method', default='block', choices=METHODS)
+    parser.add_argument('--block', type=int, default=BLOCK_TRADES, help="Trades per block (block bootstrap)")
+    parser.add_argument('--ruin', type=float, default=RUIN_LEVEL, help="Ruin = balance below this fraction of the start")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default=None, help="Save the bulk summary table as CSV")
+    args = parser.parse_args()
+    
+    options = {'paths': args.paths, 'method': args.method, 'block': args.block, 'ruin_level': args.ruin, 'seed': args.seed}
+    start = time.perf_counter()
+    if args.sessions:
+        for session in args.sessions:
+            path = session if session.endswith('.csv') else os.path.join(session, 'trade_journal.csv')
+            journal = pd.read_csv(path)
+            print_summary(resample_journal(journal, **options), label=f"{session} ({args.method})")
+    else:
+        table = resample_sessions(args.root, symbol=args.symbol, since=args.since, until=args.until, **options)
+        if table.empty:
+            print("No sessions.")
+            return
+        show = ['session', 'n_trades', 'actual_return_pct', 'return_p5', 'return_p50', 'return_p95',
+                'prob_loss', 'prob_ruin', 'drawdown_median', 'drawdown_p95']
+        pd.set_option('display.width', 200)
+        print(table[show].to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        if args.out:
+            table.to_csv(args.out, index=False)
+    print(f"\n⏱️ {(time.perf_counter() - start):.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Allow running as a script from the utility folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INDEX_FILE = 'results_index.pkl'
+SESSION_PATTERN = re.compile(r'^(\d{2})(\d{2})_(\d{2})_(\d{2})$') # HHMM_MM_DD
+METRICS = ['net_pnl', 'return_pct', 'win_rate', 'trades', 'max_drawdown_pct', 'avg_win', 'avg_loss', 'final_balance']
+
+def _session_time(name, mtime, last_exit=None):
+    """
+    Start of a HHMM_MM_DD session. Folder names carry no year: it is the
+    year of the journal's last exit (the run came after its trades), or of
+    the file's mtime when there are none. File times change on every copy
+    or clone, so they only serve as an upper bound.
+    """
+    hh, mi, mm, dd = (int(g) for g in SESSION_PATTERN.match(name).groups())
+    latest = pd.Timestamp(datetime.fromtimestamp(mtime))
+    
+    def at(year):
+        try:
+            return pd.Timestamp(year=year, month=mm, day=dd, hour=hh, minute=mi)
+        except ValueError: # Feb 29 outside a leap year
+            return pd.NaT
+            
+    if last_exit is not None and not pd.isna(last_exit):
+        last_exit = pd.Timestamp(last_exit)
+        last_exit = last_exit.tz_localize(None) if last_exit.tzinfo is not None else last_exit
+        started = at(last_exit.year)
+        if not pd.isna(started) and started < last_exit.normalize():
+            started = at(last_exit.year + 1) # e.g. a January run on December trades
+    else:
+        started = at(latest.year)
+    if not pd.isna(started) and started > latest:
+        started = at(started.year - 1)
+    return started
+
+def run_metrics(journal):
+    """
+    Per-run summary from one trade journal (same definitions as the backtest report).
+    """
+    pnl = journal['PnL'].to_numpy(dtype=float)
+    pnl_pct = journal['PnL%'].to_numpy(dtype=float)
+    balance = journal['Balance'].to_numpy(dtype=float)
+    win = pnl > 0
+    initial_balance = balance[0] - pnl[0]
+    equity = np.concatenate([[initial_balance], balance])
+    peak = np.maximum.accumulate(equity)
+    return {
+        'trades': len(journal),
+        'wins': int(win.sum()),
+        'win_rate': win.mean() * 100,
+        'net_pnl': pnl.sum(),
+        'return_pct': pnl.sum() / initial_balance * 100,
+        'final_balance': balance[-1],
+        'max_drawdown_pct': ((equity - peak) / peak).min() * 100,
+        'avg_win': pnl_pct[win].mean() if win.any() else np.nan,
+        'avg_loss': pnl_pct[~win].mean() if (~win).any() else np.nan,
+        'first_trade': journal['EntryTime'].iloc[0],
+        'last_trade': journal['ExitTime'].iloc[-1]
+    }
+
+class ResultsIndex:
+    """
+    One columnar store (pandas pickle) for all SYMBOL/HHMM_MM_DD runs:
+    `runs` has one row of metrics per session, `trades` every journal row
+    tagged with its session. scan() only re-reads sessions whose journal
+    changed (mtime/size), so refreshing thousands of sessions costs a stat each.
+    """
+    def __init__(self, root='.', path=None):
+        self.root = root
+        self.path = path or os.path.join(root, INDEX_FILE)
+        self.runs = pd.DataFrame()
+        self.trades = pd.DataFrame()
+        self.skipped = {} # Unreadable or empty journals: {session: (mtime_ns, size)}
+        if os.path.exists(self.path):
+            data = pd.read_pickle(self.path)
+            self.runs, self.trades = data['runs'], data['trades']
+            self.skipped = data.get('skipped', {})
+            
+    def _session_files(self):
+        found = {}
+        for path in glob.glob(os.path.join(self.root, '*', '*', 'trade_journal.csv')):
+            folder = os.path.dirname(path)
+            if SESSION_PATTERN.match(os.path.basename(folder)):
+                stat = os.stat(path)
+                session = os.path.relpath(folder, self.root).replace(os.sep, '/')
+                found[session] = (path, stat.st_mtime_ns, stat.st_size)
+        return found
+        
+    def scan(self):
+        """
+        Incremental refresh. Returns (added or updated, removed) session counts.
+        """
+        found = self._session_files()
+        known = {} if self.runs.empty else dict(zip(self.runs['session'], zip(self.runs['mtime_ns'], self.runs['size'])))
+        changed = [s for s, (_, mtime_ns, size) in found.items()
+                   if known.get(s, self.skipped.get(s)) != (mtime_ns, size)]
+        removed = [s for s in known if s not in found]
+        skipped = {s: v for s, v in self.skipped.items() if s in found and s not in changed}
+        if not changed and not removed and len(skipped) == len(self.skipped):
+            return 0, 0
+            
+        runs, trades = [], []
+        for session in changed:
+            path, mtime_ns, size = found[session]
+            try:
+                journal = pd.read_csv(path, parse_dates=['EntryTime', 'ExitTime'])
+            except (ValueError, pd.errors.EmptyDataError):
+                journal = None
+            if journal is None or journal.empty or 'PnL' not in journal.columns:
+                # Not parsed again until the file changes
+                skipped[session] = (mtime_ns, size)
+                continue
+            symbol, name = session.split('/')
+            folder = os.path.dirname(path)
+            model_file = os.path.join(folder, 'trained_model.pkl')
+            runs.append({'session': session, 'symbol': symbol,
+                         'started': _session_time(name, mtime_ns / 1e9, journal['ExitTime'].iloc[-1]),
+                         'mtime_ns': mtime_ns, 'size': size,
+                         'model_bytes': os.path.getsize(model_file) if os.path.exists(model_file) else 0,
+                         **run_metrics(journal)})
+            journal.insert(0, 'session', session)
+            trades.append(journal)
+            
+        self.skipped = skipped
+        drop = (set(changed) | set(removed)) & set(known)
+        if not runs and not drop:
+            # Only unreadable or empty journals changed
+            self.save()
+            return 0, 0
+        keep_runs = self.runs[~self.runs['session'].isin(drop)] if not self.runs.empty else self.runs
+        keep_trades = self.trades[~self.trades['session'].isin(drop)] if not self.trades.empty else self.trades
+        if keep_runs.empty and not runs:
+            self.runs, self.trades = pd.DataFrame(), pd.DataFrame()
+        else:
+            self.runs = pd.concat([keep_runs, pd.DataFrame(runs)], ignore_index=True).sort_values(['symbol', 'started'])
+            self.trades = pd.concat([keep_trades] + trades, ignore_index=True)
+            for frame in (self.runs, self.trades):
+                frame['session'] = frame['session'].astype('category')
+            self.runs = self.runs.reset_index(drop=True)
+        self.save()
+        return len(runs), len(removed)
+        
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        pd.to_pickle({'runs': self.runs, 'trades': self.trades, 'skipped': self.skipped}, tmp)
+        os.replace(tmp, self.path)
+        
+    def query(self, symbol=None, since=None, until=None):
+        """
+        Runs filtered by symbol(s) and session start date.
+        """
+        runs = self.runs
+        if runs.empty:
+            return runs
+        if symbol:
+            symbols = [symbol] if isinstance(symbol, str) else symbol
+            runs = runs[runs['symbol'].isin([s.upper() for s in symbols])]
+        if since:
+            runs = runs[runs['started'] >= pd.Timestamp(since)]
+        if until:
+            runs = runs[runs['started'] < pd.Timestamp(until) + pd.Timedelta(days=1)]
+        return runs
+        
+    def rank(self, by='net_pnl', ascending=False, limit=10, **filters):
+        # Descending for every metric (drawdowns are negative, so the shallowest ranks first)
+        return self.query(**filters).sort_values(by, ascending=ascending).head(limit)
+        
+    def latest(self, symbol):
+        """
+        Folder of the most recent session for a symbol (None if there is none).
+        """
+        runs = self.query(symbol=symbol)
+        return None if runs.empty else os.path.join(self.root, runs.sort_values('started')['session'].iloc[-1])
+        
+    def journal(self, session):
+        return self.trades[self.trades['session'] == session].drop(columns='session').reset_index(drop=True)
+        
+    def diff(self, session_a, session_b):
+        """
+        Compares two runs' journals trade by trade (matched on EntryTime).
+        Returns (metric deltas, trades table with a 'change' column).
+        """
+        a, b = self.journal(session_a), self.journal(session_b)
+        cols = [c for c in ['EntryTime', 'Type', 'Strike', 'PnL%', 'PnL'] if c in a.columns]
+        merged = a[cols].merge(b[cols], on='EntryTime', how='outer', suffixes=('_a', '_b'), indicator=True)
+        merged['change'] = merged['_merge'].map({'left_only': 'only_a', 'right_only': 'only_b', 'both': 'same'}).astype(str)
+        both = merged['_merge'] == 'both'
+        differs = both & ((merged['Type_a'] != merged['Type_b']) | ~np.isclose(merged['PnL%_a'], merged['PnL%_b']))
+        merged.loc[differs, 'change'] = 'changed'
+        merged = merged.drop(columns='_merge').sort_values('EntryTime').reset_index(drop=True)
+        
+        runs = self.runs.set_index('session')
+        metrics = pd.DataFrame({'a': runs.loc[session_a, METRICS], 'b': runs.loc[session_b, METRICS]})
+        metrics['delta'] = metrics['b'] - metrics['a']
+        return metrics, merged
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and query all SYMBOL/HHMM_MM_DD backtest runs")
+    parser.add_argument('command', choices=['scan', 'list', 'rank', 'latest', 'diff'])
+    parser.add_argument('args', nargs='*', help="latest: SYMBOL | diff: SESSION_A SESSION_B (e.g. SPY/1230_11_25)")
+    parser.add_argument('--root', default='.')
+    parser.add_argument('--symbol', nargs='*', default=None)
+    parser.add_argument('--since', default=None, help="Sessions started on/after this date")
+    parser.add_argument('--until', default=None, help="Sessions started on/before this date")
+    parser.add_argument('--by', default='net_pnl', choices=METRICS)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--no-scan', action='store_true', help="Query the existing index without refreshing it")
+    args = parser.parse_args()
+    
+    index = ResultsIndex(args.root)
+    if not args.no_scan:
+        start = time.perf_counter()
+        updated, removed = index.scan()
+        if updated or removed or args.command == 'scan':
+            print(f"🗂️ Index: {len(index.runs)} runs, {len(index.trades):,} trades "
+                  f"({updated} updated, {removed} removed in {(time.perf_counter() - start) * 1000:.0f} ms)")
+                  
+    start = time.perf_counter()
+    filters = {'symbol': args.symbol, 'since': args.since, 'until': args.until}
+    show = ['session', 'started', 'trades', 'win_rate', 'net_pnl', 'return_pct', 'max_drawdown_pct', 'final_balance']
+    pd.set_option('display.width', 200)
+    
+    if args.command == 'list':
+        runs = index.query(**filters)
+        print(runs[show].tail(args.limit).to_string(index=False) if not runs.empty else "No runs.")
+    elif args.command == 'rank':
+        runs = index.rank(by=args.by, limit=args.limit, **filters)
+        print(runs[show].to_string(index=False) if not runs.empty else "No runs.")
+    elif args.command == 'latest':
+        for symbol in args.args or args.symbol or []:
+            print(f"{symbol.upper()}: {index.latest(symbol) or 'no sessions'}")
+    elif args.command == 'diff':
+        if len(args.args) != 2:
+            parser.error("diff needs two sessions, e.g. SPY/1230_11_25 SPY/1415_11_26")
+        metrics, trades = index.diff(*args.args)
+        print(metrics.to_string())
+        print("\n" + trades['change'].value_counts().to_string())
+        print("\n" + trades[trades['change'] != 'same'].head(args.limit).to_string(index=False))
+    if args.command != 'scan':
+        print(f"\n⏱️ Query: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Allow running as a script from the utility folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_loader
+import features
+from model import get_model_features
+from utility.predict_signal import load_latest_model, momentum_pct, decide_signal, option_targets
+
+def _symbol_features(job):
+    """
+    Worker: pair features for one symbol (only the columns its model needs).
+    """
+    symbol, ref_symbol, df_main, df_ref, feature_cols = job
+    df_main, df_ref = data_loader.align_data(df_main, df_ref)
+    df = features.prepare_pair_features(df_main, df_ref, main_ticker=symbol, ref_ticker=ref_symbol,
+                                        feature_cols=feature_cols)
+    return symbol, df.iloc[[-1]] if not df.empty else df, momentum_pct(df_main['Close'].values)
+
+def _flatten(df):
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+def scan(watchlist, period='60d', interval='15m', workers=None):
+    """
+    Scores a watchlist in one pass:
+    1. Loads every distinct symbol (watchlist + reference tickers) once, concurrently.
+    2. Builds each symbol's features in a process pool.
+    3. Scores all symbols sharing a model with a single predict_proba call.
+    Returns a signal table ranked by actionable signals first, then confidence.
+    """
+    watchlist = list(dict.fromkeys(s.upper() for s in watchlist))
+    refs = {s: data_loader.get_reference_symbol(s) for s in watchlist}
+    
+    # 1. Models (grouped by session folder so each model is called once)
+    models, groups = {}, {}
+    for symbol in watchlist:
+        model, folder_name = load_latest_model(symbol)
+        if model is None:
+            print(f"⚠️ No model for {symbol}, skipping (train with: python main.py {symbol})")
+            continue
+        models[folder_name] = model
+        groups.setdefault(folder_name, []).append(symbol)
+    symbols = [s for members in groups.values() for s in members]
+    if not symbols:
+        return pd.DataFrame()
+        
+    # 2. Data: each distinct ticker loaded once
+    distinct = list(dict.fromkeys(symbols + [refs[s] for s in symbols]))
+    print(f"📥 Loading {len(distinct)} distinct tickers for {len(symbols)} symbols...")
+    with ThreadPoolExecutor(max_workers=min(8, len(distinct))) as pool:
+        frames = dict(zip(distinct, pool.map(lambda s: _flatten(data_loader.load_data(s, period=period, interval=interval)), distinct)))
+        
+    # 3. Features, concurrently
+    jobs = []
+    for folder_name, members in groups.items():
+        feature_cols = get_model_features(models[folder_name])
+        for symbol in members:
+            if frames[symbol].empty or frames[refs[symbol]].empty:
+                print(f"⚠️ No data for {symbol} or {refs[symbol]}, skipping")
+                continue
+            jobs.append((symbol, refs[symbol], frames[symbol], frames[refs[symbol]], feature_cols))
+    print(f"🧠 Processing features for {len(jobs)} symbols...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = {symbol: (last_row, momentum) for symbol, last_row, momentum in pool.map(_symbol_features, jobs)}
+        
+    # 4. Batch scoring: one call per model
+    rows = []
+    for folder_name, members in groups.items():
+        model = models[folder_name]
+        members = [s for s in members if s in results and not results[s][0].empty]
+        if not members:
+            continue
+        feature_cols = get_model_features(model)
+        X = pd.concat([results[s][0][feature_cols] for s in members])
+        probs = model.predict_proba(X)
+        
+        for symbol, p in zip(members, probs):
+            last_row, momentum = results[symbol]
+            last_price = float(last_row[f'{symbol}_Close'].values[0])
+            prob_map = {int(c): float(v) * 100 for c, v in zip(model.classes_, p)}
+            prediction, win_prob, reason = decide_signal(prob_map, momentum)
+            row = {
+                'Symbol': symbol,
+                'Time': last_row.index[0],
+                'Price': round(last_price, 2),
+                'Signal': {1: 'BULLISH', -1: 'BEARISH'}.get(prediction, 'NEUTRAL'),
+                'Confidence': round(win_prob, 2),
+                'Reason': reason,
+                'Bearish%': round(prob_map.get(-1, 0), 2),
+                'Neutral%': round(prob_map.get(0, 0), 2),
+                'Bullish%': round(prob_map.get(1, 0), 2),
+                'Momentum%': round(momentum, 2),
+                'Strike': None,
+                'Option': None,
+                'EntryPremium': None
+            }
+            if prediction != 0:
+                targets = option_targets(last_price, prediction)
+                row.update({'Strike': targets['strike'], 'Option': targets['option_type'],
+                            'EntryPremium': round(targets['entry_premium'], 2)})
+            rows.append(row)
+            
+    if not rows:
+        return pd.DataFrame()
+    table = pd.DataFrame(rows)
+    table['_active'] = table['Signal'] != 'NEUTRAL'
+    table = table.sort_values(['_active', 'Confidence'], ascending=False).drop(columns='_active')
+    return table.reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-symbol live signal scanner")
+    parser.add_argument('symbols', nargs='*', default=['SPY', 'QQQ', 'IWM'])
+    parser.add_argument('--workers', type=int, default=None, help="Feature worker processes (default: CPU count)")
+    parser.add_argument('--csv', default=None, help="Export the ranked signal table to this CSV")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    table = scan(args.symbols, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    if table.empty:
+        print("No signals (no models or no data).")
+        return
+        
+    print("\n" + "=" * 30)
+    print("SIGNAL SCAN")
+    print("=" * 30)
+    print(table.to_string(index=False))
+    print(f"\nScanned {len(table)} symbols in {elapsed:.1f}s")
+    
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+        print(f"📊 Signal table saved to '{args.csv}'")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import asyncio
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Allow running as a script from the utility folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bar_feed import OHLCV, ReplayFeed, YFinancePollFeed
+from data_loader import get_reference_symbol
+from live_features import LiveFeatures
+from model import get_model_features
+from utility.predict_signal import load_latest_model, MOMENTUM_BARS, momentum_pct, decide_signal, option_targets
+
+class SignalEngine:
+    """
+    Keeps the model and the features' running state in memory and turns
+    every closed bar into a signal with the same rules as predict_signal.
+    The last max_bars of history (default ~60 trading days of 15m bars, the
+    window predict_signal downloads) warm the state up; each bar then only
+    updates it (live_features), so the cost per bar does not grow with the
+    history.
+    """
+    def __init__(self, symbol, model, history, ref_symbol=None, max_bars=1560):
+        self.symbol = symbol
+        self.ref_symbol = ref_symbol or get_reference_symbol(symbol)
+        self.model = model
+        self.feature_cols = get_model_features(model)
+        self.features = LiveFeatures(self.symbol, self.ref_symbol, self.feature_cols)
+        self.closes = deque(maxlen=MOMENTUM_BARS)
+        self.row = None
+        main = history[self.symbol][OHLCV].iloc[-max_bars:].astype(float)
+        ref = history[self.ref_symbol][OHLCV].iloc[-max_bars:].astype(float)
+        for timestamp, main_bar, ref_bar in zip(main.index, main.to_dict('records'), ref.to_dict('records')):
+            self._update(timestamp, main_bar, ref_bar)
+            
+    @property
+    def bars(self):
+        return self.features.bars
+        
+    def _update(self, timestamp, main_bar, ref_bar):
+        self.closes.append(float(main_bar['Close']))
+        self.row = self.features.update(timestamp, main_bar, ref_bar)
+        
+    def on_bar(self, timestamp, bars):
+        """
+        Updates rolling state with one closed bar and returns the signal dict
+        (None while there is not enough history for the model's features).
+        """
+        start = time.perf_counter()
+        self._update(timestamp, bars[self.symbol], bars[self.ref_symbol])
+        if any(np.isnan(v) for v in self.row.values()):
+            return None
+            
+        last_row = pd.DataFrame([self.row], columns=self.feature_cols)
+        last_price = self.closes[-1]
+        probs = self.model.predict_proba(last_row)[0]
+        prob_map = {int(c): float(p) * 100 for c, p in zip(self.model.classes_, probs)}
+        
+        prediction, win_prob, reason = decide_signal(prob_map, momentum_pct(np.array(self.closes)))
+        signal = {
+            'time': timestamp.isoformat(),
+            'symbol': self.symbol,
+            'price': last_price,
+            'direction': prediction,
+            'signal': {1: 'BULLISH', -1: 'BEARISH'}.get(prediction, 'NEUTRAL'),
+            'reason': reason,
+            'confidence': win_prob,
+            'prob_bearish': prob_map.get(-1, 0.0),
+            'prob_neutral': prob_map.get(0, 0.0),
+            'prob_bullish': prob_map.get(1, 0.0)
+        }
+        if prediction != 0:
+            signal.update(option_targets(last_price, prediction))
+        signal['latency_ms'] = (time.perf_counter() - start) * 1000
+        return signal
+
+class JsonlSink:
+    """
+    Appends each signal as one JSON line (flushed immediately).
+    """
+    def __init__(self, path):
+        self.file = open(path, 'a')
+        
+    async def emit(self, signal):
+        self.file.write(json.dumps(signal) + '\n')
+        self.file.flush()
+        
+    async def close(self):
+        self.file.close()
+
+class SocketSink:
+    """
+    Broadcasts each signal as a JSON line to all clients of a local Unix socket.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.clients = set()
+        self.server = None
+        
+    async def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.server = await asyncio.start_unix_server(self._on_client, path=self.path)
+        
+    async def _on_client(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            await reader.read() # Wait until the client disconnects
+        finally:
+            self.clients.discard(writer)
+            
+    async def emit(self, signal):
+        line = (json.dumps(signal) + '\n').encode()
+        for writer in list(self.clients):
+            try:
+                writer.write(line)
+                await writer.drain()
+            except (ConnectionError, RuntimeError):
+                self.clients.discard(writer)
+                
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class ConsoleSink:
+    """
+    Prints a one-line summary per signal.
+    """
+    async def emit(self, signal):
+        extra = f" | {signal['strike']} {signal['option_type'].upper()} @ ${signal['entry_premium']:.2f}" if signal['direction'] else ''
+        print(f"[{signal['time']}] {signal['symbol']} ${signal['price']:.2f} {signal['signal']} "
+              f"({signal['confidence']:.1f}%, {signal['reason']}){extra} | {signal['latency_ms']:.1f} ms")
+              
+    async def close(self):
+        pass
+
+async def run_daemon(engine, feed, sinks):
+    """
+    Consumes the feed until it ends (replay) or is cancelled (live).
+    Feature and model work runs in a single worker thread so socket clients
+    keep being served while a bar is scored.
+    """
+    for sink in sinks:
+        if hasattr(sink, 'start'):
+            await sink.start()
+            
+    loop = asyncio.get_running_loop()
+    emitted = 0
+    try:
+        async for timestamp, bars in feed.bars():
+            signal = await loop.run_in_executor(None, engine.on_bar, timestamp, bars)
+            if signal is None:
+                continue
+            emitted += 1
+            for sink in sinks:
+                await sink.emit(signal)
+    finally:
+        for sink in sinks:
+            await sink.close()
+    return emitted
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident live signal daemon")
+    parser.add_argument('symbol', nargs='?', default='SPY')
+    parser.add_argument('--replay', action='store_true', help="Replay local SYMBOL_15m.csv files instead of polling yfinance")
+    parser.add_argument('--speed', type=float, default=None, help="Replay speed multiplier (default: as fast as possible)")
+    parser.add_argument('--warmup', type=int, default=1560, help="Bars used as history before replay starts")
+    parser.add_argument('--jsonl', default=None, help="Append signals to this JSONL file")
+    parser.add_argument('--socket', default=None, help="Broadcast signals on this Unix socket path")
+    parser.add_argument('--quiet', action='store_true', help="No console output per signal")
+    args = parser.parse_args()
+    
+    symbol = args.symbol.upper()
+    ref_symbol = get_reference_symbol(symbol)
+    
+    model, folder_name = load_latest_model(symbol)
+    if model is None:
+        print(f"Error: No model found. Please train first with: python main.py {symbol}")
+        return
+        
+    if args.replay:
+        feed = ReplayFeed.from_csv([symbol, ref_symbol], warmup=args.warmup, speed=args.speed)
+    else:
+        feed = YFinancePollFeed([symbol, ref_symbol])
+    engine = SignalEngine(symbol, model, feed.history(), ref_symbol=ref_symbol)
+    
+    sinks = [] if args.quiet else [ConsoleSink()]
+    if args.jsonl:
+        sinks.append(JsonlSink(args.jsonl))
+    if args.socket:
+        sinks.append(SocketSink(args.socket))
+        
+    print(f"🛰️ Signal daemon for {symbol} (ref {ref_symbol}) started. Warm-up: {engine.bars} bars.")
+    try:
+        emitted = asyncio.run(run_daemon(engine, feed, sinks))
+        print(f"Feed finished. {emitted} signals emitted.")
+    except KeyboardInterrupt:
+        print("Signal daemon stopped.")
+
+if __name__ == "__main__":
+    main()